@@ -1,17 +1,19 @@
 from django.contrib import admin
 
-from .models import Conference, ConferenceRating
+from .models import Conference, ConferenceRating, ConferenceRatingSummary
 
 
 @admin.register(Conference)
 class ConferenceAdmin(admin.ModelAdmin):
-    list_display = ('title', 'location', 'start_date', 'end_date', 'publication_recommended')
+    list_display = (
+        'title', 'location', 'start_date', 'end_date', 'participant_count', 'capacity', 'publication_recommended'
+    )
     list_filter = ('publication_recommended', 'start_date', 'end_date')
     search_fields = ('title', 'location')
     ordering = ('start_date',)
     fields = (
         'title', 'topics', 'location', 'start_date', 'end_date', 'description', 'participation_conditions',
-        'owner', 'participants', 'publication_recommended'
+        'capacity', 'owner', 'participants', 'publication_recommended'
     )
     filter_horizontal = ('participants',)
 
@@ -20,3 +22,10 @@ class ConferenceAdmin(admin.ModelAdmin):
 class ConferenceRatingAdmin(admin.ModelAdmin):
     list_display = ('user', 'conference', 'rating')
     search_fields = ('user__username', 'conference__title')
+
+
+@admin.register(ConferenceRatingSummary)
+class ConferenceRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ('conference', 'ratings_count', 'bayesian_score')
+    ordering = ('-bayesian_score',)
+    readonly_fields = ('ratings_count', 'ratings_sum', 'histogram', 'bayesian_score', 'updated_at')
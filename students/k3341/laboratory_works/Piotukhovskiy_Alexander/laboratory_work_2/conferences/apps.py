@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ConferencesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'conferences'
+
+    def ready(self):
+        from . import signals  # noqa: F401
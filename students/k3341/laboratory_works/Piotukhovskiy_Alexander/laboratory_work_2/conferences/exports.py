@@ -0,0 +1,42 @@
+import csv
+import json
+
+from .models import Conference
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_FIELDS = ('conference_id', 'conference_title', 'user_id', 'username', 'email')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def participant_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    # Одна выборка по промежуточной таблице участников с курсором порциями по chunk_size строк:
+    # в памяти никогда не оказывается больше одной порции
+    registrations = Conference.participants.through.objects.order_by('conference_id', 'user_id').values_list(
+        'conference_id', 'conference__title', 'user_id', 'user__username', 'user__email'
+    )
+    return registrations.iterator(chunk_size=chunk_size)
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(EchoBuffer())
+    # BOM, чтобы Excel открывал кириллицу без выбора кодировки
+    yield '\ufeff' + writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+def export_lines(export_format, rows):
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
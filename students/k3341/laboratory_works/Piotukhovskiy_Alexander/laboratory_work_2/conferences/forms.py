@@ -15,7 +15,10 @@ class ConferenceForm(forms.ModelForm):
 
     class Meta:
         model = Conference
-        fields = ['title', 'topics', 'location', 'start_date', 'end_date', 'description', 'participation_conditions']
+        fields = [
+            'title', 'topics', 'location', 'start_date', 'end_date', 'description', 'participation_conditions',
+            'capacity',
+        ]
 
 
 class ConferenceRatingForm(forms.ModelForm):
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from conferences.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводки оценок конференций по таблице оценок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', nargs='*', type=int, help='Конференции для пересчёта (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_rating_summaries(options['conference_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано сводок: {rebuilt}'))
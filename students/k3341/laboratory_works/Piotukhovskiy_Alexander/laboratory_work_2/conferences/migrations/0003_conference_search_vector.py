@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(topics, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(location, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'C') ||
+    setweight(to_tsvector('russian', coalesce(participation_conditions, '')), 'D')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # GIN-индекс и заполнение вектора для существующих конференций нужны только в PostgreSQL;
+    # на остальных базах поиск идёт по индексу в памяти процесса
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"UPDATE conferences_conference SET search_vector = {SEARCH_VECTOR_SQL}")
+    schema_editor.execute(
+        "CREATE INDEX conference_search_vector_gin ON conferences_conference USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS conference_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0002_conference_created_at_conference_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
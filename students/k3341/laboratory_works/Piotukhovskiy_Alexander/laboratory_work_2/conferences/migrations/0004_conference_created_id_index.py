@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0003_conference_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conference',
+            index=models.Index(fields=['-created_at', '-id'], name='conference_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:03
+
+import conferences.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_rating_summaries(apps, schema_editor):
+    ConferenceRating = apps.get_model('conferences', 'ConferenceRating')
+    ConferenceRatingSummary = apps.get_model('conferences', 'ConferenceRatingSummary')
+
+    histograms = {}
+    for conference_id, rating, count in ConferenceRating.objects.values_list('conference', 'rating').annotate(
+        count=Count('id')
+    ).order_by():
+        histograms.setdefault(conference_id, [0] * 10)[rating - 1] = count
+
+    summaries = []
+    for conference_id, histogram in histograms.items():
+        ratings_count = sum(histogram)
+        ratings_sum = sum((rating + 1) * count for rating, count in enumerate(histogram))
+        summaries.append(ConferenceRatingSummary(
+            conference_id=conference_id,
+            ratings_count=ratings_count,
+            ratings_sum=ratings_sum,
+            histogram=histogram,
+            bayesian_score=(settings.RATING_PRIOR_WEIGHT * settings.RATING_PRIOR_MEAN + ratings_sum)
+            / (settings.RATING_PRIOR_WEIGHT + ratings_count),
+        ))
+    ConferenceRatingSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0004_conference_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConferenceRatingSummary',
+            fields=[
+                ('conference', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='conferences.conference')),
+                ('ratings_count', models.PositiveIntegerField(default=0)),
+                ('ratings_sum', models.PositiveIntegerField(default=0)),
+                ('histogram', models.JSONField(default=conferences.models.empty_histogram)),
+                ('bayesian_score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-bayesian_score', 'conference'], name='rating_summary_score_idx')],
+            },
+        ),
+        migrations.RunPython(fill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_participant_counts(apps, schema_editor):
+    Conference = apps.get_model('conferences', 'Conference')
+    registrations = Conference.participants.through.objects.filter(
+        conference=OuterRef('pk')
+    ).order_by().values('conference').annotate(count=Count('*')).values('count')
+    Conference.objects.update(participant_count=Coalesce(Subquery(registrations), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0005_conference_rating_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Оставьте пустым, если число участников не ограничено', null=True, verbose_name='Количество мест'),
+        ),
+        migrations.AddField(
+            model_name='conference',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_participant_counts, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ConferenceWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conference', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='conferences.conference')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conference_waitlists', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['conference', 'created_at', 'id'], name='waitlist_fifo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('conference', 'user'), name='waitlist_conference_user_uniq')],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -12,6 +14,12 @@ class Conference(models.Model):
     participation_conditions = models.TextField()
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owned_conferences")
     participants = models.ManyToManyField(User, related_name="conferences_participated", blank=True)
+    capacity = models.PositiveIntegerField(
+        "Количество мест", null=True, blank=True,
+        help_text="Оставьте пустым, если число участников не ограничено"
+    )
+    # Поддерживается движком регистрации и сигналом m2m_changed, чтобы не считать участников при каждом запросе
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
 
     publication_recommended = models.BooleanField(
         "Рекомендована к публикации", null=True, blank=True,
@@ -21,6 +29,14 @@ class Conference(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Заполняется сигналом при сохранении; используется только в PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='conference_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -36,3 +52,68 @@ class ConferenceRating(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.rating} for {self.conference.title}"
+
+
+class ConferenceWaitlistEntry(models.Model):
+    conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conference_waitlists")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conference', 'user'], name='waitlist_conference_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['conference', 'created_at', 'id'], name='waitlist_fifo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} ждёт места на {self.conference.title}"
+
+
+def empty_histogram():
+    return [0] * 10
+
+
+class ConferenceRatingSummary(models.Model):
+    conference = models.OneToOneField(
+        Conference, on_delete=models.CASCADE, primary_key=True, related_name="rating_summary"
+    )
+    ratings_count = models.PositiveIntegerField(default=0)
+    ratings_sum = models.PositiveIntegerField(default=0)
+    # histogram[i] — число оценок i + 1
+    histogram = models.JSONField(default=empty_histogram)
+    bayesian_score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-bayesian_score', 'conference'], name='rating_summary_score_idx'),
+        ]
+
+    @property
+    def average(self):
+        return self.ratings_sum / self.ratings_count if self.ratings_count else None
+
+    def apply(self, removed=None, added=None):
+        # Учитывает замену оценки removed на added (любая из них может отсутствовать)
+        histogram = list(self.histogram)
+        if removed is not None:
+            self.ratings_count -= 1
+            self.ratings_sum -= removed
+            histogram[removed - 1] -= 1
+        if added is not None:
+            self.ratings_count += 1
+            self.ratings_sum += added
+            histogram[added - 1] += 1
+        self.histogram = histogram
+        self.bayesian_score = bayesian_score(self.ratings_count, self.ratings_sum)
+
+    def __str__(self):
+        return f"{self.conference_id}: {self.ratings_count} оценок, {self.bayesian_score:.2f}"
+
+
+def bayesian_score(ratings_count, ratings_sum):
+    # Среднее, сглаженное к априорному: у конференции с одной десяткой балл ниже, чем у сотни девяток
+    prior_weight = settings.RATING_PRIOR_WEIGHT
+    return (prior_weight * settings.RATING_PRIOR_MEAN + ratings_sum) / (prior_weight + ratings_count)
@@ -0,0 +1,119 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Q
+
+LIST_ORDERING = ('created_at', 'id')
+SEARCH_ORDERING = ('search_rank', 'created_at', 'id')
+PARTICIPANTS_ORDERING = ('conference_id', 'id')
+TOTAL_CACHE_PREFIX = 'conferences:total:'
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return ['d', value.isoformat()]
+    if isinstance(value, float):
+        return ['f', repr(value)]
+    return ['i', value]
+
+
+def decode_value(value):
+    kind, raw = value
+    if kind == 'd':
+        return datetime.fromisoformat(raw)
+    if kind == 'f':
+        return float(raw)
+    return int(raw)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [encode_value(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, ordering):
+    # Испорченный или устаревший токен открывает первую страницу, как раньше PageNotAnInteger
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values = json.loads(payload)
+        values = [decode_value(value) for value in values]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None, None
+    if direction not in ('next', 'prev') or len(values) != len(ordering):
+        return None, None
+    return direction, values
+
+
+def after(ordering, values, lookup):
+    # Лексикографическое сравнение кортежа ключей: (a, b) < (x, y) ⇔ a < x или (a = x и b < y).
+    # Избыточное a <= x задаёт границу диапазона по первому столбцу индекса
+    condition = Q()
+    for index, field in enumerate(ordering):
+        equal = {name: value for name, value in zip(ordering[:index], values[:index])}
+        condition |= Q(**equal, **{f'{field}__{lookup}': values[index]})
+    return Q(**{f'{ordering[0]}__{lookup}e': values[0]}) & condition
+
+
+class KeysetPage:
+    def __init__(self, items, ordering, has_next, has_previous, total=None):
+        self.object_list = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.total = total
+        self.next_cursor = None
+        self.previous_cursor = None
+        if items and has_next:
+            self.next_cursor = encode_cursor('next', [getattr(items[-1], field) for field in ordering])
+        if items and has_previous:
+            self.previous_cursor = encode_cursor('prev', [getattr(items[0], field) for field in ordering])
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def keyset_page(queryset, ordering, per_page, cursor=None):
+    # Страница по убыванию ключей ordering без OFFSET: следующая страница начинается сразу
+    # после последней строки текущей, поэтому глубокие страницы не дороже первой
+    direction, values = decode_cursor(cursor, ordering) if cursor else (None, None)
+    descending = [f'-{field}' for field in ordering]
+
+    if direction == 'prev':
+        items = list(queryset.filter(after(ordering, values, 'gt')).order_by(*ordering)[:per_page + 1])
+        has_previous = len(items) > per_page
+        items = items[:per_page][::-1]
+        return KeysetPage(items, ordering, has_next=True, has_previous=has_previous)
+
+    if direction == 'next':
+        queryset = queryset.filter(after(ordering, values, 'lt'))
+    items = list(queryset.order_by(*descending)[:per_page + 1])
+    return KeysetPage(items[:per_page], ordering, has_next=len(items) > per_page, has_previous=direction == 'next')
+
+
+def approximate_total(queryset, model, filtered, timeout):
+    # Примерное число строк для подвала страницы: для всей таблицы в PostgreSQL берётся оценка
+    # планировщика, в остальных случаях COUNT кэшируется на timeout секунд
+    if not filtered and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+
+    try:
+        sql, params = queryset.values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    key = TOTAL_CACHE_PREFIX + hashlib.sha1(f'{sql}|{params}'.encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
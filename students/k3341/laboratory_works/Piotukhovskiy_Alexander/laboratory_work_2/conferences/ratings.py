@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import ConferenceRating, ConferenceRatingSummary, bayesian_score, empty_histogram
+
+
+def lock_rating_summary(conference_id):
+    # Вызывается внутри транзакции: блокировка строки сводки упорядочивает параллельные оценки одной конференции
+    ConferenceRatingSummary.objects.get_or_create(conference_id=conference_id)
+    return ConferenceRatingSummary.objects.select_for_update().get(conference_id=conference_id)
+
+
+def rebuild_rating_summaries(conference_ids=None):
+    # Пересчёт сводок по таблице оценок одним сгруппированным запросом; сводки конференций без оценок удаляются
+    ratings = ConferenceRating.objects.all()
+    summaries = ConferenceRatingSummary.objects.all()
+    if conference_ids is not None:
+        ratings = ratings.filter(conference_id__in=conference_ids)
+        summaries = summaries.filter(conference_id__in=conference_ids)
+
+    histograms = defaultdict(empty_histogram)
+    for conference_id, rating, count in ratings.values_list('conference', 'rating').annotate(
+        count=Count('id')
+    ).order_by().iterator():
+        histograms[conference_id][rating - 1] = count
+
+    rebuilt = []
+    for conference_id, histogram in histograms.items():
+        ratings_count = sum(histogram)
+        ratings_sum = sum((rating + 1) * count for rating, count in enumerate(histogram))
+        rebuilt.append(ConferenceRatingSummary(
+            conference_id=conference_id,
+            ratings_count=ratings_count,
+            ratings_sum=ratings_sum,
+            histogram=histogram,
+            bayesian_score=bayesian_score(ratings_count, ratings_sum),
+        ))
+
+    with transaction.atomic():
+        summaries.exclude(conference_id__in=ratings.values('conference')).delete()
+        ConferenceRatingSummary.objects.bulk_create(
+            rebuilt,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['conference'],
+            update_fields=['ratings_count', 'ratings_sum', 'histogram', 'bayesian_score', 'updated_at'],
+        )
+    return len(rebuilt)
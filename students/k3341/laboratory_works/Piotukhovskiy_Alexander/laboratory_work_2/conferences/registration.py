@@ -0,0 +1,113 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Conference, ConferenceRating, ConferenceWaitlistEntry
+from .ratings import lock_rating_summary
+
+Participation = Conference.participants.through
+
+REGISTERED = 'registered'
+WAITLISTED = 'waitlisted'
+ALREADY_REGISTERED = 'already_registered'
+ALREADY_WAITLISTED = 'already_waitlisted'
+OWNER = 'owner'
+
+
+def take_seat(conference_id):
+    # Условный UPDATE занимает место, только если оно есть; строка конференции остаётся заблокированной
+    # до конца транзакции, поэтому параллельные регистрации на неё выполняются по очереди
+    return Conference.objects.filter(
+        Q(capacity__isnull=True) | Q(participant_count__lt=F('capacity')), pk=conference_id
+    ).update(participant_count=F('participant_count') + 1) == 1
+
+
+def release_seat(conference_id):
+    Conference.objects.filter(pk=conference_id, participant_count__gt=0).update(
+        participant_count=F('participant_count') - 1
+    )
+
+
+def add_participant(conference_id, user_id):
+    try:
+        with transaction.atomic():
+            Participation.objects.create(conference_id=conference_id, user_id=user_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def register_participant(conference, user):
+    if user.id == conference.owner_id:
+        return OWNER
+
+    with transaction.atomic():
+        if take_seat(conference.id):
+            if add_participant(conference.id, user.id):
+                ConferenceWaitlistEntry.objects.filter(conference=conference, user=user).delete()
+                return REGISTERED
+            release_seat(conference.id)
+            return ALREADY_REGISTERED
+
+        if Participation.objects.filter(conference_id=conference.id, user_id=user.id).exists():
+            return ALREADY_REGISTERED
+        _, created = ConferenceWaitlistEntry.objects.get_or_create(conference=conference, user=user)
+        return WAITLISTED if created else ALREADY_WAITLISTED
+
+
+def promote_waitlisted(conference_id):
+    # Освободившиеся места достаются ожидающим в порядке очереди
+    promoted = []
+    while True:
+        entry = ConferenceWaitlistEntry.objects.select_for_update().filter(
+            conference_id=conference_id
+        ).order_by('created_at', 'id').first()
+        if entry is None or not take_seat(conference_id):
+            return promoted
+        entry.delete()
+        if add_participant(conference_id, entry.user_id):
+            promoted.append(entry.user_id)
+        else:
+            release_seat(conference_id)
+
+
+def cancel_participation(conference, user):
+    # Отмена регистрации снимает оценку участника и передаёт место первому в очереди;
+    # отмена для ожидающего просто убирает его из очереди
+    with transaction.atomic():
+        removed, _ = Participation.objects.filter(conference_id=conference.id, user_id=user.id).delete()
+        if not removed:
+            ConferenceWaitlistEntry.objects.filter(conference=conference, user=user).delete()
+            return False
+
+        release_seat(conference.id)
+
+        user_ratings = ConferenceRating.objects.filter(user=user, conference=conference)
+        if user_ratings.exists():
+            summary = lock_rating_summary(conference.id)
+            previous = user_ratings.first()
+            if previous is not None:
+                previous.delete()
+                summary.apply(removed=previous.rating)
+                summary.save()
+
+        promote_waitlisted(conference.id)
+    return True
+
+
+def waitlist_position(conference_id, user_id):
+    entry = ConferenceWaitlistEntry.objects.filter(conference_id=conference_id, user_id=user_id).first()
+    if entry is None:
+        return None
+    return ConferenceWaitlistEntry.objects.filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, id__lt=entry.id),
+        conference_id=conference_id,
+    ).count() + 1
+
+
+def refresh_participant_counts(conference_ids):
+    # Пересчёт по промежуточной таблице для изменений в обход движка (админка, participants.add)
+    registrations = Participation.objects.filter(conference=OuterRef('pk')).order_by().values('conference')
+    Conference.objects.filter(pk__in=conference_ids).update(
+        participant_count=Coalesce(Subquery(registrations.annotate(count=Count('*')).values('count')), 0)
+    )
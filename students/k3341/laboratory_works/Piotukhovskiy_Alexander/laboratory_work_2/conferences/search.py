@@ -0,0 +1,203 @@
+import math
+import operator
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+
+from .models import Conference
+from .stemming import STOP_WORDS, WORD_RE, tokenize
+
+SEARCH_CONFIG = 'russian'
+# Поле, вес в tsvector PostgreSQL и множитель того же веса для встроенного индекса
+SEARCH_FIELDS = (
+    ('title', 'A', 1.0),
+    ('topics', 'B', 0.4),
+    ('location', 'B', 0.4),
+    ('description', 'C', 0.2),
+    ('participation_conditions', 'D', 0.1),
+)
+SEARCH_FIELD_NAMES = [name for name, _, _ in SEARCH_FIELDS]
+# Ограничение выдачи встроенного индекса: ранжирование передаётся в запрос через CASE
+SEARCH_RESULTS_LIMIT = 500
+NO_RANK = Value(0.0, output_field=FloatField())
+# Версия встроенного индекса в кэше Django: сигналы увеличивают её при каждом изменении конференции,
+# и поиск замечает изменения из других процессов по одному обращению к кэшу, без запроса к таблице.
+# Между процессами версия видна при общем кэше (Redis, Memcached)
+INDEX_VERSION_KEY = 'conferences:search-index-version'
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector():
+    return reduce(operator.add, (
+        SearchVector(name, weight=weight, config=SEARCH_CONFIG) for name, weight, _ in SEARCH_FIELDS
+    ))
+
+
+def index_version():
+    # Отсчёт начинается с текущего времени в наносекундах: если ключ вытеснят из кэша, новая версия
+    # не совпадёт ни с одной прежней, и индексы всех процессов перестроятся при следующем поиске
+    return cache.get_or_set(INDEX_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_index_version():
+    try:
+        return cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.add(INDEX_VERSION_KEY, time.time_ns(), timeout=None)
+        return cache.incr(INDEX_VERSION_KEY)
+
+
+def prefix_query(query):
+    # Каждое слово запроса ищется как префикс: «конфер» находит «конференции»
+    words = [word for word in WORD_RE.findall(query.lower()) if word not in STOP_WORDS]
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+class InvertedIndex:
+    # Обратный индекс в памяти процесса для баз без полнотекстового поиска (SQLite при разработке).
+    # Изменения из других процессов обнаруживаются по версии индекса в кэше.
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.documents = {}
+        self.vocabulary = []
+        self.version = None
+
+    def rebuild(self):
+        # Версия читается до таблицы: изменение, зафиксированное во время перестройки, вызовет ещё одну
+        version = index_version()
+        self.postings, self.documents, self.vocabulary, self.version = {}, {}, [], None
+        for conference_id, *values in Conference.objects.values_list('id', *SEARCH_FIELD_NAMES).iterator():
+            self._add(conference_id, values)
+        self.vocabulary.sort()
+        self.version = version
+
+    def _add(self, conference_id, values):
+        weights = Counter()
+        for value, (_, _, multiplier) in zip(values, SEARCH_FIELDS):
+            for term in tokenize(value):
+                weights[term] += multiplier
+        for term, weight in weights.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                if self.version is None:
+                    self.vocabulary.append(term)
+                else:
+                    insort(self.vocabulary, term)
+            postings[conference_id] = weight
+        self.documents[conference_id] = set(weights)
+
+    def _remove(self, conference_id):
+        for term in self.documents.pop(conference_id, ()):
+            postings = self.postings[term]
+            del postings[conference_id]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+
+    def _advance(self, version):
+        # Если версию между изменениями этого процесса увеличил кто-то ещё, индекс перестраивается
+        # при следующем поиске
+        self.version = version if version == self.version + 1 else None
+
+    def update(self, conference):
+        with self.lock:
+            version = bump_index_version()
+            if self.version is None:
+                return
+            self._remove(conference.id)
+            self._add(conference.id, [getattr(conference, name) for name in SEARCH_FIELD_NAMES])
+            self._advance(version)
+
+    def delete(self, conference_id):
+        with self.lock:
+            version = bump_index_version()
+            if self.version is None:
+                return
+            self._remove(conference_id)
+            self._advance(version)
+
+    def search(self, query):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None
+
+        with self.lock:
+            if self.version is None or self.version != index_version():
+                self.rebuild()
+
+            total = len(self.documents)
+            scores = None
+            for term in terms:
+                term_scores = {}
+                index = bisect_left(self.vocabulary, term)
+                while index < len(self.vocabulary) and self.vocabulary[index].startswith(term):
+                    postings = self.postings[self.vocabulary[index]]
+                    idf = math.log(1 + total / len(postings))
+                    for conference_id, weight in postings.items():
+                        term_scores[conference_id] = max(term_scores.get(conference_id, 0), weight * idf)
+                    index += 1
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        conference_id: score + term_scores[conference_id]
+                        for conference_id, score in scores.items() if conference_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+conference_index = InvertedIndex()
+
+
+def index_conference(conference):
+    if uses_postgres():
+        Conference.objects.filter(pk=conference.pk).update(search_vector=search_vector())
+    else:
+        conference_index.update(conference)
+
+
+def unindex_conference(conference_id):
+    if not uses_postgres():
+        conference_index.delete(conference_id)
+
+
+def search_conferences(conferences, query):
+    # Конференции, подходящие под все слова запроса, с релевантностью в search_rank
+    if uses_postgres():
+        search_query = prefix_query(query)
+        if search_query is None:
+            return conferences.annotate(search_rank=NO_RANK)
+        return conferences.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    ranked = conference_index.search(query)
+    if ranked is None:
+        return conferences.annotate(search_rank=NO_RANK)
+    ranked = ranked[:SEARCH_RESULTS_LIMIT]
+    if not ranked:
+        return conferences.annotate(search_rank=NO_RANK).none()
+    return conferences.filter(id__in=[conference_id for conference_id, _ in ranked]).annotate(
+        search_rank=Case(
+            *[When(id=conference_id, then=Value(score)) for conference_id, score in ranked],
+            output_field=FloatField(),
+        )
+    ).order_by('-search_rank', '-created_at', '-id')
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Conference
+from .registration import refresh_participant_counts
+from .search import SEARCH_FIELD_NAMES, index_conference, uses_postgres, unindex_conference
+
+
+@receiver(post_save, sender=Conference)
+def update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELD_NAMES):
+        return
+    if uses_postgres():
+        index_conference(instance)
+    else:
+        # Индекс в памяти не откатывается вместе с транзакцией, поэтому обновляется после коммита
+        transaction.on_commit(lambda: index_conference(instance))
+
+
+@receiver(post_delete, sender=Conference)
+def remove_from_search_index(sender, instance, **kwargs):
+    conference_id = instance.id
+    transaction.on_commit(lambda: unindex_conference(conference_id))
+
+
+@receiver(m2m_changed, sender=Conference.participants.through)
+def update_participant_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_participant_counts([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_conference_ids = list(instance.conferences_participated.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_participant_counts(getattr(instance, '_cleared_conference_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_participant_counts(pk_set)
@@ -0,0 +1,115 @@
+import re
+
+# Стеммер русского языка по алгоритму Snowball (тот же, что у словаря russian в PostgreSQL)
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (['в', 'вши', 'вшись'], ['ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'])
+ADJECTIVE = ([], ['ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'его', 'ого',
+                  'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'])
+PARTICIPLE = (['ем', 'нн', 'вш', 'ющ', 'щ'], ['ивш', 'ывш', 'ующ'])
+REFLEXIVE = ([], ['ся', 'сь'])
+VERB = (['ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'],
+        ['ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило',
+         'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'])
+NOUN = ([], ['а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий', 'й',
+             'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья',
+             'я'])
+SUPERLATIVE = ([], ['ейше', 'ейш'])
+DERIVATIONAL = ([], ['ость', 'ост'])
+
+
+def _sorted_endings(endings):
+    # Окончания первой группы допустимы только после «а» или «я»
+    preceded, plain = endings
+    return sorted([(ending, True) for ending in preceded] + [(ending, False) for ending in plain],
+                  key=lambda item: len(item[0]), reverse=True)
+
+
+ENDINGS = {
+    name: _sorted_endings(endings) for name, endings in {
+        'perfective_gerund': PERFECTIVE_GERUND,
+        'adjective': ADJECTIVE,
+        'participle': PARTICIPLE,
+        'reflexive': REFLEXIVE,
+        'verb': VERB,
+        'noun': NOUN,
+        'superlative': SUPERLATIVE,
+        'derivational': DERIVATIONAL,
+    }.items()
+}
+
+
+def _region_after_consonant(word, start):
+    # Начало области после первой согласной, следующей за гласной (R1/R2 в терминах Snowball)
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _remove_ending(word, name, region_start):
+    # Удаляет самое длинное окончание класса в пределах области; None, если окончания нет
+    for ending, needs_a_or_ya in ENDINGS[name]:
+        if not word.endswith(ending):
+            continue
+        position = len(word) - len(ending)
+        if position < region_start:
+            return None
+        if needs_a_or_ya and (position - 1 < region_start or word[position - 1] not in 'ая'):
+            return None
+        return word[:position]
+    return None
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next((index + 1 for index, char in enumerate(word) if char in VOWELS), len(word))
+    r2 = _region_after_consonant(word, _region_after_consonant(word, 0))
+
+    result = _remove_ending(word, 'perfective_gerund', rv)
+    if result is None:
+        word = _remove_ending(word, 'reflexive', rv) or word
+        result = _remove_ending(word, 'adjective', rv)
+        if result is not None:
+            result = _remove_ending(result, 'participle', rv) or result
+        else:
+            result = _remove_ending(word, 'verb', rv)
+            if result is None:
+                result = _remove_ending(word, 'noun', rv)
+    word = word if result is None else result
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    word = _remove_ending(word, 'derivational', r2) or word
+
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    else:
+        superlative = _remove_ending(word, 'superlative', rv)
+        if superlative is not None:
+            word = superlative
+            if word.endswith('нн') and len(word) - 2 >= rv:
+                word = word[:-1]
+        elif word.endswith('ь') and len(word) - 1 >= rv:
+            word = word[:-1]
+
+    return word
+
+
+STOP_WORDS = {
+    'и', 'в', 'во', 'не', 'на', 'с', 'со', 'по', 'к', 'ко', 'о', 'об', 'обо', 'для', 'из', 'от', 'до', 'за', 'у',
+    'а', 'но', 'или', 'что', 'как', 'при', 'the', 'and', 'of', 'in', 'on', 'for', 'to', 'a', 'an',
+}
+WORD_RE = re.compile(r'[^\W_]+')
+CYRILLIC_RE = re.compile(r'[а-яё]')
+
+
+def tokenize(text):
+    # Нормализованные основы слов текста: русские слова стеммируются, остальные только приводятся к нижнему регистру
+    tokens = []
+    for word in WORD_RE.findall((text or '').lower()):
+        if word not in STOP_WORDS:
+            tokens.append(stem(word) if CYRILLIC_RE.search(word) else word)
+    return tokens
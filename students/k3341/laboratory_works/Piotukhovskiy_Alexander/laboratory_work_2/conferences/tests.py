@@ -1,3 +1,359 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+from datetime import date, datetime, timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from conferences.models import Conference, ConferenceRating, ConferenceRatingSummary, ConferenceWaitlistEntry
+from conferences.ratings import rebuild_rating_summaries
+from conferences.search import bump_index_version, search_conferences
+
+
+class ConferenceSearchTest(TestCase):
+    def setUp(self):
+        # Конференции прошлых тестов откатываются без сигналов, поэтому индекс помечается устаревшим
+        bump_index_version()
+        self.owner = User.objects.create_user(username='owner', password='password')
+
+    def create_conference(self, title, description='Описание', topics='Наука'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Conference.objects.create(
+                title=title, topics=topics, location='Санкт-Петербург',
+                start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+                description=description, participation_conditions='Регистрация на сайте',
+                owner=self.owner,
+            )
+
+    def search(self, query):
+        response = self.client.get(reverse('conference_list'), {'q': query})
+        return [conference.title for conference in response.context['conferences']]
+
+    def test_search_matches_word_forms_and_prefixes(self):
+        self.create_conference('Конференция по машинному обучению')
+        self.create_conference('Семинар по базам данных')
+
+        self.assertEqual(self.search('машинное обучение'), ['Конференция по машинному обучению'])
+        self.assertEqual(self.search('конфер'), ['Конференция по машинному обучению'])
+        self.assertEqual(self.search('базы'), ['Семинар по базам данных'])
+        self.assertEqual(self.search('блокчейн'), [])
+
+    def test_title_match_ranks_above_description_match(self):
+        self.create_conference('Летняя школа', description='Доклады о робототехнике')
+        self.create_conference('Робототехника сегодня')
+
+        self.assertEqual(self.search('робототехника'), ['Робототехника сегодня', 'Летняя школа'])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        conference = self.create_conference('Форум разработчиков')
+        self.assertEqual(self.search('форум'), ['Форум разработчиков'])
+
+        conference.title = 'Съезд разработчиков'
+        with self.captureOnCommitCallbacks(execute=True):
+            conference.save()
+        self.assertEqual(self.search('форум'), [])
+        self.assertEqual(self.search('съезд'), ['Съезд разработчиков'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            conference.delete()
+        self.assertEqual(self.search('разработчик'), [])
+
+    def test_search_does_not_scan_conference_table(self):
+        self.create_conference('Форум разработчиков')
+        self.assertEqual(search_conferences(Conference.objects.all(), 'форум').count(), 1)
+
+        # Индекс актуален: поиск выполняет только итоговый запрос по найденным идентификаторам
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(search_conferences(Conference.objects.all(), 'форум').count(), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"id" IN', queries[0]['sql'])
+
+    def test_version_bump_from_another_process_rebuilds_index(self):
+        conference = self.create_conference('Форум разработчиков')
+        self.assertEqual(self.search('форум'), ['Форум разработчиков'])
+
+        # Изменение в обход сигналов этого процесса, как из другого процесса с общим кэшем
+        Conference.objects.filter(pk=conference.pk).update(title='Съезд разработчиков')
+        self.assertEqual(self.search('съезд'), [])
+        bump_index_version()
+        self.assertEqual(self.search('съезд'), ['Съезд разработчиков'])
+
+
+class ConferenceListQueriesTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='password')
+        self.user = User.objects.create_user(username='participant', password='password')
+        for index in range(12):
+            conference = Conference.objects.create(
+                title=f'Конференция {index}', topics='Наука', location='Москва',
+                start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+                description='Описание', participation_conditions='Регистрация', owner=owner,
+            )
+            if index % 2:
+                conference.participants.add(self.user, owner)
+            if index % 4 == 1:
+                ConferenceRating.objects.create(user=self.user, conference=conference, rating=8)
+        self.client.force_login(self.user)
+
+    def render_list(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('conference_list'))
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        with override_settings(ITEMS_PER_PAGE=2):
+            _, small_page_queries = self.render_list()
+        with override_settings(ITEMS_PER_PAGE=12):
+            response, full_page_queries = self.render_list()
+
+        self.assertEqual(small_page_queries, full_page_queries)
+        flags = {
+            conference.title: (conference.is_participant, conference.has_rated, conference.participant_count)
+            for conference in response.context['conferences']
+        }
+        self.assertEqual(flags['Конференция 1'], (True, True, 2))
+        self.assertEqual(flags['Конференция 3'], (True, False, 2))
+        self.assertEqual(flags['Конференция 2'], (False, False, 0))
+        self.assertContains(response, 'Изменить')
+
+
+@override_settings(ITEMS_PER_PAGE=3)
+class ConferenceListPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='password')
+        for index in range(8):
+            Conference.objects.create(
+                title=f'Конференция {index}', topics='Наука', location='Москва',
+                start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+                description='Описание', participation_conditions='Регистрация', owner=owner,
+            )
+        # Одинаковое время создания у нескольких записей: порядок внутри определяется id
+        Conference.objects.filter(title__in=['Конференция 2', 'Конференция 3', 'Конференция 4']).update(
+            created_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+        self.expected = list(Conference.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+
+    def get_page(self, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        return self.client.get(reverse('conference_list'), params).context['conferences']
+
+    def test_cursors_walk_forward_and_back_without_gaps(self):
+        pages = [self.get_page()]
+        while pages[-1].next_cursor:
+            pages.append(self.get_page(pages[-1].next_cursor))
+
+        titles = [conference.title for page in pages for conference in page]
+        self.assertEqual(titles, self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertEqual(pages[0].total, 8)
+
+        previous = self.get_page(pages[-1].previous_cursor)
+        self.assertEqual([conference.title for conference in previous], [c.title for c in pages[1]])
+        first = self.get_page(previous.previous_cursor)
+        self.assertEqual([conference.title for conference in first], self.expected[:3])
+        self.assertIsNone(first.previous_cursor)
+
+    def test_invalid_cursor_opens_first_page(self):
+        page = self.get_page('не-курсор')
+        self.assertEqual([conference.title for conference in page], self.expected[:3])
+
+
+@override_settings(RATING_PRIOR_MEAN=5.5, RATING_PRIOR_WEIGHT=5)
+class ConferenceRatingSummaryTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='password')
+        self.conferences = [
+            Conference.objects.create(
+                title=f'Конференция {index}', topics='Наука', location='Москва',
+                start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+                description='Описание', participation_conditions='Регистрация', owner=owner,
+            )
+            for index in range(2)
+        ]
+        self.users = [User.objects.create_user(username=f'user{index}', password='password') for index in range(3)]
+        for user in self.users:
+            for conference in self.conferences:
+                conference.participants.add(user)
+
+    def rate(self, user, conference, rating):
+        self.client.force_login(user)
+        self.client.post(reverse('rate_conference', args=[conference.id]), {'rating': rating, 'review': ''})
+
+    def test_summary_follows_rating_changes_and_cancellations(self):
+        first, second = self.conferences
+        self.rate(self.users[0], first, 10)
+        self.rate(self.users[1], first, 6)
+        self.rate(self.users[0], first, 8)
+        self.rate(self.users[2], second, 9)
+
+        self.client.force_login(self.users[1])
+        self.client.get(reverse('cancel_registration', args=[first.id]))
+
+        summary = ConferenceRatingSummary.objects.get(conference=first)
+        self.assertEqual((summary.ratings_count, summary.ratings_sum), (1, 8))
+        self.assertEqual(summary.histogram, [0, 0, 0, 0, 0, 0, 0, 1, 0, 0])
+        self.assertAlmostEqual(summary.bayesian_score, (5 * 5.5 + 8) / 6)
+
+        stored = list(ConferenceRatingSummary.objects.order_by('conference').values_list(
+            'conference', 'ratings_count', 'ratings_sum', 'histogram', 'bayesian_score'
+        ))
+        ConferenceRatingSummary.objects.all().delete()
+        rebuild_rating_summaries()
+        rebuilt = list(ConferenceRatingSummary.objects.order_by('conference').values_list(
+            'conference', 'ratings_count', 'ratings_sum', 'histogram', 'bayesian_score'
+        ))
+        self.assertEqual(rebuilt, stored)
+
+    def test_top_conferences_are_ordered_by_bayesian_score(self):
+        first, second = self.conferences
+        self.rate(self.users[0], first, 10)
+        for user in self.users:
+            self.rate(user, second, 9)
+
+        response = self.client.get(reverse('top_conferences'))
+        titles = [summary.conference.title for summary in response.context['summaries']]
+        self.assertEqual(titles, ['Конференция 1', 'Конференция 0'])
+
+
+@override_settings(PARTICIPANTS_PER_PAGE=4)
+class ParticipantsExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        owner = User.objects.create_user(username='owner', password='password')
+        users = [User.objects.create_user(username=f'user{index}', email=f'user{index}@example.com') for index in range(3)]
+        for index in range(3):
+            conference = Conference.objects.create(
+                title=f'Конференция {index}', topics='Наука', location='Москва',
+                start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+                description='Описание', participation_conditions='Регистрация', owner=owner,
+            )
+            conference.participants.add(*users)
+        self.client.force_login(self.staff)
+
+    def export(self, export_format):
+        response = self.client.get(reverse('export_conference_participants'), {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    def test_csv_and_ndjson_exports_contain_every_registration(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(rows[0]['conference_title'], 'Конференция 0')
+        self.assertEqual(rows[0]['email'], 'user0@example.com')
+
+        records = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual([(r['conference_id'], r['user_id']) for r in records],
+                         [(int(r['conference_id']), int(r['user_id'])) for r in rows])
+
+        response = self.client.get(reverse('export_conference_participants'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_participants_page_is_paginated(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(reverse('all_conference_participants'), {'cursor': cursor} if cursor else {})
+            page = response.context['registrations']
+            self.assertLessEqual(len(page), 4)
+            seen.extend((registration.conference.title, registration.user.username) for registration in page)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+
+
+class ConferenceRegistrationTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='password')
+        self.conference = Conference.objects.create(
+            title='Конференция', topics='Наука', location='Москва',
+            start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+            description='Описание', participation_conditions='Регистрация', owner=self.owner, capacity=2,
+        )
+        self.users = [User.objects.create_user(username=f'user{index}', password='password') for index in range(4)]
+
+    def request(self, user, name):
+        self.client.force_login(user)
+        return self.client.get(reverse(name, args=[self.conference.id]))
+
+    def test_full_conference_waitlists_and_promotes_in_order(self):
+        for user in self.users:
+            self.request(user, 'register_for_conference')
+        self.request(self.users[0], 'register_for_conference')
+        self.request(self.owner, 'register_for_conference')
+
+        self.conference.refresh_from_db()
+        self.assertEqual(self.conference.participant_count, 2)
+        self.assertEqual(set(self.conference.participants.all()), set(self.users[:2]))
+        waitlist = ConferenceWaitlistEntry.objects.filter(conference=self.conference).order_by('created_at', 'id')
+        self.assertEqual([entry.user for entry in waitlist], self.users[2:])
+
+        response = self.request(self.users[3], 'conference_detail')
+        self.assertEqual(response.context['waitlist_place'], 2)
+
+        self.request(self.users[0], 'cancel_registration')
+        self.conference.refresh_from_db()
+        self.assertEqual(self.conference.participant_count, 2)
+        self.assertEqual(set(self.conference.participants.all()), {self.users[1], self.users[2]})
+
+        self.request(self.users[3], 'cancel_registration')
+        self.assertFalse(ConferenceWaitlistEntry.objects.exists())
+
+    def test_direct_participant_changes_keep_count(self):
+        self.conference.participants.add(*self.users[:3])
+        self.users[0].conferences_participated.clear()
+        self.conference.refresh_from_db()
+        self.assertEqual(self.conference.participant_count, 2)
+
+
+class ConcurrentRegistrationTest(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Потокам нужна общая база с блокировками, а не SQLite в памяти')
+
+    def test_parallel_registrations_never_exceed_capacity(self):
+        owner = User.objects.create_user(username='owner', password='password')
+        conference = Conference.objects.create(
+            title='Популярная конференция', topics='Наука', location='Москва',
+            start_date=date(2025, 5, 1), end_date=date(2025, 5, 3),
+            description='Описание', participation_conditions='Регистрация', owner=owner, capacity=5,
+        )
+        clients = []
+        for index in range(20):
+            client = Client()
+            client.force_login(User.objects.create_user(username=f'user{index}', password='password'))
+            clients.append(client)
+
+        url = reverse('register_for_conference', args=[conference.id])
+        start = threading.Barrier(len(clients))
+        statuses = []
+
+        def register(client):
+            try:
+                start.wait()
+                statuses.append(client.get(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        conference.refresh_from_db()
+        self.assertEqual(statuses, [302] * 20)
+        self.assertEqual(conference.participants.count(), 5)
+        self.assertEqual(conference.participant_count, 5)
+        self.assertEqual(ConferenceWaitlistEntry.objects.filter(conference=conference).count(), 15)
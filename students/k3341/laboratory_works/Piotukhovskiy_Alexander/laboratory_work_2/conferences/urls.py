@@ -6,6 +6,7 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('logout/', views.LogoutRedirectView.as_view(), name='logout_redirect'),
     path('', views.conference_list, name='conference_list'),
+    path('top/', views.top_conferences, name='top_conferences'),
     path('conference/add/', views.create_conference, name='create_conference'),
     path('conference/<int:conference_id>/', views.conference_detail, name='conference_detail'),
     path('conference/<int:conference_id>/edit/', views.edit_conference, name='edit_conference'),
@@ -16,4 +17,5 @@ urlpatterns = [
     path('conference/<int:conference_id>/register/', views.register_for_conference, name='register_for_conference'),
     path('conference/<int:conference_id>/cancel/', views.cancel_registration, name='cancel_registration'),
     path('all-participants/', views.all_conference_participants, name='all_conference_participants'),
+    path('all-participants/export/', views.export_conference_participants, name='export_conference_participants'),
 ]
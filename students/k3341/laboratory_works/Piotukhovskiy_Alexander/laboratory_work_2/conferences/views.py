@@ -2,13 +2,21 @@ from django.conf import settings
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import UserCreationForm
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
 
-from conferences.models import Conference, ConferenceRating
+from conferences.models import Conference, ConferenceRating, ConferenceRatingSummary, ConferenceWaitlistEntry
+from .exports import EXPORT_FORMATS, export_lines, participant_rows
 from .forms import ConferenceForm, ConferenceRatingForm
+from .pagination import LIST_ORDERING, PARTICIPANTS_ORDERING, SEARCH_ORDERING, approximate_total, keyset_page
+from .ratings import lock_rating_summary
+from .registration import (
+    Participation, cancel_participation, promote_waitlisted, register_participant, waitlist_position,
+)
+from .search import search_conferences
 
 
 def register(request):
@@ -28,48 +36,56 @@ class LogoutRedirectView(View):
         return redirect('conference_list')
 
 
+TOP_CONFERENCES_LIMIT = 100
+
+
+def with_user_flags(conferences, user):
+    # Флаги участия и оценки считаются подзапросами в одном запросе страницы, а не отдельно для каждой строки
+    conferences = conferences.select_related('owner')
+    if not user.is_authenticated:
+        return conferences.annotate(is_participant=Value(False), has_rated=Value(False), is_waitlisted=Value(False))
+    return conferences.annotate(
+        is_participant=Exists(Participation.objects.filter(conference=OuterRef('pk'), user=user)),
+        has_rated=Exists(ConferenceRating.objects.filter(conference=OuterRef('pk'), user=user)),
+        is_waitlisted=Exists(ConferenceWaitlistEntry.objects.filter(conference=OuterRef('pk'), user=user)),
+    )
+
+
 def conference_list(request):
     query = request.GET.get('q', '')
 
-    conferences = Conference.objects.all()
+    conferences = with_user_flags(Conference.objects.all(), request.user)
     if query:
-        conferences = conferences.filter(
-            Q(title__icontains=query) |
-            Q(topics__icontains=query) |
-            Q(location__icontains=query) |
-            Q(description__icontains=query) |
-            Q(participation_conditions__icontains=query)
+        conferences = search_conferences(conferences, query)
+
+    conferences_page = keyset_page(
+        conferences, SEARCH_ORDERING if query else LIST_ORDERING, settings.ITEMS_PER_PAGE, request.GET.get('cursor')
+    )
+    if settings.APPROXIMATE_TOTAL_CACHE_TIMEOUT:
+        conferences_page.total = approximate_total(
+            conferences, Conference, filtered=bool(query), timeout=settings.APPROXIMATE_TOTAL_CACHE_TIMEOUT
         )
 
-    conferences = conferences.order_by('-created_at')
-
-    paginator = Paginator(conferences, settings.ITEMS_PER_PAGE)
-    page_number = request.GET.get('page', 1)
-
-    try:
-        conferences_page = paginator.page(page_number)
-    except PageNotAnInteger:
-        conferences_page = paginator.page(1)
-    except EmptyPage:
-        conferences_page = paginator.page(paginator.num_pages)
-
     return render(request, 'conferences/conference_list.html', {
         'conferences': conferences_page,
-        'paginator': paginator,
         'page_obj': conferences_page,
         'query': query
     })
 
 
 def conference_detail(request, conference_id):
-    conference = get_object_or_404(Conference, id=conference_id)
+    conference = get_object_or_404(with_user_flags(Conference.objects.all(), request.user), id=conference_id)
     user_rating = None
+    waitlist_place = None
     if request.user.is_authenticated:
         user_rating = ConferenceRating.objects.filter(user=request.user, conference=conference).first()
+        if conference.is_waitlisted:
+            waitlist_place = waitlist_position(conference.id, request.user.id)
 
     return render(request, 'conferences/conference_detail.html', {
         'conference': conference,
         'user_rating': user_rating,
+        'waitlist_place': waitlist_place,
     })
 
 
@@ -106,7 +122,9 @@ def edit_conference(request, conference_id):
     if request.method == "POST":
         form = ConferenceForm(request.POST, instance=conference)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
+                promote_waitlisted(conference.id)
             return redirect('conference_detail', conference_id=conference.id)
     else:
         form = ConferenceForm(instance=conference)
@@ -117,19 +135,14 @@ def edit_conference(request, conference_id):
 @login_required
 def register_for_conference(request, conference_id):
     conference = get_object_or_404(Conference, id=conference_id)
-    if request.user != conference.owner:
-        conference.participants.add(request.user)
+    register_participant(conference, request.user)
     return redirect('conference_detail', conference_id=conference.id)
 
 
 @login_required
 def cancel_registration(request, conference_id):
     conference = get_object_or_404(Conference, id=conference_id)
-
-    if request.user in conference.participants.all():
-        conference.participants.remove(request.user)
-
-        ConferenceRating.objects.filter(user=request.user, conference=conference).delete()
+    cancel_participation(conference, request.user)
 
     return redirect('conference_list')
 
@@ -145,7 +158,7 @@ def delete_conference(request, conference_id):
 def rate_conference(request, conference_id):
     conference = get_object_or_404(Conference, id=conference_id)
 
-    if request.user not in conference.participants.all():
+    if not Participation.objects.filter(conference=conference, user=request.user).exists():
         return redirect('conference_detail', conference_id=conference.id)
 
     rating = ConferenceRating.objects.filter(user=request.user, conference=conference).first()
@@ -154,10 +167,17 @@ def rate_conference(request, conference_id):
     if request.method == "POST":
         form = ConferenceRatingForm(request.POST, instance=rating)
         if form.is_valid():
-            rating = form.save(commit=False)
-            rating.user = request.user
-            rating.conference = conference
-            rating.save()
+            with transaction.atomic():
+                summary = lock_rating_summary(conference.id)
+                previous = ConferenceRating.objects.filter(
+                    user=request.user, conference=conference
+                ).values_list('rating', flat=True).first()
+                rating = form.save(commit=False)
+                rating.user = request.user
+                rating.conference = conference
+                rating.save()
+                summary.apply(removed=previous, added=rating.rating)
+                summary.save()
             return redirect('conference_detail', conference_id=conference.id)
     else:
         form = ConferenceRatingForm(instance=rating)
@@ -169,9 +189,28 @@ def rate_conference(request, conference_id):
 @login_required
 def view_ratings(request, conference_id):
     conference = get_object_or_404(Conference, id=conference_id, owner=request.user)
-    ratings = ConferenceRating.objects.filter(conference=conference)
+    ratings = ConferenceRating.objects.filter(conference=conference).select_related('user')
+    summary = ConferenceRatingSummary.objects.filter(conference=conference).first()
 
-    return render(request, 'conferences/view_ratings.html', {'conference': conference, 'ratings': ratings})
+    return render(request, 'conferences/view_ratings.html', {
+        'conference': conference,
+        'ratings': ratings,
+        'summary': summary,
+        'distribution': list(zip(range(1, 11), summary.histogram)) if summary else [],
+    })
+
+
+def top_conferences(request):
+    try:
+        limit = min(max(int(request.GET.get('limit', settings.ITEMS_PER_PAGE)), 1), TOP_CONFERENCES_LIMIT)
+    except ValueError:
+        limit = settings.ITEMS_PER_PAGE
+
+    summaries = ConferenceRatingSummary.objects.filter(ratings_count__gt=0).select_related(
+        'conference'
+    ).order_by('-bayesian_score', 'conference')[:limit]
+
+    return render(request, 'conferences/top_conferences.html', {'summaries': summaries})
 
 
 def is_admin(user):
@@ -181,5 +220,26 @@ def is_admin(user):
 @login_required
 @user_passes_test(is_admin)
 def all_conference_participants(request):
-    conferences = Conference.objects.prefetch_related('participants').all()
-    return render(request, 'conferences/all_participants.html', {'conferences': conferences})
+    registrations = Conference.participants.through.objects.select_related('conference', 'user')
+    registrations_page = keyset_page(
+        registrations, PARTICIPANTS_ORDERING, settings.PARTICIPANTS_PER_PAGE, request.GET.get('cursor')
+    )
+    return render(request, 'conferences/all_participants.html', {
+        'registrations': registrations_page,
+        'page_obj': registrations_page,
+        'export_formats': EXPORT_FORMATS,
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_conference_participants(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+
+    response = StreamingHttpResponse(
+        export_lines(export_format, participant_rows()), content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="participants.{export_format}"'
+    return response
@@ -19,6 +19,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 
 ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 5))
+PARTICIPANTS_PER_PAGE = int(os.getenv('PARTICIPANTS_PER_PAGE', 100))
+# Сколько секунд кэшируется примерное число конференций в подвале списка; 0 — не показывать его
+APPROXIMATE_TOTAL_CACHE_TIMEOUT = int(os.getenv('APPROXIMATE_TOTAL_CACHE_TIMEOUT', 60))
+# Байесовская оценка конференции: средний балл сглаживается к RATING_PRIOR_MEAN с весом RATING_PRIOR_WEIGHT оценок
+RATING_PRIOR_MEAN = float(os.getenv('RATING_PRIOR_MEAN', 5.5))
+RATING_PRIOR_WEIGHT = int(os.getenv('RATING_PRIOR_WEIGHT', 5))
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -0,0 +1,67 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from rest_framework import generics
+
+from .profiling import current_profile
+
+
+class AsyncGenericAPIView(generics.GenericAPIView):
+    # DRF выполняет dispatch синхронно, поэтому асинхронный обработчик (async def get) получает
+    # собственный dispatch: аутентификация и проверка прав (запросы к базе) идут через sync_to_async,
+    # а сам обработчик выполняется в цикле событий без отдельного потока на запрос
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def in_own_connection(function):
+    # Поток из пула sync_to_async живёт дольше запроса: соединение обслуживается так же, как в обработчике
+    # запросов Django (CONN_MAX_AGE и проверка работоспособности)
+    # Обёртка ProfilingMiddleware стоит только на соединениях потока запроса; профиль запроса копируется
+    # в контекст потока, и запросы на его собственном соединении учитываются в том же профиле
+    def run():
+        close_old_connections()
+        try:
+            profile = current_profile.get()
+            if profile is None:
+                return function()
+            with connection.execute_wrapper(profile.execute):
+                return function()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*functions):
+    # Независимые запросы выполняются параллельно, каждый в своём потоке и со своим соединением.
+    # Асинхронный ORM Django выполняет запросы одного запроса последовательно в общем потоке, поэтому
+    # параллельность даёт только отдельное соединение. Внутри транзакции (тесты, ATOMIC_REQUESTS) другие
+    # соединения не видят её данных, и запросы выполняются последовательно в потоке транзакции
+    if await sync_to_async(lambda: connection.in_atomic_block)():
+        return [await sync_to_async(function)() for function in functions]
+
+    return await asyncio.gather(
+        *(sync_to_async(in_own_connection(function), thread_sensitive=False)() for function in functions)
+    )
@@ -0,0 +1,34 @@
+from django.db.models import Exists, OuterRef
+
+from .models import BLOCKING_RESERVATION_STATUSES, Reservation, Room
+
+
+def overlapping_reservations(arrival_date, departure_date):
+    # Полуинтервалы [arrival, departure) пересекаются, если каждый начинается раньше конца другого.
+    # Запрос обслуживается частичным индексом reservation_room_interval_idx.
+    return Reservation.objects.filter(
+        status__in=BLOCKING_RESERVATION_STATUSES,
+        arrival_date__lt=departure_date,
+        departure_date__gt=arrival_date,
+    )
+
+
+def is_room_free(room, arrival_date, departure_date, exclude_reservation=None):
+    reservations = overlapping_reservations(arrival_date, departure_date).filter(room=room)
+    if exclude_reservation is not None:
+        reservations = reservations.exclude(id=exclude_reservation.id)
+    return not reservations.exists()
+
+
+def available_rooms(arrival_date, departure_date, room_type_id=None):
+    rooms = Room.objects.select_related('type')
+    if room_type_id is not None:
+        rooms = rooms.filter(type_id=room_type_id)
+
+    busy = overlapping_reservations(arrival_date, departure_date).filter(room=OuterRef('pk'))
+    return rooms.filter(~Exists(busy)).order_by('number')
+
+
+def lock_room(room_id):
+    # Блокировка строки номера сериализует конкурентные бронирования одной комнаты
+    return Room.objects.select_for_update().select_related('type').get(id=room_id)
@@ -0,0 +1,144 @@
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Max
+
+from hotel_app.booking import BookingError, book_stay
+from hotel_app.models import Client, Reservation, Room
+from hotel_app.room_states import sync_status_log
+
+from .load import summarize
+
+# Паспорта клиентов бенчмарка: генератор данных использует префиксы 4 и 9
+PASSPORT_PREFIX = '8'
+NIGHTS = 3
+
+
+def booking_plan(room_numbers, bookings, start_date, hot_rooms=0, clients=None):
+    # Без hot_rooms каждое бронирование получает свою комнату и даты — конфликтов нет, измеряется чистая
+    # пропускная способность. С hot_rooms все бронирования претендуют на те же даты в нескольких комнатах:
+    # проходит по одному на комнату, остальные получают отказ, а потоки ждут блокировки строки номера
+    clients = clients or max(bookings // 2, 1)
+    plan = []
+    for index in range(bookings):
+        if hot_rooms:
+            room_number = room_numbers[index % hot_rooms]
+            arrival_date = start_date
+        else:
+            room_number = room_numbers[index % len(room_numbers)]
+            arrival_date = start_date + timedelta(days=(index // len(room_numbers)) * (NIGHTS + 1))
+        plan.append({
+            'room_number': room_number,
+            'arrival_date': arrival_date,
+            'departure_date': arrival_date + timedelta(days=NIGHTS),
+            'client_data': {
+                'passport_number': f'{PASSPORT_PREFIX}{index % clients:09d}',
+                'first_name': 'Гость',
+                'last_name': f'Нагрузочный{index % 7}',
+                'middle_name': None,
+                'city_from': 'Москва',
+            },
+        })
+    return plan
+
+
+def double_bookings(reservation_ids):
+    # Пары пересекающихся бронирований одной комнаты среди созданных — должно быть ноль
+    stays = defaultdict(list)
+    for room_id, arrival_date, departure_date in Reservation.objects.filter(id__in=reservation_ids).values_list(
+            'room_id', 'arrival_date', 'departure_date'):
+        stays[room_id].append((arrival_date, departure_date))
+
+    overlaps = 0
+    for room_stays in stays.values():
+        room_stays.sort()
+        for (_, previous_departure), (arrival_date, _) in zip(room_stays, room_stays[1:]):
+            overlaps += arrival_date < previous_departure
+    return overlaps
+
+
+def run_bookings(admin, bookings=200, concurrency=8, hot_rooms=0, keep=False):
+    rooms = dict(Room.objects.order_by('number').values_list('number', 'status'))
+    if not rooms or (hot_rooms and hot_rooms > len(rooms)):
+        raise LookupError("Недостаточно комнат для бенчмарка: сначала выполните generate_benchmark_data.")
+
+    last_departure = Reservation.objects.aggregate(last=Max('departure_date'))['last']
+    start_date = last_departure + timedelta(days=30)
+    existing_clients = set(Client.objects.filter(
+        passport_number__startswith=PASSPORT_PREFIX
+    ).values_list('passport_number', flat=True))
+
+    tasks = queue.Queue()
+    for task in booking_plan(list(rooms), bookings, start_date, hot_rooms):
+        tasks.put(task)
+
+    lock = threading.Lock()
+    timings = []
+    statuses = Counter()
+    errors = Counter()
+    created = []
+
+    def worker():
+        try:
+            while True:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    reservation, _, _ = book_stay(admin, **task)
+                    status, error = 201, None
+                except BookingError:
+                    status, error = 422, None
+                except Exception as exception:
+                    # Например, «database is locked» у SQLite при одновременной записи
+                    status, error = None, f'{type(exception).__name__}: {exception}'
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings.append(elapsed_ms)
+                    statuses[status] += 1
+                    if status == 201:
+                        created.append(reservation.id)
+                    if error:
+                        errors[error] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'vendor': connection.vendor,
+        'bookings': bookings,
+        'concurrency': concurrency,
+        'hot_rooms': hot_rooms,
+        'duration_s': round(elapsed, 3),
+        'booked': statuses[201],
+        'rejected': statuses[422],
+        'bookings_per_second': round(statuses[201] / elapsed, 2) if elapsed else None,
+        'double_bookings': double_bookings(created),
+        'failures': dict(errors.most_common()),
+        'total': summarize(timings, statuses, elapsed),
+    }
+
+    if not keep:
+        Reservation.objects.filter(id__in=created).delete()
+        Client.objects.filter(passport_number__startswith=PASSPORT_PREFIX).exclude(
+            passport_number__in=existing_clients
+        ).delete()
+        for status in set(rooms.values()):
+            Room.objects.filter(number__in=[number for number, value in rooms.items() if value == status]).update(
+                status=status
+            )
+        sync_status_log()
+    return report
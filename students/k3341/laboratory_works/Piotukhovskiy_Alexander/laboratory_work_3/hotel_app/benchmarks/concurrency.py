@@ -0,0 +1,150 @@
+import asyncio
+import io
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+
+from .load import summarize
+
+HOST = '127.0.0.1'
+
+
+def dashboard_paths(today=None):
+    # Запросы панели администратора: комнаты по статусу, текущие клиенты и отчёт за прошлый квартал
+    today = today or date.today()
+    last_quarter_end = date(today.year, (today.month - 1) // 3 * 3 + 1, 1) - timedelta(days=1)
+    quarter = (last_quarter_end.month - 1) // 3 + 1
+    return [
+        '/hotel/rooms?status=OCCUPIED,AVAILABLE',
+        f'/hotel/clients?start_date={today.isoformat()}&end_date={today.isoformat()}',
+        f'/hotel/reports/quarterly?quarter={quarter}&year={last_quarter_end.year}',
+    ]
+
+
+def split_path(path):
+    path, _, query = path.partition('?')
+    return path, quote(query, safe='=&,:%+')
+
+
+def wsgi_call(application, path, authorization):
+    path, query = split_path(path)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'HTTP_HOST': HOST, 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_AUTHORIZATION': authorization,
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    result = application(environ, start_response)
+    try:
+        b''.join(result)
+    finally:
+        # close() отправляет request_finished: Django закрывает соединение потока, как после обычного запроса
+        result.close()
+    return status[0]
+
+
+async def asgi_call(application, path, authorization):
+    path, query = split_path(path)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'authorization', authorization.encode())],
+        'client': (HOST, 0), 'server': (HOST, 80),
+    }
+    body_sent = False
+    disconnected = asyncio.Event()
+    status = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Клиент не отключается: Django отменит ожидание, когда ответ будет отправлен
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def collect(results, elapsed):
+    timings = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    for path, status, elapsed_ms in results:
+        timings[path].append(elapsed_ms)
+        statuses[path][status] += 1
+
+    all_statuses = defaultdict(int)
+    for path_statuses in statuses.values():
+        for status, count in path_statuses.items():
+            all_statuses[status] += count
+
+    return {
+        'duration_s': round(elapsed, 3),
+        'total': summarize([value for values in timings.values() for value in values], all_statuses, elapsed),
+        'targets': {path: summarize(timings[path], statuses[path], elapsed) for path in timings},
+    }
+
+
+def run_wsgi(paths, requests, concurrency, authorization):
+    application = get_wsgi_application()
+
+    def call(index):
+        path = paths[index % len(paths)]
+        started = time.perf_counter()
+        status = wsgi_call(application, path, authorization)
+        return path, status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    return collect(results, time.perf_counter() - started)
+
+
+def run_asgi(paths, requests, concurrency, authorization):
+    application = get_asgi_application()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(index):
+            path = paths[index % len(paths)]
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_call(application, path, authorization)
+                return path, status, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call(index) for index in range(requests)))
+        return collect(results, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def compare_servers(paths, requests=300, concurrency=16, authorization=''):
+    # Один и тот же набор запросов через WSGI (поток на запрос) и через ASGI (цикл событий) в текущем процессе,
+    # без сетевого стека: разница в результатах — это разница в модели обработки запросов
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'paths': paths,
+        'wsgi': run_wsgi(paths, requests, concurrency, authorization),
+        'asgi': run_asgi(paths, requests, concurrency, authorization),
+    }
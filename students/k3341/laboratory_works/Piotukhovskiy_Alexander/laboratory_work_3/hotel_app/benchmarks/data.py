@@ -0,0 +1,207 @@
+import random
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from hotel_app.cache import invalidate_cached_responses
+from hotel_app.models import CleaningSchedule, Client, DailyRoomRevenue, Employee, EmployeePosition, \
+    EmploymentContract, Reservation, Room, RoomPriceHistory, RoomType
+from hotel_app.pricing import invalidate_rate_calendar
+from hotel_app.room_states import sync_status_log
+from hotel_app.rollups import backfill_room_revenue
+from hotel_app.signals import CACHED_MODELS
+
+BENCHMARK_ADMIN = 'bench-admin'
+BENCHMARK_PASSWORD = 'bench-admin'
+
+# (название, мест, базовая цена за сутки)
+ROOM_TYPES = [
+    ('Одноместный', 1, 2500),
+    ('Двухместный', 2, 3500),
+    ('Семейный', 4, 5500),
+    ('Люкс', 2, 9000),
+    ('Апартаменты', 6, 12000),
+]
+# Сезонный множитель цены по кварталам
+SEASON_FACTORS = {1: 0.85, 2: 1.0, 3: 1.3, 4: 0.95}
+CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Екатеринбург', 'Новосибирск', 'Самара', 'Сочи', 'Калининград',
+          'Владивосток', 'Пермь', 'Томск', 'Уфа']
+FIRST_NAMES = ['Иван', 'Пётр', 'Анна', 'Мария', 'Алексей', 'Ольга', 'Дмитрий', 'Елена', 'Сергей', 'Наталья']
+LAST_NAMES = ['Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов', 'Новиков']
+
+ROOMS_PER_SCALE = 40
+CLIENTS_PER_SCALE = 400
+CLEANERS_PER_SCALE = 4
+BATCH_SIZE = 2000
+
+
+class DatasetSize:
+    def __init__(self, scale=1.0, years=3):
+        self.rooms = max(4, round(ROOMS_PER_SCALE * scale))
+        self.clients = max(20, round(CLIENTS_PER_SCALE * scale))
+        self.cleaners = max(2, round(CLEANERS_PER_SCALE * scale))
+        self.years = max(1, years)
+
+
+def quarter_starts(start_date, end_date):
+    current = date(start_date.year, (start_date.month - 1) // 3 * 3 + 1, 1)
+    while current <= end_date:
+        yield current
+        month = current.month + 3
+        current = date(current.year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+
+def price_history(room_types, start_date, end_date, rng):
+    # Цены меняются поквартально; последняя запись открыта (end_date = None), как у действующей цены
+    rows = []
+    starts = list(quarter_starts(start_date, end_date))
+    for room_type, (_, _, base_price) in zip(room_types, ROOM_TYPES):
+        for index, period_start in enumerate(starts):
+            quarter = (period_start.month - 1) // 3 + 1
+            price = round(base_price * SEASON_FACTORS[quarter] * rng.uniform(0.95, 1.1), -1)
+            period_end = starts[index + 1] - timedelta(days=1) if index + 1 < len(starts) else None
+            rows.append(RoomPriceHistory(
+                room_type=room_type, start_date=period_start, end_date=period_end, price=int(price)
+            ))
+    return rows
+
+
+def nightly_price(calendar, night):
+    starts, prices = calendar
+    return prices[bisect_right(starts, night) - 1]
+
+
+def reservation_status(arrival_date, departure_date, today, rng):
+    if departure_date <= today:
+        if rng.random() < 0.05:
+            return 'CANCELLED', 'REFUNDED'
+        return 'CHECKED_OUT', 'PAID'
+    if arrival_date <= today:
+        return 'CHECKED_IN', rng.choice(['PAID', 'PREPAID'])
+    return rng.choice(['BOOKED', 'CONFIRMED']), rng.choice(['UNPAID', 'PREPAID'])
+
+
+@transaction.atomic
+def generate_dataset(scale=1.0, years=3, seed=0, today=None):
+    # Детерминированный набор данных: одинаковые scale, years, seed и today дают одинаковые строки.
+    # Бронирования охватывают years лет до today и квартал вперёд, по комнате без пересечений.
+    rng = random.Random(seed)
+    size = DatasetSize(scale, years)
+    today = today or date.today()
+    start_date = date(today.year - size.years + 1, 1, 1)
+    end_date = today + timedelta(days=90)
+
+    admin, created = User.objects.get_or_create(
+        username=BENCHMARK_ADMIN, defaults={'is_staff': True, 'is_superuser': True}
+    )
+    if created:
+        admin.set_password(BENCHMARK_PASSWORD)
+        admin.save(update_fields=['password'])
+
+    room_types = RoomType.objects.bulk_create([
+        RoomType(name=name, capacity=capacity, has_wifi=True, has_tv=capacity > 1, has_safe=price > 5000)
+        for name, capacity, price in ROOM_TYPES
+    ])
+    prices = RoomPriceHistory.objects.bulk_create(price_history(room_types, start_date, end_date, rng))
+    calendars = {}
+    for row in prices:
+        starts, values = calendars.setdefault(row.room_type_id, ([], []))
+        starts.append(row.start_date)
+        values.append(row.price)
+
+    rooms = Room.objects.bulk_create([
+        Room(number=(index // 20 + 1) * 100 + index % 20 + 1, type=rng.choice(room_types),
+             phone=f'8812{index:07d}')
+        for index in range(size.rooms)
+    ])
+    clients = Client.objects.bulk_create([
+        Client(
+            passport_number=f'{4000 + index // 1000000:04d}{index % 1000000:06d}',
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            city_from=rng.choice(CITIES),
+        )
+        for index in range(size.clients)
+    ], batch_size=BATCH_SIZE)
+
+    reservations = []
+    occupied_rooms = set()
+    for room in rooms:
+        calendar = calendars[room.type_id]
+        arrival_date = start_date + timedelta(days=rng.randint(0, 6))
+        while arrival_date < end_date:
+            nights = rng.randint(1, 10)
+            departure_date = arrival_date + timedelta(days=nights)
+            status, payment_status = reservation_status(arrival_date, departure_date, today, rng)
+            price = sum(nightly_price(calendar, arrival_date + timedelta(days=night)) for night in range(nights))
+            reservations.append(Reservation(
+                room=room, client=rng.choice(clients), admin=admin,
+                booking_date=arrival_date - timedelta(days=rng.randint(0, 60)),
+                arrival_date=arrival_date, departure_date=departure_date,
+                status=status, payment_status=payment_status,
+                price_at_booking=price, final_price=price,
+            ))
+            if status == 'CHECKED_IN':
+                occupied_rooms.add(room.id)
+            arrival_date = departure_date + timedelta(days=rng.randint(0, 6))
+    Reservation.objects.bulk_create(reservations, batch_size=BATCH_SIZE)
+
+    for room in rooms:
+        if room.id in occupied_rooms:
+            room.status = 'OCCUPIED'
+        else:
+            room.status = rng.choices(['AVAILABLE', 'REQUIRES_CLEANING', 'MAINTENANCE'], weights=[85, 10, 5])[0]
+    Room.objects.bulk_update(rooms, ['status'], batch_size=BATCH_SIZE)
+    sync_status_log()
+
+    cleaner_position = EmployeePosition.objects.create(name='Горничная', salary=45000)
+    manager_position = EmployeePosition.objects.create(name='Администратор', salary=70000)
+    employees = Employee.objects.bulk_create([
+        Employee(passport_number=f'{9000 + index // 1000000:04d}{index % 1000000:06d}',
+                 first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+        for index in range(size.cleaners + 2)
+    ])
+    contracts = EmploymentContract.objects.bulk_create(
+        [
+            EmploymentContract(employee=employee, position=cleaner_position, contract_type='PERMANENT',
+                               start_date=start_date)
+            for employee in employees[:size.cleaners]
+        ] + [
+            # Уволенная горничная и администратор без уборок
+            EmploymentContract(employee=employees[size.cleaners], position=cleaner_position,
+                               contract_type='PERMANENT', start_date=start_date,
+                               termination_date=start_date + timedelta(days=180), is_active=False),
+            EmploymentContract(employee=employees[size.cleaners + 1], position=manager_position,
+                               contract_type='PERMANENT', start_date=start_date),
+        ]
+    )
+    cleaners = contracts[:size.cleaners]
+
+    cleanings = {}
+    for reservation in reservations:
+        if reservation.status != 'CANCELLED':
+            key = (reservation.room_id, reservation.departure_date)
+            cleanings.setdefault(key, CleaningSchedule(
+                room_id=reservation.room_id, cleaning_date=reservation.departure_date,
+                cleaner=cleaners[len(cleanings) % len(cleaners)],
+                status='COMPLETED' if reservation.departure_date < today else 'PENDING',
+            ))
+    CleaningSchedule.objects.bulk_create(cleanings.values(), batch_size=BATCH_SIZE)
+
+    revenue_rows = backfill_room_revenue()
+
+    # Массовая вставка не отправляет сигналы: кэш ответов и календари цен сбрасываются явно
+    invalidate_cached_responses(*CACHED_MODELS, DailyRoomRevenue)
+    invalidate_rate_calendar()
+
+    return {
+        'room_types': len(room_types),
+        'price_history': len(prices),
+        'rooms': len(rooms),
+        'clients': len(clients),
+        'reservations': len(reservations),
+        'employees': len(employees),
+        'cleaning_schedules': len(cleanings),
+        'daily_room_revenue': revenue_rows,
+    }
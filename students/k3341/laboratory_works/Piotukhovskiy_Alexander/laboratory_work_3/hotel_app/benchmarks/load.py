@@ -0,0 +1,113 @@
+import base64
+import itertools
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from .suite import percentile
+
+DEFAULT_PATHS = [
+    '/hotel/health',
+    '/hotel/api/rooms/',
+    '/hotel/api/clients/',
+    '/hotel/api/reservations/',
+    '/hotel/rooms?status=AVAILABLE',
+    '/hotel/clients?city=Москва',
+]
+
+
+def target_url(base_url, path):
+    # Кириллица в параметрах (например, city=Москва) кодируется, как это сделал бы браузер
+    return base_url.rstrip('/') + quote(path, safe="/?=&,:%+")
+
+
+def auth_header(username=None, password=None, token=None):
+    if token:
+        return f'Token {token}'
+    if username:
+        return 'Basic ' + base64.b64encode(f'{username}:{password or ""}'.encode()).decode()
+    return None
+
+
+def fetch(url, headers, timeout):
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    except (URLError, OSError, ValueError):
+        status = None
+    return status, (time.perf_counter() - started) * 1000
+
+
+def summarize(timings, statuses, elapsed):
+    timings = sorted(timings)
+    errors = sum(count for status, count in statuses.items() if status is None or status >= 400)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        'rps': round(len(timings) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(timings, 0.5), 3) if timings else None,
+        'p95_ms': round(percentile(timings, 0.95), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 0.99), 3) if timings else None,
+        'max_ms': round(timings[-1], 3) if timings else None,
+    }
+
+
+def run_load(base_url, paths=None, concurrency=8, requests=None, duration=None, authorization=None, timeout=30):
+    # Каждый поток берёт следующий адрес по кругу, пока не исчерпан лимит запросов или время;
+    # без явных лимитов выполняется 100 запросов на поток
+    paths = paths or DEFAULT_PATHS
+    if requests is None and duration is None:
+        requests = concurrency * 100
+    headers = {'Accept': 'application/json'}
+    if authorization:
+        headers['Authorization'] = authorization
+
+    targets = itertools.cycle([target_url(base_url, path) for path in paths])
+    counter = itertools.count()
+    lock = threading.Lock()
+    timings = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker():
+        while True:
+            with lock:
+                if requests is not None and next(counter) >= requests:
+                    return
+                url = next(targets)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            status, elapsed_ms = fetch(url, headers, timeout)
+            with lock:
+                timings[url].append(elapsed_ms)
+                statuses[url][status] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        workers = [executor.submit(worker) for _ in range(concurrency)]
+    for future in workers:
+        future.result()
+    elapsed = time.perf_counter() - started
+
+    all_timings = [value for values in timings.values() for value in values]
+    all_statuses = defaultdict(int)
+    for url_statuses in statuses.values():
+        for status, count in url_statuses.items():
+            all_statuses[status] += count
+
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'total': summarize(all_timings, all_statuses, elapsed),
+        'targets': {url: summarize(timings[url], statuses[url], elapsed) for url in timings},
+    }
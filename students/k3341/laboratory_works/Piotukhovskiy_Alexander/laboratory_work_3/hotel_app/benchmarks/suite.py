@@ -0,0 +1,299 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from hotel_app.models import CleaningSchedule, Client, Employee, EmploymentContract, Reservation, Room, RoomType
+from hotel_app.serializers import CleaningEmployeeSerializer, CleaningScheduleSerializer, ClientSerializer, \
+    CreateReservationSerializer, EmployeePositionSerializer, EmployeeSerializer, EmploymentContractDetailSerializer, \
+    HireEmployeeSerializer, ReservationSerializer, RoomSerializer, UpdateCleaningScheduleSerializer
+from hotel_app.views import ClientViewSet, CleaningScheduleViewSet, EmployeePositionsViewSet, EmployeeViewSet, \
+    EmploymentContractViewSet, ReservationViewSet, RoomViewSet
+
+from .data import BENCHMARK_ADMIN
+
+# Бюджет медианной задержки по умолчанию для набора данных scale=1 на машине разработчика
+DEFAULT_MAX_MEDIAN_MS = 250
+SERIALIZED_OBJECTS = 200
+# Управление транзакцией не входит в бюджет: внутри внешней транзакции (тесты) atomic даёт лишние SAVEPOINT
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT', 'ROLLBACK')
+
+
+class Benchmark:
+    def __init__(self, name, run, max_queries=None, max_median_ms=DEFAULT_MAX_MEDIAN_MS, expected_status=200,
+                 rollback=False, kind='view'):
+        self.name = name
+        self.run = run
+        self.max_queries = max_queries
+        self.max_median_ms = max_median_ms
+        self.expected_status = expected_status
+        self.rollback = rollback
+        self.kind = kind
+
+
+class BenchmarkContext:
+    # Идентификаторы из сгенерированного набора, на которых строятся запросы
+    def __init__(self):
+        self.today = date.today()
+        reservation = Reservation.objects.filter(status='CHECKED_IN').select_related('room', 'client').order_by(
+            'id'
+        ).first() or Reservation.objects.select_related('room', 'client').order_by('id').first()
+        if reservation is None:
+            raise LookupError("Нет данных для бенчмарка: сначала выполните generate_benchmark_data.")
+
+        self.reservation = reservation
+        self.room_number = reservation.room.number
+        self.client_id = reservation.client_id
+        self.client_ids = list(Client.objects.order_by('id').values_list('id', flat=True)[:100])
+        self.room_type_ids = list(RoomType.objects.order_by('id').values_list('id', flat=True))
+        self.room_numbers = list(Room.objects.order_by('number').values_list('number', flat=True)[:5])
+        contract = EmploymentContract.objects.filter(
+            is_active=True, id__in=CleaningSchedule.objects.values('cleaner')
+        ).order_by('id').first()
+        self.cleaner_employee_id = contract.employee_id
+        self.position_id = contract.position_id
+        self.user = User.objects.filter(username=BENCHMARK_ADMIN).first() or User.objects.filter(
+            is_superuser=True
+        ).order_by('id').first()
+
+        last_quarter_end = date(self.today.year, (self.today.month - 1) // 3 * 3 + 1, 1) - timedelta(days=1)
+        self.report_quarter = ((last_quarter_end.month - 1) // 3 + 1, last_quarter_end.year)
+        self.report_month = (last_quarter_end.month, last_quarter_end.year)
+        self.future_arrival = self.today + timedelta(days=120)
+
+
+def api(method, path, data=None, **extra):
+    def run(client):
+        return getattr(client, method)(path, data, format='json' if method != 'get' else None, **extra)
+    return run
+
+
+def serialize(serializer_class, queryset_factory):
+    def run(client):
+        serializer_class(list(queryset_factory()[:SERIALIZED_OBJECTS]), many=True).data
+    return run
+
+
+def validate(serializer_class, payload):
+    def run(client):
+        serializer = serializer_class(data=payload)
+        if not serializer.is_valid():
+            raise AssertionError(f"{serializer_class.__name__}: {serializer.errors}")
+    return run
+
+
+def view_benchmarks(context):
+    today = context.today.isoformat()
+    week_ago = (context.today - timedelta(days=7)).isoformat()
+    month_ahead = (context.today + timedelta(days=30)).isoformat()
+    arrival = context.future_arrival
+    quarter, quarter_year = context.report_quarter
+    month, month_year = context.report_month
+    import_file = "passport_number,first_name,last_name,city_from\n" + "".join(
+        f"77{index:08d},Иван,Иванов,Москва\n" for index in range(50)
+    )
+
+    def import_clients(client):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('clients.csv', import_file.encode(), content_type='text/csv')
+        return client.post('/hotel/import/clients', {'file': upload}, format='multipart')
+
+    return [
+        Benchmark('health', api('get', '/hotel/health'), max_queries=0),
+        Benchmark('api/clients', api('get', '/hotel/api/clients/'), max_queries=1),
+        Benchmark('api/rooms', api('get', '/hotel/api/rooms/', {'page_size': 200}), max_queries=4),
+        Benchmark('api/reservations', api('get', '/hotel/api/reservations/', {'page_size': 200}), max_queries=4),
+        Benchmark('api/employees', api('get', '/hotel/api/employees/'), max_queries=2),
+        Benchmark('api/employment-contracts', api('get', '/hotel/api/employment-contracts/'), max_queries=1),
+        Benchmark('api/positions', api('get', '/hotel/api/positions/'), max_queries=1),
+        Benchmark('api/cleaning-schedules', api('get', '/hotel/api/cleaning-schedules/', {'page_size': 200}),
+                  max_queries=1),
+        Benchmark('clients by room and period', api('get', '/hotel/clients', {
+            'room': context.room_number, 'start_date': week_ago, 'end_date': month_ahead,
+        }), max_queries=1),
+        Benchmark('clients by city', api('get', '/hotel/clients', {'city': 'Москва', 'ordering': 'last_name'}),
+                  max_queries=1),
+        Benchmark('rooms by status', api('get', '/hotel/rooms', {'status': 'AVAILABLE,OCCUPIED'}), max_queries=3),
+        Benchmark('room status counts', api('get', '/hotel/rooms/status-counts'), max_queries=1),
+        Benchmark('rooms availability', api('get', '/hotel/rooms/availability', {
+            'from': arrival.isoformat(), 'to': (arrival + timedelta(days=5)).isoformat(),
+        }), max_queries=4),
+        Benchmark('client stay overlap', api('get', '/hotel/clients/stay-overlap', {
+            'client_id': context.client_id,
+        }), max_queries=2),
+        Benchmark('client stay overlap batch', api('post', '/hotel/clients/stay-overlap/batch', {
+            'client_ids': context.client_ids,
+        }), max_queries=2, max_median_ms=2000),
+        Benchmark('client room cleaner', api('get', '/hotel/clients/room-cleaner', {
+            'client_id': context.client_id, 'day_of_week': context.today.strftime('%A').upper(),
+        }), max_queries=3),
+        Benchmark('hire employee', api('post', '/hotel/employees/manage', {
+            'passport_number': '5555000001', 'first_name': 'Анна', 'last_name': 'Смирнова',
+            'position_id': context.position_id, 'contract_type': 'PERMANENT', 'start_date': today,
+        }), max_queries=5, expected_status=201, rollback=True),
+        Benchmark('assign cleanings', api('patch', '/hotel/cleaning-schedules/manage', {
+            'cleaner_id': context.cleaner_employee_id, 'room_ids': context.room_numbers,
+            'cleaning_dates': [(arrival + timedelta(days=day)).isoformat() for day in range(7)],
+        }), max_queries=8, rollback=True),
+        Benchmark('plan cleanings (dry run)', api('post', '/hotel/cleaning-schedules/plan', {
+            'start_date': today, 'end_date': month_ahead, 'dry_run': True,
+        }), max_queries=4, rollback=True),
+        Benchmark('create reservation', api('post', '/hotel/reservation', {
+            'passport_number': '5555000002', 'first_name': 'Пётр', 'last_name': 'Петров', 'city_from': 'Казань',
+            'room_number': context.room_number, 'arrival_date': (arrival + timedelta(days=400)).isoformat(),
+            'departure_date': (arrival + timedelta(days=403)).isoformat(),
+        }), max_queries=8, expected_status=201, rollback=True),
+        Benchmark('update reservation', api('patch', f'/hotel/reservation/{context.reservation.id}', {
+            'payment_status': 'PAID',
+        }), max_queries=11, rollback=True),
+        Benchmark('stay quotes', api('post', '/hotel/reservation/quotes', {'stays': [
+            {'room_type_id': room_type_id, 'arrival_date': arrival.isoformat(),
+             'departure_date': (arrival + timedelta(days=nights)).isoformat()}
+            for room_type_id in context.room_type_ids for nights in (1, 7, 30)
+        ]}), max_queries=1),
+        Benchmark('quarterly report', api('get', '/hotel/reports/quarterly', {
+            'quarter': quarter, 'year': quarter_year,
+        }), max_queries=2),
+        Benchmark('monthly report', api('get', '/hotel/reports/monthly', {'month': month, 'year': month_year}),
+                  max_queries=2),
+        Benchmark('range report', api('get', '/hotel/reports/range', {
+            'start_date': (context.today - timedelta(days=365)).isoformat(), 'end_date': today,
+        }), max_queries=2),
+        Benchmark('occupancy forecast', api('get', '/hotel/reports/occupancy', {'granularity': 'week'}),
+                  max_queries=2),
+        Benchmark('import clients', import_clients, max_queries=3, rollback=True),
+    ]
+
+
+def serializer_benchmarks(context):
+    arrival = context.future_arrival
+    return [
+        Benchmark('ClientSerializer', serialize(ClientSerializer, lambda: ClientViewSet.queryset.order_by('id')),
+                  max_queries=1, kind='serializer'),
+        Benchmark('RoomSerializer', serialize(RoomSerializer, lambda: RoomViewSet.queryset.order_by('id')),
+                  max_queries=4, kind='serializer'),
+        Benchmark('ReservationSerializer',
+                  serialize(ReservationSerializer, lambda: ReservationViewSet.queryset.order_by('id')),
+                  max_queries=4, kind='serializer'),
+        Benchmark('EmployeeSerializer', serialize(EmployeeSerializer, lambda: EmployeeViewSet.queryset.order_by('id')),
+                  max_queries=2, kind='serializer'),
+        Benchmark('EmploymentContractDetailSerializer', serialize(
+            EmploymentContractDetailSerializer, lambda: EmploymentContractViewSet.queryset.order_by('id')
+        ), max_queries=1, kind='serializer'),
+        Benchmark('EmployeePositionSerializer', serialize(
+            EmployeePositionSerializer, lambda: EmployeePositionsViewSet.queryset.order_by('id')
+        ), max_queries=1, kind='serializer'),
+        Benchmark('CleaningScheduleSerializer', serialize(
+            CleaningScheduleSerializer, lambda: CleaningScheduleViewSet.queryset.order_by('id')
+        ), max_queries=1, kind='serializer'),
+        Benchmark('CleaningEmployeeSerializer', serialize(
+            CleaningEmployeeSerializer, lambda: Employee.objects.order_by('id')
+        ), max_queries=1, kind='serializer'),
+        Benchmark('HireEmployeeSerializer', validate(HireEmployeeSerializer, {
+            'passport_number': '5555000003', 'first_name': 'Анна', 'last_name': 'Смирнова',
+            'position_id': context.position_id, 'contract_type': 'PERMANENT', 'start_date': context.today,
+        }), max_queries=0, kind='serializer'),
+        Benchmark('CreateReservationSerializer', validate(CreateReservationSerializer, {
+            'passport_number': '5555000004', 'first_name': 'Пётр', 'last_name': 'Петров', 'city_from': 'Казань',
+            'room_number': context.room_number, 'arrival_date': arrival,
+            'departure_date': arrival + timedelta(days=3),
+        }), max_queries=0, kind='serializer'),
+        Benchmark('UpdateCleaningScheduleSerializer', validate(UpdateCleaningScheduleSerializer, {
+            'cleaner_id': context.cleaner_employee_id, 'room_ids': context.room_numbers,
+            'cleaning_dates': [arrival],
+        }), max_queries=2, kind='serializer'),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    # Процентиль с линейной интерполяцией между соседними значениями
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_once(benchmark, client):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        if benchmark.rollback:
+            with transaction.atomic():
+                response = benchmark.run(client)
+                transaction.set_rollback(True)
+        else:
+            response = benchmark.run(client)
+        elapsed = (time.perf_counter() - started) * 1000
+    status = getattr(response, 'status_code', None)
+    query_count = sum(
+        not query['sql'].lstrip().upper().startswith(TRANSACTION_STATEMENTS) for query in queries.captured_queries
+    )
+    return elapsed, query_count, status
+
+
+def measure(benchmark, client, rounds=10, warmup=1, warm_cache=False, check_latency=True):
+    # Каждый замер по умолчанию начинается с пустого кэша ответов: измеряется работа представления,
+    # а не чтение из кэша. Изменяющие данные запросы выполняются в откатываемой транзакции
+    timings = []
+    query_counts = []
+    statuses = set()
+    for index in range(warmup + rounds):
+        if not warm_cache:
+            cache.clear()
+        elapsed, query_count, status = run_once(benchmark, client)
+        if index >= warmup:
+            timings.append(elapsed)
+            query_counts.append(query_count)
+            statuses.add(status)
+
+    timings.sort()
+    result = {
+        'name': benchmark.name,
+        'kind': benchmark.kind,
+        'rounds': rounds,
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': max(query_counts),
+        'max_queries': benchmark.max_queries,
+        'max_median_ms': benchmark.max_median_ms,
+        'statuses': sorted(status for status in statuses if status is not None),
+    }
+    result['failures'] = budget_failures(benchmark, result, check_latency)
+    return result
+
+
+def budget_failures(benchmark, result, check_latency=True):
+    failures = []
+    if benchmark.kind == 'view' and result['statuses'] != [benchmark.expected_status]:
+        failures.append(f"статус ответа {result['statuses']}, ожидался {benchmark.expected_status}")
+    if benchmark.max_queries is not None and result['queries'] > benchmark.max_queries:
+        failures.append(f"запросов {result['queries']}, бюджет {benchmark.max_queries}")
+    if check_latency and benchmark.max_median_ms is not None and result['median_ms'] > benchmark.max_median_ms:
+        failures.append(f"медиана {result['median_ms']} мс, бюджет {benchmark.max_median_ms} мс")
+    return failures
+
+
+def run_benchmarks(rounds=10, warmup=1, warm_cache=False, names=None, kinds=('view', 'serializer'),
+                   check_latency=True):
+    context = BenchmarkContext()
+    client = APIClient()
+    client.force_authenticate(context.user)
+
+    benchmarks = []
+    if 'view' in kinds:
+        benchmarks += view_benchmarks(context)
+    if 'serializer' in kinds:
+        benchmarks += serializer_benchmarks(context)
+    if names:
+        benchmarks = [benchmark for benchmark in benchmarks if benchmark.name in names]
+
+    return [measure(benchmark, client, rounds, warmup, warm_cache, check_latency) for benchmark in benchmarks]
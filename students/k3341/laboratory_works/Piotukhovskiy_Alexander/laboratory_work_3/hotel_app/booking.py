@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+
+from .availability import is_room_free
+from .models import BLOCKING_RESERVATION_STATUSES, Client, Reservation, Room
+from .pricing import quote_stay
+from .room_states import apply_event, can_apply
+
+CLIENT_FIELDS = ('first_name', 'last_name', 'middle_name', 'city_from')
+
+
+class BookingError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def lock_room_by_number(room_number):
+    # Поиск и блокировка комнаты одним запросом: для цены и ответа нужны только тип, номер и статус
+    return Room.objects.select_for_update().only('id', 'number', 'type_id', 'status').filter(
+        number=room_number
+    ).first()
+
+
+def upsert_client(passport_number, **fields):
+    # Новый клиент — один INSERT; существующий — UPDATE только изменившихся полей или ничего
+    client = Client.objects.filter(passport_number=passport_number).first()
+    if client is None:
+        try:
+            with transaction.atomic():
+                return Client.objects.create(passport_number=passport_number, **fields)
+        except IntegrityError:
+            # Клиента с тем же паспортом только что создало параллельное бронирование
+            client = Client.objects.get(passport_number=passport_number)
+
+    changed = [field for field, value in fields.items() if getattr(client, field) != value]
+    if changed:
+        for field in changed:
+            setattr(client, field, fields[field])
+        client.save(update_fields=changed)
+    return client
+
+
+def release_room(room, reservation, user, event='RELEASE'):
+    # room заблокирована вызывающим (lock_room). Номер освобождается, только если на нём не осталось
+    # других действующих бронирований; выезд переводит номер в уборку в любом случае
+    if event == 'RELEASE' and Reservation.objects.filter(
+            room_id=room.id, status__in=BLOCKING_RESERVATION_STATUSES
+    ).exclude(id=reservation.id).exists():
+        return False
+    return apply_event(room, event, reservation=reservation, user=user, strict=False)
+
+
+def book_stay(admin, room_number, arrival_date, departure_date, client_data, status=None, payment_status=None):
+    with transaction.atomic():
+        room = lock_room_by_number(room_number)
+        if room is None:
+            raise BookingError({"room_number": f"Комната с номером {room_number} не найдена."})
+        if not can_apply(room.status, 'BOOK'):
+            raise BookingError({"room_number": f"Комната {room.number} недоступна: {room.get_status_display().lower()}."})
+
+        # Проверка занятости — отдельный запрос после блокировки: он видит бронирования, зафиксированные
+        # транзакциями, которые держали блокировку до нас
+        if not is_room_free(room, arrival_date, departure_date):
+            raise BookingError({"room_number": f"Комната {room.number} уже забронирована на указанные даты."})
+
+        client = upsert_client(**{field: client_data.get(field) for field in ('passport_number',) + CLIENT_FIELDS})
+        total_price = quote_stay(room.type_id, arrival_date, departure_date)
+
+        reservation = Reservation.objects.create(
+            client=client,
+            room=room,
+            admin=admin,
+            booking_date=datetime.now(),
+            arrival_date=arrival_date,
+            departure_date=departure_date,
+            status=status or Reservation._meta.get_field('status').get_default(),
+            payment_status=payment_status or Reservation._meta.get_field('payment_status').get_default(),
+            price_at_booking=total_price,
+            final_price=total_price,
+        )
+
+        apply_event(room, 'BOOK', reservation=reservation, user=admin)
+
+    return reservation, client, room
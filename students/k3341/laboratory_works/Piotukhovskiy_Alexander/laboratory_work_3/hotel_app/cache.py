@@ -0,0 +1,139 @@
+import hashlib
+import inspect
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .pagination import stream_format
+
+# Версия каждой модели хранится в кэше и увеличивается при любом изменении её записей.
+# Версии зависимостей входят в ключ ответа и ETag, поэтому устаревшие записи просто
+# перестают запрашиваться, а опрос без изменений отвечает 304 без обращения к базе.
+TAG_KEY_PREFIX = 'hotel:tag:'
+RESPONSE_KEY_PREFIX = 'hotel:response:'
+
+
+def tag_name(model):
+    return model._meta.label_lower
+
+
+def tag_versions(tags):
+    keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Начальная версия от текущего времени: после очистки кэша или перезапуска
+            # старые ETag клиентов не совпадут с новыми
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_tags(tags):
+    for tag in tags:
+        key = TAG_KEY_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_cached_responses(*models):
+    # Версии увеличиваются после коммита: иначе параллельный запрос успел бы закэшировать
+    # старые данные под новой версией
+    tags = [tag_name(model) for model in models]
+    transaction.on_commit(lambda: bump_tags(tags))
+
+
+def normalized_query(request):
+    params = []
+    for name in sorted(request.query_params):
+        values = sorted(value for value in request.query_params.getlist(name) if value != '')
+        if values:
+            params.append(f"{name}={','.join(values)}")
+    return '&'.join(params)
+
+
+def response_digest(request, tags):
+    versions = tag_versions(tags)
+    return hashlib.sha1(
+        '|'.join([request.get_host(), request.path, normalized_query(request)] + [str(v) for v in versions])
+        .encode()
+    ).hexdigest()
+
+
+def is_not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    return etag in [value.strip() for value in if_none_match.split(',')]
+
+
+def with_cache_headers(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_response(*models):
+    tags = [tag_name(model) for model in models]
+
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            return async_decorator(method)
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            # Потоковые выгрузки не кэшируются: они не помещаются в память целиком
+            if stream_format(request):
+                return method(view, request, *args, **kwargs)
+
+            digest = response_digest(request, tags)
+            etag = f'"{digest}"'
+            if is_not_modified(request, etag):
+                return Response(status=304, headers={'ETag': etag})
+
+            key = RESPONSE_KEY_PREFIX + digest
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = method(view, request, *args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+                cache.set(key, response.data, settings.HOTEL_RESPONSE_CACHE_TIMEOUT)
+
+            return with_cache_headers(response, etag)
+
+        return wrapper
+
+    def async_decorator(method):
+        # То же для асинхронных представлений: обращения к кэшу не блокируют цикл событий
+        @wraps(method)
+        async def wrapper(view, request, *args, **kwargs):
+            if stream_format(request):
+                return await method(view, request, *args, **kwargs)
+
+            digest = await sync_to_async(response_digest)(request, tags)
+            etag = f'"{digest}"'
+            if is_not_modified(request, etag):
+                return Response(status=304, headers={'ETag': etag})
+
+            key = RESPONSE_KEY_PREFIX + digest
+            data = await cache.aget(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = await method(view, request, *args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+                await cache.aset(key, response.data, settings.HOTEL_RESPONSE_CACHE_TIMEOUT)
+
+            return with_cache_headers(response, etag)
+
+        return wrapper
+
+    return decorator
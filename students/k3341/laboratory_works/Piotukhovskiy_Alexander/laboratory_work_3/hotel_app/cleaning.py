@@ -0,0 +1,219 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .cache import invalidate_cached_responses
+from .models import CleaningSchedule, EmploymentContract, Reservation, Room
+
+# Переназначать можно только уборки, которые ещё не начались
+REASSIGNABLE_STATUSES = ['PENDING']
+
+
+class NoActiveContract(ValueError):
+    pass
+
+
+def active_contracts():
+    # {id контракта: id сотрудника} для активных контрактов
+    return dict(EmploymentContract.objects.filter(is_active=True).values_list('id', 'employee_id'))
+
+
+def active_contract(employee_id):
+    return EmploymentContract.objects.filter(employee_id=employee_id, is_active=True).values_list('id', flat=True)
+
+
+def checkouts(room_ids, start_date, end_date):
+    # Дни выезда гостей — дни, когда комнату нужно убрать
+    return Reservation.objects.filter(
+        room_id__in=room_ids,
+        departure_date__gte=start_date,
+        departure_date__lte=end_date,
+    ).exclude(status='CANCELLED').values_list('room_id', 'departure_date').distinct()
+
+
+def checkout_days(room_ids, start_date, end_date):
+    return set(checkouts(room_ids, start_date, end_date))
+
+
+def room_cleanings(room_id, week_day):
+    # Уборщик и его сотрудник читаются тем же запросом, а не отдельным запросом на каждую уборку
+    return CleaningSchedule.objects.filter(
+        room_id=room_id, cleaning_date__week_day=week_day
+    ).select_related('cleaner__employee')
+
+
+def scheduled_cleanings(room_ids, start_date, end_date, dates=None):
+    cleanings = CleaningSchedule.objects.filter(
+        room_id__in=room_ids, cleaning_date__gte=start_date, cleaning_date__lte=end_date
+    )
+    if dates is not None:
+        cleanings = cleanings.filter(cleaning_date__in=dates)
+    return {
+        (room_id, cleaning_date): (cleaning_id, cleaner_id, status)
+        for cleaning_id, room_id, cleaning_date, cleaner_id, status
+        in cleanings.values_list('id', 'room_id', 'cleaning_date', 'cleaner_id', 'status')
+    }
+
+
+class ScheduleDiff:
+    def __init__(self, room_numbers, employees):
+        self.room_numbers = room_numbers
+        self.employees = employees
+        self.to_create = {}
+        self.to_reassign = {}
+        self.conflicts = []
+        self.skipped = []
+        self.unchanged = 0
+        self.cleaners_count = 0
+
+    def entry(self, room_id, cleaning_date, cleaner_id, **extra):
+        return {
+            "room_number": self.room_numbers[room_id],
+            "cleaning_date": cleaning_date,
+            "cleaner_id": self.employees.get(cleaner_id),
+            **extra,
+        }
+
+    def apply(self):
+        # Вставка с пропуском конфликтов по (room, cleaning_date) вместо удаления и повторной вставки:
+        # строки, которые успел занять параллельный запрос, попадают в skipped
+        if not self.to_create and not self.to_reassign:
+            return
+
+        with transaction.atomic():
+            CleaningSchedule.objects.bulk_create(
+                [
+                    CleaningSchedule(room_id=room_id, cleaning_date=cleaning_date, cleaner_id=cleaner_id)
+                    for (room_id, cleaning_date), cleaner_id in self.to_create.items()
+                ],
+                ignore_conflicts=True,
+            )
+            for cleaner_id, cleaning_ids in self.reassignments_by_cleaner().items():
+                CleaningSchedule.objects.filter(
+                    id__in=cleaning_ids, status__in=REASSIGNABLE_STATUSES
+                ).update(cleaner_id=cleaner_id)
+
+            if self.to_create:
+                stored = scheduled_cleanings(
+                    {room_id for room_id, _ in self.to_create},
+                    min(cleaning_date for _, cleaning_date in self.to_create),
+                    max(cleaning_date for _, cleaning_date in self.to_create),
+                )
+                for key, cleaner_id in list(self.to_create.items()):
+                    if stored.get(key, (None, None, None))[1] != cleaner_id:
+                        del self.to_create[key]
+                        self.skipped.append(self.entry(*key, cleaner_id))
+
+            invalidate_cached_responses(CleaningSchedule)
+
+    def reassignments_by_cleaner(self):
+        by_cleaner = defaultdict(list)
+        for cleaning_id, _, cleaner_id in self.to_reassign.values():
+            by_cleaner[cleaner_id].append(cleaning_id)
+        return by_cleaner
+
+    def as_dict(self):
+        return {
+            "created": [self.entry(*key, cleaner_id) for key, cleaner_id in sorted(self.to_create.items())],
+            "reassigned": [
+                self.entry(room_id, cleaning_date, cleaner_id, previous_cleaner_id=self.employees.get(previous_id))
+                for (room_id, cleaning_date), (_, previous_id, cleaner_id) in sorted(self.to_reassign.items())
+            ],
+            "conflicts": self.conflicts,
+            "skipped": self.skipped,
+            "unchanged": self.unchanged,
+        }
+
+
+def plan_cleanings(start_date, end_date, room_numbers=None, employee_ids=None, dry_run=False):
+    # Уборки в дни выезда за период [start_date, end_date], равномерно распределённые между
+    # уборщиками: каждая задача достаётся наименее загруженному в этот день, при равенстве —
+    # наименее загруженному за весь период
+    rooms = Room.objects.all()
+    if room_numbers is not None:
+        rooms = rooms.filter(number__in=room_numbers)
+    room_numbers = dict(rooms.values_list('id', 'number'))
+
+    all_active = active_contracts()
+    cleaners = all_active if employee_ids is None else {
+        contract_id: employee_id for contract_id, employee_id in all_active.items() if employee_id in employee_ids
+    }
+
+    diff = ScheduleDiff(room_numbers, dict(all_active))
+    diff.cleaners_count = len(cleaners)
+    if not cleaners or not room_numbers:
+        return diff
+
+    existing = scheduled_cleanings(room_numbers, start_date, end_date)
+    # Уборки уволенных сотрудников, которые ещё не начались, распределяются заново
+    orphaned = {
+        key for key, (_, cleaner_id, status) in existing.items()
+        if cleaner_id not in all_active and status in REASSIGNABLE_STATUSES
+    }
+    if orphaned:
+        diff.employees.update(EmploymentContract.objects.filter(
+            id__in={existing[key][1] for key in orphaned}
+        ).values_list('id', 'employee_id'))
+    tasks = sorted(checkout_days(room_numbers, start_date, end_date) | orphaned, key=lambda key: (key[1], key[0]))
+
+    daily_load = defaultdict(Counter)
+    total_load = Counter()
+    for (_, cleaning_date), (_, cleaner_id, _) in existing.items():
+        if cleaner_id in cleaners:
+            daily_load[cleaning_date][cleaner_id] += 1
+            total_load[cleaner_id] += 1
+
+    cleaner_ids = sorted(cleaners)
+    for room_id, cleaning_date in tasks:
+        current = existing.get((room_id, cleaning_date))
+        if current is not None and (room_id, cleaning_date) not in orphaned:
+            diff.unchanged += 1
+            continue
+
+        load = daily_load[cleaning_date]
+        cleaner_id = min(cleaner_ids, key=lambda contract_id: (load[contract_id], total_load[contract_id], contract_id))
+        load[cleaner_id] += 1
+        total_load[cleaner_id] += 1
+
+        if current is None:
+            diff.to_create[(room_id, cleaning_date)] = cleaner_id
+        else:
+            diff.to_reassign[(room_id, cleaning_date)] = (current[0], current[1], cleaner_id)
+
+    if not dry_run:
+        diff.apply()
+    return diff
+
+
+def assign_cleanings(employee_id, room_numbers, cleaning_dates):
+    # Ручное назначение уборщика на комнаты и даты: свободные дни создаются, не начатые уборки
+    # других сотрудников переходят к нему, начатые и завершённые остаются как конфликты.
+    # В расписании хранится контракт сотрудника: он ищется и блокируется в той же транзакции, что и запись,
+    # поэтому контракт, завершённый параллельно, даёт NoActiveContract, а не уборки без уборщика
+    with transaction.atomic():
+        contract_id = active_contract(employee_id).select_for_update().first()
+        if contract_id is None:
+            raise NoActiveContract("Указанный служащий не найден или не имеет активного контракта.")
+
+        room_numbers = dict(Room.objects.filter(number__in=room_numbers).values_list('id', 'number'))
+        existing = scheduled_cleanings(room_numbers, min(cleaning_dates), max(cleaning_dates), cleaning_dates)
+        contracts = dict(EmploymentContract.objects.filter(
+            id__in={cleaner_id for _, cleaner_id, _ in existing.values()} | {contract_id}
+        ).values_list('id', 'employee_id'))
+
+        diff = ScheduleDiff(room_numbers, contracts)
+
+        for cleaning_date in sorted(set(cleaning_dates)):
+            for room_id in sorted(room_numbers):
+                current = existing.get((room_id, cleaning_date))
+                if current is None:
+                    diff.to_create[(room_id, cleaning_date)] = contract_id
+                elif current[1] == contract_id:
+                    diff.unchanged += 1
+                elif current[2] in REASSIGNABLE_STATUSES:
+                    diff.to_reassign[(room_id, cleaning_date)] = (current[0], current[1], contract_id)
+                else:
+                    diff.conflicts.append(diff.entry(room_id, cleaning_date, current[1], status=current[2]))
+
+        diff.apply()
+    return diff
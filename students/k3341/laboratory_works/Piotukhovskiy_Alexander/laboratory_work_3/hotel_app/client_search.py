@@ -0,0 +1,112 @@
+import base64
+import binascii
+import json
+
+from django.db import connection
+from django.db.models import Count, Window
+
+from .models import Client, Reservation
+
+CLIENT_FIELDS = ['id', 'passport_number', 'first_name', 'last_name', 'middle_name', 'city_from']
+# Сортировать можно только по обязательным полям: ключ курсора сравнивается без учёта NULL
+CLIENT_ORDERINGS = ['id', 'last_name', 'first_name', 'city_from', 'passport_number']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def filter_clients(room_number=None, start_date=None, end_date=None, city=None):
+    # Условия на комнату и даты относятся к одному бронированию и сводятся в один подзапрос: клиент попадает
+    # в выборку, если хотя бы одно его проживание в этой комнате пересекает период. Подзапрос не коррелирован,
+    # поэтому выборку ведут индексы бронирований, а клиенты читаются по первичному ключу, без прохода по таблице
+    queryset = Client.objects.all()
+
+    stays = Reservation.objects.all()
+    if room_number is not None:
+        stays = stays.filter(room__number=room_number)
+    if start_date:
+        stays = stays.filter(departure_date__gte=start_date)
+    if end_date:
+        stays = stays.filter(arrival_date__lte=end_date)
+    if room_number is not None or start_date or end_date:
+        queryset = queryset.filter(pk__in=stays.values('client_id'))
+
+    if city:
+        queryset = queryset.filter(city_from__icontains=city)
+
+    return queryset
+
+
+def encode_cursor(ordering, direction, row):
+    key = [ordering, direction, row[ordering.lstrip('-')], row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode()).decode()
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        cursor_ordering, direction, value, client_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidCursor("Неверный курсор.")
+    if cursor_ordering != ordering or direction not in ('next', 'previous'):
+        raise InvalidCursor("Курсор относится к другой сортировке.")
+    # Значения курсора подставляются в сравнение ключа сортировки, поэтому их тип должен совпадать с полем
+    if not is_cursor_value(client_id, 'id') or not is_cursor_value(value, ordering.lstrip('-')):
+        raise InvalidCursor("Неверный курсор.")
+    return direction, value, client_id
+
+
+def is_cursor_value(value, field):
+    if field == 'id':
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, str)
+
+
+def client_page_query(queryset, ordering='id', cursor=None, limit=50):
+    # Число совпадений и страница — один запрос: COUNT(*) OVER () считается во внутреннем запросе по всей
+    # отфильтрованной выборке, а условие курсора и LIMIT применяются снаружи, поэтому не влияют на count.
+    # Курсор — ключ сортировки последней (первой) строки страницы, как в keyset-пагинации
+    field = ordering.lstrip('-')
+    direction, value, client_id = cursor or ('next', None, None)
+    scan_descending = ordering.startswith('-') != (direction == 'previous')
+
+    inner, params = queryset.annotate(total=Window(Count('*'))).values(
+        *CLIENT_FIELDS, 'total'
+    ).query.sql_with_params()
+    column = connection.ops.quote_name(field)
+    order = 'DESC' if scan_descending else 'ASC'
+    sql = f"SELECT * FROM ({inner}) clients"
+    params = list(params)
+    if cursor:
+        sql += f" WHERE ({column}, id) {'<' if scan_descending else '>'} (%s, %s)"
+        params += [value, client_id]
+    sql += f" ORDER BY {column} {order}, id {order} LIMIT %s"
+    params.append(limit + 1)
+    return sql, params
+
+
+def search_clients(queryset, ordering='id', cursor=None, limit=50):
+    sql, params = client_page_query(queryset, ordering, cursor, limit)
+    backwards = cursor is not None and cursor[0] == 'previous'
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        columns = [column[0] for column in db_cursor.description]
+        rows = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    # Страница после последней строки выборки пуста, и числа совпадений в ней нет
+    total = rows[0].pop('total') if rows else 0
+    for row in rows[1:]:
+        del row['total']
+
+    next_cursor = previous_cursor = None
+    if rows and (has_more if not backwards else cursor):
+        next_cursor = encode_cursor(ordering, 'next', rows[-1])
+    if rows and (has_more if backwards else cursor):
+        previous_cursor = encode_cursor(ordering, 'previous', rows[0])
+
+    return {"count": total, "next": next_cursor, "previous": previous_cursor, "clients": rows}
@@ -0,0 +1,145 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .cache import invalidate_cached_responses
+from .models import RoomPriceHistory, RoomType
+from .occupancy import occupied_nights
+from .pricing import get_rate_calendars, invalidate_rate_calendar
+
+# Загрузка, при которой ночь продаётся по базовой цене; выше — наценка, ниже — скидка
+TARGET_OCCUPANCY = 0.7
+# Изменение цены на каждую долю ожидаемой загрузки сверх целевой
+OCCUPANCY_WEIGHT = 0.6
+# Ночи ближе этого срока с низкой ожидаемой загрузкой получают скидку последней минуты
+LAST_MINUTE_DAYS = 3
+LAST_MINUTE_OCCUPANCY = 0.5
+LAST_MINUTE_DISCOUNT = 0.9
+MIN_MULTIPLIER = 0.7
+MAX_MULTIPLIER = 1.5
+# Цены округляются до шага: соседние ночи с близким спросом получают одну цену и сливаются в один интервал
+PRICE_STEP = 50
+
+
+def nightly_rate(base_price, occupied, recent, rooms, lead_days, pace_days):
+    # Ожидаемая загрузка — уже проданные номера плюс темп продаж последних pace_days дней,
+    # продолженный на срок, оставшийся до ночи
+    if not rooms:
+        return base_price
+    projected = min(1.0, (occupied + recent * lead_days / pace_days) / rooms)
+    multiplier = 1 + OCCUPANCY_WEIGHT * (projected - TARGET_OCCUPANCY)
+    if lead_days <= LAST_MINUTE_DAYS and projected < LAST_MINUTE_OCCUPANCY:
+        multiplier *= LAST_MINUTE_DISCOUNT
+    multiplier = min(max(multiplier, MIN_MULTIPLIER), MAX_MULTIPLIER)
+    return max(PRICE_STEP, round(base_price * multiplier / PRICE_STEP) * PRICE_STEP)
+
+
+def compact(start_date, prices):
+    # Ночные цены → непересекающиеся интервалы (начало, конец включительно, цена)
+    intervals = []
+    offset = 0
+    for price, nights in groupby(prices):
+        length = len(list(nights))
+        intervals.append((start_date + timedelta(days=offset), start_date + timedelta(days=offset + length - 1), price))
+        offset += length
+    return intervals
+
+
+def diff_prices(start_date, old_prices, new_prices):
+    return [
+        {"start_date": first, "end_date": last, "old_price": old, "new_price": new}
+        for first, last, (old, new) in compact(start_date, list(zip(old_prices, new_prices)))
+        if old != new
+    ]
+
+
+def plan_prices(start_date, days, today, pace_days=14, room_type_ids=None):
+    end_date = start_date + timedelta(days=days - 1)
+    room_types = RoomType.objects.annotate(rooms=Count('room')).order_by('id')
+    if room_type_ids:
+        room_types = room_types.filter(id__in=room_type_ids)
+    room_types = list(room_types)
+    ids = [room_type.id for room_type in room_types]
+
+    # Три запроса на весь горизонт: проданные ночи, ночи, проданные за последние pace_days дней, и цены
+    occupied = occupied_nights(start_date, end_date, ids)
+    recent = occupied_nights(start_date, end_date, ids, booked_since=today - timedelta(days=pace_days))
+    calendars = get_rate_calendars(ids)
+    first_lead = (start_date - today).days
+    nights = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    plans = []
+    for room_type in room_types:
+        calendar = calendars[room_type.id]
+        old_prices = [calendar.total(night, night + timedelta(days=1)) for night in nights]
+        # База задаётся в типе номера; пока её нет, берётся действующая цена первой ночи горизонта
+        base_price = room_type.base_price or old_prices[0]
+        if not base_price:
+            continue
+
+        new_prices = [
+            nightly_rate(base_price, sold, sold_recently, room_type.rooms, first_lead + offset, pace_days)
+            for offset, (sold, sold_recently) in enumerate(zip(occupied[room_type.id], recent[room_type.id]))
+        ]
+        plans.append({
+            "room_type": room_type,
+            "base_price": base_price,
+            "intervals": compact(start_date, new_prices),
+            "changes": diff_prices(start_date, old_prices, new_prices),
+            "changed_nights": sum(old != new for old, new in zip(old_prices, new_prices)),
+        })
+    return plans
+
+
+def replace_price_intervals(room_type_id, start_date, end_date, intervals):
+    # Периоды, пересекающие горизонт, обрезаются по его границам: часть до горизонта остаётся,
+    # часть после него сохраняется отдельной записью, внутренние периоды удаляются.
+    # После этого в горизонте нет других цен, кроме новых интервалов
+    overlapping = RoomPriceHistory.objects.filter(room_type_id=room_type_id, start_date__lte=end_date).filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=start_date)
+    )
+    to_delete = []
+    to_update = []
+    to_create = []
+    for period in overlapping:
+        if period.end_date is None or period.end_date > end_date:
+            tail = RoomPriceHistory(room_type_id=room_type_id, start_date=end_date + timedelta(days=1),
+                                    end_date=period.end_date, price=period.price)
+        else:
+            tail = None
+
+        if period.start_date < start_date:
+            period.end_date = start_date - timedelta(days=1)
+            to_update.append(period)
+            if tail is not None:
+                to_create.append(tail)
+        elif tail is not None:
+            period.start_date = tail.start_date
+            to_update.append(period)
+        else:
+            to_delete.append(period.id)
+
+    RoomPriceHistory.objects.filter(id__in=to_delete).delete()
+    RoomPriceHistory.objects.bulk_update(to_update, ['start_date', 'end_date'])
+    RoomPriceHistory.objects.bulk_create(to_create + [
+        RoomPriceHistory(room_type_id=room_type_id, start_date=first, end_date=last, price=price)
+        for first, last, price in intervals
+    ])
+
+
+def apply_prices(plans, start_date, days):
+    end_date = start_date + timedelta(days=days - 1)
+    with transaction.atomic():
+        for plan in plans:
+            room_type = plan['room_type']
+            if not plan['changes']:
+                continue
+            if room_type.base_price is None:
+                # Фиксируем базу: иначе следующий запуск взял бы за основу уже изменённую цену
+                room_type.base_price = plan['base_price']
+                room_type.save(update_fields=['base_price'])
+            replace_price_intervals(room_type.id, start_date, end_date, plan['intervals'])
+            transaction.on_commit(lambda room_type_id=room_type.id: invalidate_rate_calendar(room_type_id))
+        invalidate_cached_responses(RoomPriceHistory)
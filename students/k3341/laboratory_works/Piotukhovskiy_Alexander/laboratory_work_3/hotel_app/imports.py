@@ -0,0 +1,373 @@
+import csv
+import json
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+
+from .cache import invalidate_cached_responses
+from .models import BLOCKING_RESERVATION_STATUSES, Client, Reservation, Room, RoomType
+from .pricing import quote_stays
+from .room_states import sync_status_log
+from .rollups import rebuild_room_revenue
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+# Сколько ошибок по строкам возвращать в отчёте; остальные только подсчитываются
+MAX_REPORTED_ERRORS = 1000
+CLIENT_FIELDS = ['passport_number', 'first_name', 'last_name', 'middle_name', 'city_from']
+
+
+def detect_format(filename):
+    for suffix, import_format in IMPORT_FORMATS.items():
+        if filename.lower().endswith(suffix):
+            return import_format
+    return None
+
+
+def read_rows(stream, import_format):
+    # Построчное чтение текстового потока; строки нумеруются с 1, заголовок CSV не считается
+    if import_format == 'csv':
+        yield from enumerate(csv.DictReader(stream), start=1)
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            yield row_number, None
+
+
+def text_value(row, field, max_length, required=True):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise ValueError(f"Поле {field} обязательно.")
+        return None
+    if len(value) > max_length:
+        raise ValueError(f"Поле {field} длиннее {max_length} символов.")
+    return value
+
+
+def int_value(row, field, required=True):
+    value = row.get(field)
+    if value is None or str(value).strip() == '':
+        if required:
+            raise ValueError(f"Поле {field} обязательно.")
+        return None
+    try:
+        value = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Поле {field} должно быть целым числом.")
+    if value < 0:
+        raise ValueError(f"Поле {field} не может быть отрицательным.")
+    return value
+
+
+def date_value(row, field, required=True):
+    value = text_value(row, field, 10, required)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Поле {field} должно быть датой в формате YYYY-MM-DD.")
+
+
+def choice_value(row, field, choices, default):
+    value = text_value(row, field, 50, required=False)
+    if value is None:
+        return default
+    if value not in dict(choices):
+        raise ValueError(f"Недопустимое значение поля {field}: {value}.")
+    return value
+
+
+def max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def parse_client(row):
+    return {
+        field: text_value(row, field, max_length(Client, field), required=field != 'middle_name')
+        for field in CLIENT_FIELDS
+    }
+
+
+def upsert_clients(clients):
+    # clients — словари с полями клиента; при повторе паспорта побеждает последняя строка
+    by_passport = {
+        client['passport_number']: {field: client[field] for field in CLIENT_FIELDS} for client in clients
+    }
+    existing = set(
+        Client.objects.filter(passport_number__in=by_passport).values_list('passport_number', flat=True)
+    )
+    Client.objects.bulk_create(
+        [Client(**client) for client in by_passport.values()],
+        update_conflicts=True,
+        unique_fields=['passport_number'],
+        update_fields=CLIENT_FIELDS[1:],
+    )
+    client_ids = dict(Client.objects.filter(passport_number__in=by_passport).values_list('passport_number', 'id'))
+    return len(by_passport) - len(existing), len(existing), client_ids
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "detail": detail})
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+class BaseImporter:
+    # Модели, которые пишет импорт; bulk_create не вызывает сигналы, кэш сбрасывается явно
+    models = ()
+
+    def __init__(self, batch_size=1000, user=None):
+        self.batch_size = batch_size
+        self.user = user
+
+    def parse_row(self, row):
+        raise NotImplementedError
+
+    def import_batch(self, rows):
+        # Возвращает (создано, обновлено, [(номер строки, ошибка), ...])
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def run(self, rows):
+        report = ImportReport()
+        rows = iter(rows)
+
+        while batch := list(islice(rows, self.batch_size)):
+            parsed = []
+            for row_number, row in batch:
+                report.processed += 1
+                try:
+                    if not isinstance(row, dict):
+                        raise ValueError("Строка не является объектом с полями.")
+                    parsed.append((row_number, self.parse_row(row)))
+                except ValueError as error:
+                    report.add_error(row_number, str(error))
+
+            if not parsed:
+                continue
+
+            # Пакет пишется в отдельной транзакции: сбой базы отменяет только его, а не весь импорт
+            try:
+                with transaction.atomic():
+                    created, updated, row_errors = self.import_batch(parsed)
+                    invalidate_cached_responses(*self.models)
+            except DatabaseError as error:
+                for row_number, _ in parsed:
+                    report.add_error(row_number, f"Ошибка базы данных: {error}")
+                continue
+
+            report.created += created
+            report.updated += updated
+            for row_number, detail in row_errors:
+                report.add_error(row_number, detail)
+
+        self.finish()
+        return report
+
+
+class ClientImporter(BaseImporter):
+    models = (Client,)
+
+    def parse_row(self, row):
+        return parse_client(row)
+
+    def import_batch(self, rows):
+        created, updated, _ = upsert_clients(client for _, client in rows)
+        return created, updated, []
+
+
+class RoomImporter(BaseImporter):
+    models = (Room,)
+
+    def __init__(self, batch_size=1000, user=None):
+        super().__init__(batch_size, user)
+        self.room_types = dict(RoomType.objects.values_list('name', 'id'))
+
+    def parse_row(self, row):
+        return {
+            'number': int_value(row, 'number'),
+            'type': text_value(row, 'type', max_length(RoomType, 'name')),
+            'phone': text_value(row, 'phone', max_length(Room, 'phone')),
+            'status': choice_value(row, 'status', Room.STATUS_CHOICES, 'AVAILABLE'),
+        }
+
+    def import_batch(self, rows):
+        errors = []
+        rooms = {}
+        for row_number, room in rows:
+            type_id = self.room_types.get(room['type'])
+            if type_id is None:
+                errors.append((row_number, f"Тип номера {room['type']} не найден."))
+                continue
+            rooms[room['number']] = Room(number=room['number'], type_id=type_id, phone=room['phone'],
+                                         status=room['status'])
+
+        existing = set(Room.objects.filter(number__in=rooms).values_list('number', flat=True))
+        Room.objects.bulk_create(
+            rooms.values(),
+            update_conflicts=True,
+            unique_fields=['number'],
+            update_fields=['type', 'phone', 'status'],
+        )
+        sync_status_log(Room.objects.filter(number__in=rooms), user=self.user)
+        return len(rooms) - len(existing), len(existing), errors
+
+
+class ReservationImporter(BaseImporter):
+    models = (Client, Reservation)
+
+    def __init__(self, batch_size=1000, user=None):
+        super().__init__(batch_size, user)
+        self.rooms = {number: (room_id, type_id) for room_id, number, type_id in
+                      Room.objects.values_list('id', 'number', 'type_id')}
+        # Затронутые периоды по комнатам: bulk_create не вызывает сигналы, витрину доходов
+        # нужно пересчитать после импорта
+        self.touched = {}
+
+    def parse_row(self, row):
+        reservation = parse_client(row)
+        reservation.update({
+            'room_number': int_value(row, 'room_number'),
+            'arrival_date': date_value(row, 'arrival_date'),
+            'departure_date': date_value(row, 'departure_date'),
+            'booking_date': date_value(row, 'booking_date', required=False),
+            'status': choice_value(row, 'status', Reservation.STATUS_CHOICES, 'BOOKED'),
+            'payment_status': choice_value(row, 'payment_status', Reservation.PAYMENT_STATUS_CHOICES, 'UNPAID'),
+            'price_at_booking': int_value(row, 'price_at_booking', required=False),
+            'final_price': int_value(row, 'final_price', required=False),
+        })
+        if reservation['departure_date'] <= reservation['arrival_date']:
+            raise ValueError("Дата выезда должна быть позже даты заселения.")
+        return reservation
+
+    def busy_intervals(self, rows):
+        # Занятые интервалы по комнатам в пределах пакета, отсортированные по дате заезда. Бронирования в базе
+        # могут пересекаться (старые данные, правки через админку), поэтому пересекающиеся интервалы
+        # сливаются: проверке в import_batch нужны непересекающиеся
+        room_ids = {room_id for _, _, (room_id, _) in rows}
+        arrival_date = min(row['arrival_date'] for _, row, _ in rows)
+        departure_date = max(row['departure_date'] for _, row, _ in rows)
+
+        busy = defaultdict(list)
+        for room_id, arrival, departure in Reservation.objects.filter(
+            room_id__in=room_ids,
+            status__in=BLOCKING_RESERVATION_STATUSES,
+            arrival_date__lt=departure_date,
+            departure_date__gt=arrival_date,
+        ).values_list('room_id', 'arrival_date', 'departure_date').order_by('room_id', 'arrival_date'):
+            intervals = busy[room_id]
+            if intervals and intervals[-1][1] > arrival:
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], departure))
+            else:
+                intervals.append((arrival, departure))
+        return busy
+
+    def import_batch(self, rows):
+        errors = []
+        resolved = []
+        for row_number, row in rows:
+            room = self.rooms.get(row['room_number'])
+            if room is None:
+                errors.append((row_number, f"Комната с номером {row['room_number']} не найдена."))
+                continue
+            resolved.append((row_number, row, room))
+
+        if not resolved:
+            return 0, 0, errors
+
+        list(Room.objects.select_for_update().filter(
+            id__in={room_id for _, _, (room_id, _) in resolved}
+        ).values_list('id', flat=True))
+        busy = self.busy_intervals(resolved)
+
+        accepted = []
+        for row_number, row, (room_id, type_id) in resolved:
+            arrival_date, departure_date = row['arrival_date'], row['departure_date']
+            if row['status'] in BLOCKING_RESERVATION_STATUSES:
+                # Занятые интервалы комнаты не пересекаются (см. busy_intervals, а принятые строки ни с чем
+                # не пересекаются), поэтому достаточно проверить ближайший интервал, начинающийся раньше выезда
+                intervals = busy[room_id]
+                position = bisect_left(intervals, (departure_date,))
+                if position and intervals[position - 1][1] > arrival_date:
+                    errors.append((row_number, f"Комната {row['room_number']} уже забронирована на указанные даты."))
+                    continue
+                insort(intervals, (arrival_date, departure_date))
+            accepted.append((row, room_id, type_id))
+
+        if not accepted:
+            return 0, 0, errors
+
+        unpriced = [(type_id, row['arrival_date'], row['departure_date'])
+                    for row, _, type_id in accepted if row['price_at_booking'] is None]
+        prices = iter(quote_stays(unpriced))
+
+        _, _, client_ids = upsert_clients(row for row, _, _ in accepted)
+
+        reservations = []
+        today = date.today()
+        for row, room_id, _ in accepted:
+            price_at_booking = row['price_at_booking']
+            if price_at_booking is None:
+                price_at_booking = next(prices)
+            reservations.append(Reservation(
+                client_id=client_ids[row['passport_number']],
+                room_id=room_id,
+                admin=self.user,
+                booking_date=row['booking_date'] or today,
+                arrival_date=row['arrival_date'],
+                departure_date=row['departure_date'],
+                status=row['status'],
+                payment_status=row['payment_status'],
+                price_at_booking=price_at_booking,
+                final_price=price_at_booking if row['final_price'] is None else row['final_price'],
+            ))
+
+            start, end = self.touched.get(room_id, (row['arrival_date'], row['departure_date']))
+            self.touched[room_id] = (min(start, row['arrival_date']), max(end, row['departure_date']))
+
+        Reservation.objects.bulk_create(reservations, batch_size=self.batch_size)
+        return len(reservations), 0, errors
+
+    def finish(self):
+        for room_id, (start_date, end_date) in self.touched.items():
+            rebuild_room_revenue(room_id, start_date, end_date)
+
+
+IMPORTERS = {
+    'clients': ClientImporter,
+    'rooms': RoomImporter,
+    'reservations': ReservationImporter,
+}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from hotel_app.rollups import backfill_room_revenue
+
+
+class Command(BaseCommand):
+    help = (
+        "Полностью перестраивает витрину DailyRoomRevenue по таблице бронирований. "
+        "Нужен после первичной миграции и после массовых изменений в обход сигналов (bulk_create, update)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Размер пакета чтения и записи.")
+
+    def handle(self, *args, **options):
+        created = backfill_room_revenue(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Витрина перестроена, создано строк: {created}."))
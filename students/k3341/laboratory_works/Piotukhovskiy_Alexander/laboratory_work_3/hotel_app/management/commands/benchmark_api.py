@@ -0,0 +1,77 @@
+import json
+import platform
+from datetime import datetime
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from hotel_app.benchmarks.suite import run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарки представлений и сериализаторов hotel_app на текущей базе: задержка и число SQL-запросов "
+        "каждого сценария. Завершается с ошибкой, если превышен бюджет запросов или медианной задержки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help="Число замеров каждого сценария.")
+        parser.add_argument('--warmup', type=int, default=1, help="Число прогревочных запусков без замера.")
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Не очищать кэш ответов перед замером (измеряется чтение из кэша).")
+        parser.add_argument('--only', action='append', help="Запустить только сценарий с этим названием.")
+        parser.add_argument('--kind', choices=['view', 'serializer'], action='append',
+                            help="Запустить только представления или только сериализаторы.")
+        parser.add_argument('--output', help="Сохранить результаты в JSON-файл.")
+        parser.add_argument('--compare', help="JSON-файл предыдущего запуска для сравнения медиан.")
+        parser.add_argument('--no-assert', action='store_true', help="Не завершаться с ошибкой при превышении бюджетов.")
+
+    def handle(self, *args, **options):
+        if options['rounds'] < 1:
+            raise CommandError("Число замеров должно быть положительным.")
+
+        try:
+            results = run_benchmarks(
+                rounds=options['rounds'], warmup=options['warmup'], warm_cache=options['warm_cache'],
+                names=options['only'], kinds=options['kind'] or ('view', 'serializer'),
+            )
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as stream:
+                previous = {result['name']: result for result in json.load(stream)['results']}
+
+        self.stdout.write(f"{'Сценарий':<40} {'медиана, мс':>12} {'p95, мс':>10} {'запросов':>9} {'изменение':>10}")
+        for result in results:
+            change = ''
+            if result['name'] in previous and previous[result['name']]['median_ms']:
+                ratio = result['median_ms'] / previous[result['name']]['median_ms'] - 1
+                change = f"{ratio:+.0%}"
+                result['previous_median_ms'] = previous[result['name']]['median_ms']
+            line = (f"{result['name']:<40} {result['median_ms']:>12.2f} {result['p95_ms']:>10.2f} "
+                    f"{result['queries']:>9} {change:>10}")
+            self.stdout.write(self.style.ERROR(line) if result['failures'] else line)
+            for failure in result['failures']:
+                self.stdout.write(self.style.ERROR(f"    {failure}"))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump({
+                    'meta': {
+                        'started_at': datetime.now().isoformat(timespec='seconds'),
+                        'database': connection.vendor,
+                        'python': platform.python_version(),
+                        'django': django.get_version(),
+                        'rounds': options['rounds'],
+                        'warm_cache': options['warm_cache'],
+                    },
+                    'results': results,
+                }, stream, ensure_ascii=False, indent=2)
+
+        failed = [result['name'] for result in results if result['failures']]
+        if failed and not options['no_assert']:
+            raise CommandError(f"Превышены бюджеты: {', '.join(failed)}.")
+        self.stdout.write(self.style.SUCCESS(f"Выполнено сценариев: {len(results)}."))
@@ -0,0 +1,56 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from hotel_app.benchmarks.concurrency import compare_servers, dashboard_paths
+from hotel_app.benchmarks.data import BENCHMARK_ADMIN
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность запросов панели администратора (комнаты по статусу, клиенты, "
+        "квартальный отчёт) при обработке через WSGI с пулом потоков и через ASGI в текущем процессе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help="Число запросов для каждого сервера.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Число одновременных запросов.")
+        parser.add_argument('--path', action='append', help="Путь для запросов вместо набора панели (можно несколько).")
+        parser.add_argument('--username', default=BENCHMARK_ADMIN, help="Пользователь, от имени которого идут запросы.")
+        parser.add_argument('--with-cache', action='store_true',
+                            help="Не отключать кэш ответов (по умолчанию измеряются сами представления).")
+        parser.add_argument('--output', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("Число запросов и одновременных запросов должно быть положительным.")
+
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Пользователь {options['username']} не найден: выполните generate_benchmark_data.")
+        token, _ = Token.objects.get_or_create(user=user)
+
+        caches = settings.CACHES
+        if not options['with_cache']:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        # Профилирование измеряло бы себя: замеры и метрики добавляют работу на каждый запрос
+        with override_settings(CACHES=caches, ALLOWED_HOSTS=['127.0.0.1'], HOTEL_PROFILING_ENABLED=False):
+            report = compare_servers(
+                options['path'] or dashboard_paths(), requests=options['requests'],
+                concurrency=options['concurrency'], authorization=f'Token {token.key}',
+            )
+
+        self.stdout.write(f"{'Сервер':<8} {'RPS':>9} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'ошибок':>7}")
+        for server in ('wsgi', 'asgi'):
+            total = report[server]['total']
+            self.stdout.write(f"{server:<8} {total['rps']:>9.1f} {total['p50_ms']:>9.2f} {total['p95_ms']:>9.2f} "
+                              f"{total['p99_ms']:>9.2f} {total['errors']:>7}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
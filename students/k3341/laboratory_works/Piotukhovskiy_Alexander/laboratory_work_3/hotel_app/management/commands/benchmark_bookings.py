@@ -0,0 +1,57 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_app.benchmarks.booking import run_bookings
+from hotel_app.benchmarks.data import BENCHMARK_ADMIN
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет пропускную способность одновременных бронирований через сервис бронирования на текущей базе "
+        "(SQLite или PostgreSQL из DATABASES) и проверяет, что ни одна комната не забронирована дважды. "
+        "Созданные бронирования и клиенты после замера удаляются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200, help="Число бронирований.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Число потоков.")
+        parser.add_argument('--hot-rooms', type=int, default=0,
+                            help="Все бронирования на одни даты в этом числе комнат (конкуренция за блокировку).")
+        parser.add_argument('--username', default=BENCHMARK_ADMIN, help="Администратор, оформляющий бронирования.")
+        parser.add_argument('--keep', action='store_true', help="Не удалять созданные бронирования.")
+        parser.add_argument('--output', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        if options['bookings'] < 1 or options['concurrency'] < 1 or options['hot_rooms'] < 0:
+            raise CommandError("Число бронирований и потоков должно быть положительным.")
+
+        admin = User.objects.filter(username=options['username']).first()
+        if admin is None:
+            raise CommandError(f"Пользователь {options['username']} не найден: выполните generate_benchmark_data.")
+
+        try:
+            report = run_bookings(
+                admin, bookings=options['bookings'], concurrency=options['concurrency'],
+                hot_rooms=options['hot_rooms'], keep=options['keep'],
+            )
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        total = report['total']
+        self.stdout.write(
+            f"{report['vendor']}: {report['booked']} бронирований, {report['rejected']} отказов, "
+            f"{total['errors'] - report['rejected']} ошибок за {report['duration_s']} с — "
+            f"{report['bookings_per_second']} бронирований/с, p50 {total['p50_ms']} мс, p95 {total['p95_ms']} мс, "
+            f"p99 {total['p99_ms']} мс."
+        )
+        for failure, count in report['failures'].items():
+            self.stdout.write(f"  {count} × {failure}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2, default=str)
+
+        if report['double_bookings']:
+            raise CommandError(f"Двойные бронирования: {report['double_bookings']}.")
@@ -0,0 +1,157 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from hotel_app.availability import available_rooms, overlapping_reservations
+from hotel_app.cleaning import active_contract, checkouts, room_cleanings
+from hotel_app.client_search import client_page_query, filter_clients
+from hotel_app.pricing import price_history
+from hotel_app.relations import latest_reservation, rooms_with_pointers
+from hotel_app.rollups import revenue_rows
+from hotel_app.room_states import status_counters
+from hotel_app.stays import overlapping_clients
+
+# Полный проход по таблице (или по всему индексу) в выводе EXPLAIN
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\S+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\S+)'),
+}
+# Производные таблицы SQLite (подзапрос во FROM, оконная функция): их чтение — не проход по таблице базы
+DERIVED_TABLE_PATTERN = re.compile(r'\b(?:CO-ROUTINE|MATERIALIZE) (\S+)')
+
+
+def hot_paths():
+    # (название, queryset или (sql, params), таблицы, полный проход по которым ожидаем, нужен ли PostgreSQL).
+    # Запросы строятся теми же функциями, что и в представлениях, чтобы проверка не расходилась с кодом API
+    arrival = date.today()
+    departure = arrival + timedelta(days=7)
+
+    return [
+        (
+            "Проверка занятости комнаты",
+            overlapping_reservations(arrival, departure).filter(room_id=1),
+            set(), False,
+        ),
+        (
+            "Свободные комнаты на период",
+            available_rooms(arrival, departure),
+            {'hotel_app_room'}, False,
+        ),
+        (
+            "Выезды гостей для плана уборок",
+            checkouts([1], arrival, departure),
+            set(), False,
+        ),
+        (
+            "Комнаты по статусу с текущим клиентом и последней уборкой",
+            rooms_with_pointers(['OCCUPIED']),
+            {'hotel_app_room'}, False,
+        ),
+        (
+            "Число комнат по статусам",
+            status_counters(['OCCUPIED']),
+            set(), False,
+        ),
+        (
+            "Последнее бронирование клиента",
+            latest_reservation(1)[:1],
+            set(), False,
+        ),
+        (
+            "Клиенты, проживавшие в комнате в период",
+            client_page_query(filter_clients(101, arrival, departure)),
+            set(), False,
+        ),
+        (
+            "Пересечения проживаний клиента",
+            overlapping_clients(1),
+            set(), False,
+        ),
+        (
+            "Уборщики комнаты клиента",
+            room_cleanings(1, 2),
+            set(), False,
+        ),
+        (
+            "Активный контракт сотрудника",
+            active_contract(1),
+            set(), False,
+        ),
+        (
+            "История цен типа номера",
+            price_history([1]),
+            set(), False,
+        ),
+        (
+            "Витрина доходов за период",
+            revenue_rows(arrival, departure),
+            set(), False,
+        ),
+        (
+            "Поиск клиентов по городу",
+            client_page_query(filter_clients(city='мос')),
+            set(), True,
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN для запросов горячих путей API и завершается с ошибкой, "
+        "если какой-либо из них читает таблицу целиком вместо поиска по индексу."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Печатать планы всех запросов.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = FULL_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f"Анализ планов для СУБД {vendor} не поддерживается.")
+
+        failures = []
+        for name, queryset, allowed_scans, postgres_only in hot_paths():
+            if postgres_only and vendor != 'postgresql':
+                self.stdout.write(f"- {name}: пропущено, индекс доступен только в PostgreSQL")
+                continue
+
+            plan = self.explain(queryset)
+            full_scans = [table.strip('"') for table in pattern.findall(plan)]
+            derived = set(DERIVED_TABLE_PATTERN.findall(plan))
+            full_scans = [table for table in full_scans if table not in allowed_scans | derived]
+
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+            if full_scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"- {name}: полный проход по {', '.join(full_scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"- {name}: OK"))
+
+        if failures:
+            raise CommandError(f"Полный проход по таблице в запросах: {'; '.join(failures)}.")
+
+    def explain(self, query):
+        # На маленькой тестовой базе PostgreSQL предпочитает последовательное чтение при наличии индекса,
+        # поэтому оно запрещается: если Seq Scan всё равно остался, подходящего индекса нет
+        if connection.vendor != 'postgresql':
+            return self.explain_query(query)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return self.explain_query(query)
+
+    @staticmethod
+    def explain_query(query):
+        if not isinstance(query, tuple):
+            return query.explain()
+        # Запросы, которые представления выполняют курсором (страница поиска клиентов)
+        sql, params = query
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
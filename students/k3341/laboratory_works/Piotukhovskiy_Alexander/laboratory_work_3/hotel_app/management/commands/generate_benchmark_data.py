@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_app.benchmarks.data import generate_dataset
+from hotel_app.models import Room
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет пустую базу детерминированным набором данных для бенчмарков: типы и цены номеров, комнаты, "
+        "клиенты, бронирования за несколько лет, сотрудники и уборки. Одинаковые параметры дают одинаковые данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Масштаб: 1.0 — 40 комнат и 400 клиентов, число бронирований растёт линейно.")
+        parser.add_argument('--years', type=int, default=3, help="Глубина истории бронирований в годах.")
+        parser.add_argument('--seed', type=int, default=0, help="Зерно генератора случайных чисел.")
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help="Опорная дата (YYYY-MM-DD) вместо текущей, чтобы данные не зависели от дня запуска.")
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError("Масштаб должен быть положительным.")
+        if Room.objects.exists():
+            raise CommandError("В базе уже есть комнаты: генератор заполняет только пустую базу.")
+
+        counts = generate_dataset(
+            scale=options['scale'], years=options['years'], seed=options['seed'], today=options['today']
+        )
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS("Набор данных для бенчмарков создан."))
@@ -0,0 +1,57 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_app.imports import IMPORTERS, IMPORT_FORMATS, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Массовый импорт клиентов, комнат или бронирований из CSV/NDJSON. "
+        "Файл читается построчно и записывается пакетами; ошибочные строки попадают в отчёт и не прерывают импорт."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS), help="Что импортируется.")
+        parser.add_argument('path', help="Путь к файлу или '-' для чтения из stdin.")
+        parser.add_argument('--format', choices=sorted(set(IMPORT_FORMATS.values())),
+                            help="Формат файла; по умолчанию определяется по расширению.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Размер пакета записи.")
+        parser.add_argument('--admin', help="Логин администратора, от имени которого создаются бронирования.")
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or detect_format(options['path'])
+        if import_format is None:
+            raise CommandError("Не удалось определить формат файла, укажите --format.")
+        if options['batch_size'] < 1:
+            raise CommandError("Размер пакета должен быть положительным.")
+
+        admin = self.get_admin(options['admin']) if options['kind'] == 'reservations' else None
+        importer = IMPORTERS[options['kind']](batch_size=options['batch_size'], user=admin)
+
+        if options['path'] == '-':
+            report = importer.run(read_rows(sys.stdin, import_format))
+        else:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(read_rows(stream, import_format))
+
+        for error in report.errors:
+            self.stderr.write(f"Строка {error['row']}: {error['detail']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано строк: {report.processed}, создано: {report.created}, "
+            f"обновлено: {report.updated}, с ошибками: {report.failed}."
+        ))
+
+    def get_admin(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {username} не найден.")
+
+        admin = User.objects.filter(is_superuser=True).order_by('id').first()
+        if admin is None:
+            raise CommandError("Нет суперпользователя, укажите администратора через --admin.")
+        return admin
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_app.benchmarks.load import DEFAULT_PATHS, auth_header, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного сервера: несколько потоков по кругу запрашивают адреса API и "
+        "считают p50/p95/p99 задержки, RPS и ошибки по каждому адресу."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Адрес сервера.")
+        parser.add_argument('--path', action='append',
+                            help=f"Путь для запросов (можно несколько). По умолчанию: {', '.join(DEFAULT_PATHS)}.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Число параллельных потоков.")
+        parser.add_argument('--requests', type=int, help="Общее число запросов.")
+        parser.add_argument('--duration', type=float, help="Длительность теста в секундах.")
+        parser.add_argument('--username', help="Логин для Basic-аутентификации. Пароль хешируется сервером "
+                                                 "на каждый запрос, поэтому для замеров API лучше --token.")
+        parser.add_argument('--password', help="Пароль для Basic-аутентификации.")
+        parser.add_argument('--token', help="Токен для Token-аутентификации.")
+        parser.add_argument('--timeout', type=float, default=30, help="Таймаут одного запроса в секундах.")
+        parser.add_argument('--output', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("Число потоков должно быть положительным.")
+
+        report = run_load(
+            options['url'], paths=options['path'], concurrency=options['concurrency'],
+            requests=options['requests'], duration=options['duration'], timeout=options['timeout'],
+            authorization=auth_header(options['username'], options['password'], options['token']),
+        )
+
+        self.stdout.write(f"{'Адрес':<60} {'запросов':>9} {'ошибок':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for url, stats in [*report['targets'].items(), ('Итого', report['total'])]:
+            self.stdout.write(f"{url:<60} {stats['requests']:>9} {stats['errors']:>7} "
+                              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+        self.stdout.write(f"RPS: {report['total']['rps']}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hotel_app.room_states import rebuild_room_states, sync_status_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Проигрывает журнал RoomStatusEvent и сверяет полученные статусы комнат с таблицей комнат. "
+        "С --apply восстанавливает статусы по журналу и пересчитывает счётчики статусов; "
+        "с --sync, наоборот, дописывает в журнал статусы, изменённые в обход него (bulk_create, update)."
+    )
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--apply', action='store_true', help="Записать в комнаты статусы из журнала.")
+        mode.add_argument('--sync', action='store_true', help="Записать текущие статусы комнат в журнал.")
+
+    def handle(self, *args, **options):
+        if options['sync']:
+            with transaction.atomic():
+                logged = sync_status_log()
+            self.stdout.write(self.style.SUCCESS(f"В журнал добавлено событий: {logged}."))
+            return
+
+        with transaction.atomic():
+            report = rebuild_room_states(apply=options['apply'])
+
+        self.stdout.write(
+            f"Комнат: {report['rooms']}, с журналом: {report['logged_rooms']}, "
+            f"расходятся с журналом: {len(report['mismatched'])}, без журнала: {len(report['unlogged'])}, "
+            f"разрывов цепочки: {len(report['gaps'])}."
+        )
+        if options['apply']:
+            self.stdout.write(self.style.SUCCESS("Статусы комнат восстановлены по журналу, счётчики пересчитаны."))
+        elif report['mismatched'] or report['unlogged']:
+            raise CommandError("Статусы комнат расходятся с журналом: выполните с --apply или --sync.")
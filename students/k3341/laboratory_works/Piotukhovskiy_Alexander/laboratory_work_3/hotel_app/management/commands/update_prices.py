@@ -0,0 +1,65 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_app.dynamic_pricing import apply_prices, plan_prices
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает ночные цены каждого типа номера на горизонт вперёд по ожидаемой загрузке: "
+        "уже проданные ночи, темп бронирований за последние дни и срок до заезда. "
+        "Цены записываются в RoomPriceHistory непересекающимися интервалами, заменяя прежние цены горизонта. "
+        "С --dry-run только выводит, какие цены изменились бы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="Первая ночь горизонта (по умолчанию сегодня).")
+        parser.add_argument('--days', type=int, default=365, help="Длина горизонта в ночах.")
+        parser.add_argument('--pace-days', type=int, default=14, help="Окно темпа бронирований в днях.")
+        parser.add_argument('--room-type', type=int, action='append', dest='room_types',
+                            help="Пересчитать только этот тип номера (можно указать несколько раз).")
+        parser.add_argument('--dry-run', action='store_true', help="Ничего не записывать, вывести изменения.")
+        parser.add_argument('--output', help="Сохранить изменения в JSON-файл.")
+
+    def handle(self, *args, **options):
+        today = date.today()
+        start_date = options['start'] or today
+        if start_date < today:
+            raise CommandError("Нельзя менять цены прошедших ночей: --start должен быть не раньше сегодняшнего дня.")
+        if options['days'] < 1 or options['pace_days'] < 1:
+            raise CommandError("--days и --pace-days должны быть положительными.")
+
+        started = time.perf_counter()
+        plans = plan_prices(start_date, options['days'], today, options['pace_days'], options['room_types'])
+        if not options['dry_run']:
+            apply_prices(plans, start_date, options['days'])
+        elapsed = time.perf_counter() - started
+
+        for plan in plans:
+            room_type = plan['room_type']
+            self.stdout.write(
+                f"{room_type.name} (база {plan['base_price']}): изменено ночей {plan['changed_nights']}, "
+                f"интервалов цен {len(plan['intervals'])}."
+            )
+            if options['dry_run']:
+                for change in plan['changes']:
+                    self.stdout.write(
+                        f"  {change['start_date']} — {change['end_date']}: "
+                        f"{change['old_price']} → {change['new_price']}"
+                    )
+
+        if options['output']:
+            report = [
+                {"room_type_id": plan['room_type'].id, "base_price": plan['base_price'], "changes": plan['changes']}
+                for plan in plans
+            ]
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2, default=str)
+
+        verb = "рассчитаны" if options['dry_run'] else "обновлены"
+        self.stdout.write(self.style.SUCCESS(
+            f"Цены {verb} для типов номеров: {len(plans)} за {elapsed:.2f} с."
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status__in', ['BOOKED', 'CONFIRMED', 'CHECKED_IN'])), fields=['room', 'departure_date', 'arrival_date'], name='reservation_room_interval_idx'),
+        ),
+    ]
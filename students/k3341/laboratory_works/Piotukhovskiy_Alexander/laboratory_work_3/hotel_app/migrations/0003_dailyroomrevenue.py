@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0002_reservation_room_interval_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRoomRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('stays', models.PositiveIntegerField(default=0, verbose_name='Бронирований, занимающих ночь')),
+                ('arrivals', models.PositiveIntegerField(default=0, verbose_name='Заездов в этот день')),
+                ('revenue', models.PositiveIntegerField(default=0, verbose_name='Оплаченный доход за ночь')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hotel_app.room', verbose_name='Комната')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'room'), name='daily_room_revenue_date_room_uniq')],
+            },
+        ),
+    ]
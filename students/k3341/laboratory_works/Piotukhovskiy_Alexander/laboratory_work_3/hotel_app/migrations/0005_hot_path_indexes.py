@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0004_reservation_stay_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cleaningschedule',
+            index=models.Index(fields=['room', 'cleaning_date'], name='cleaning_room_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employmentcontract',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['employee'], name='employment_active_contract_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['client', 'departure_date'], name='reservation_client_depart_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'CANCELLED'), _negated=True), fields=['room', 'status'], name='reservation_room_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roompricehistory',
+            index=models.Index(fields=['room_type', 'start_date'], name='price_history_type_start_idx'),
+        ),
+    ]
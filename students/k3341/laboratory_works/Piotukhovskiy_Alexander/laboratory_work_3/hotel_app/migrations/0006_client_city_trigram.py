@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Поиск по городу идёт через city_from__icontains, то есть UPPER(city_from::text) LIKE UPPER('%...%').
+# Такой запрос может использовать только триграммный GIN-индекс по тому же выражению, поэтому
+# индекс создаётся лишь на PostgreSQL; на остальных СУБД миграция ничего не делает.
+
+
+def create_city_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS client_city_trgm_idx "
+        "ON hotel_app_client USING gin ((UPPER(city_from::text)) gin_trgm_ops)"
+    )
+
+
+def drop_city_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS client_city_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_city_trigram_index, drop_city_trigram_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_cleanings(apps, schema_editor):
+    # До ограничения одна комната могла попасть в расписание нескольких уборщиков на один день;
+    # остаётся самая ранняя запись
+    CleaningSchedule = apps.get_model('hotel_app', 'CleaningSchedule')
+    keep_ids = CleaningSchedule.objects.values('room', 'cleaning_date').annotate(keep_id=Min('id')).values('keep_id')
+    CleaningSchedule.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0006_client_city_trigram'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_cleanings, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cleaningschedule',
+            name='cleaning_room_date_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cleaningschedule',
+            constraint=models.UniqueConstraint(fields=('room', 'cleaning_date'), name='cleaning_room_date_uniq'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Журнал начинается с текущего статуса каждой комнаты, счётчики — с их подсчёта
+def seed_room_states(apps, schema_editor):
+    Room = apps.get_model('hotel_app', 'Room')
+    RoomStatusEvent = apps.get_model('hotel_app', 'RoomStatusEvent')
+    RoomStatusCounter = apps.get_model('hotel_app', 'RoomStatusCounter')
+
+    RoomStatusEvent.objects.bulk_create(
+        (RoomStatusEvent(room_id=room_id, event='SYNC', to_status=status)
+         for room_id, status in Room.objects.values_list('id', 'status').iterator()),
+        batch_size=1000,
+    )
+    counts = dict(Room.objects.values_list('status').annotate(count=Count('id')))
+    RoomStatusCounter.objects.bulk_create([
+        RoomStatusCounter(status=status, count=counts.get(status, 0))
+        for status in ['AVAILABLE', 'OCCUPIED', 'REQUIRES_CLEANING', 'CLEANING_IN_PROGRESS', 'MAINTENANCE']
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0007_cleaning_room_date_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('AVAILABLE', 'Свободен'), ('OCCUPIED', 'Занят'), ('REQUIRES_CLEANING', 'Требуется уборка'), ('CLEANING_IN_PROGRESS', 'Уборка в процессе'), ('MAINTENANCE', 'На обслуживании')], max_length=20, unique=True, verbose_name='Статус комнаты')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество комнат')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RoomStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('CREATED', 'Комната добавлена'), ('BOOK', 'Бронирование'), ('RELEASE', 'Отмена или перенос бронирования'), ('CHECK_OUT', 'Выезд гостя'), ('START_CLEANING', 'Начало уборки'), ('FINISH_CLEANING', 'Окончание уборки'), ('START_MAINTENANCE', 'Начало обслуживания'), ('FINISH_MAINTENANCE', 'Окончание обслуживания'), ('MANUAL', 'Изменение администратором'), ('SYNC', 'Синхронизация после пакетной записи')], max_length=18, verbose_name='Событие')),
+                ('from_status', models.CharField(blank=True, choices=[('AVAILABLE', 'Свободен'), ('OCCUPIED', 'Занят'), ('REQUIRES_CLEANING', 'Требуется уборка'), ('CLEANING_IN_PROGRESS', 'Уборка в процессе'), ('MAINTENANCE', 'На обслуживании')], max_length=20, null=True, verbose_name='Предыдущий статус')),
+                ('to_status', models.CharField(choices=[('AVAILABLE', 'Свободен'), ('OCCUPIED', 'Занят'), ('REQUIRES_CLEANING', 'Требуется уборка'), ('CLEANING_IN_PROGRESS', 'Уборка в процессе'), ('MAINTENANCE', 'На обслуживании')], max_length=20, verbose_name='Новый статус')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время события')),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='hotel_app.reservation', verbose_name='Бронирование')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hotel_app.room', verbose_name='Комната')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Администратор')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'id'], name='room_status_event_room_idx')],
+            },
+        ),
+        migrations.RunPython(seed_room_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0008_room_status_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomtype',
+            name='base_price',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Базовая цена за сутки для динамического ценообразования'),
+        ),
+    ]
@@ -22,6 +22,8 @@ class RoomType(models.Model):
     has_bathrobe_slippers = models.BooleanField(default=False, verbose_name='Халат и тапочки')
     has_balcony = models.BooleanField(default=False, verbose_name='Балкон')
 
+    base_price = models.PositiveIntegerField(null=True, blank=True, verbose_name='Базовая цена за сутки для динамического ценообразования')
+
 
 class RoomPriceHistory(models.Model):
     room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, verbose_name='Тип номера')
@@ -29,6 +31,11 @@ class RoomPriceHistory(models.Model):
     end_date = models.DateField(null=True, blank=True, verbose_name='Конец действия цены')
     price = models.PositiveIntegerField(verbose_name='Стоимость за сутки')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_type', 'start_date'], name='price_history_type_start_idx'),
+        ]
+
 
 class Room(models.Model):
     STATUS_CHOICES = [
@@ -53,6 +60,10 @@ class Client(models.Model):
     city_from = models.CharField(max_length=50, verbose_name='Город')
 
 
+# Статусы бронирований, которые занимают номер на время проживания
+BLOCKING_RESERVATION_STATUSES = ['BOOKED', 'CONFIRMED', 'CHECKED_IN']
+
+
 class Reservation(models.Model):
     STATUS_CHOICES = [
         ('BOOKED', 'Забронирован'),
@@ -82,6 +93,69 @@ class Reservation(models.Model):
     price_at_booking = models.PositiveIntegerField(verbose_name='Стоимость при бронировании')
     final_price = models.PositiveIntegerField(verbose_name='Стоимость при бронировании')
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['room', 'departure_date', 'arrival_date'],
+                condition=models.Q(status__in=BLOCKING_RESERVATION_STATUSES),
+                name='reservation_room_interval_idx',
+            ),
+            models.Index(fields=['arrival_date', 'departure_date'], name='reservation_stay_dates_idx'),
+            models.Index(fields=['client', 'arrival_date', 'departure_date'], name='reservation_client_stay_idx'),
+            models.Index(fields=['client', 'departure_date'], name='reservation_client_depart_idx'),
+            models.Index(
+                fields=['room', 'status'],
+                condition=~models.Q(status='CANCELLED'),
+                name='reservation_room_active_idx',
+            ),
+        ]
+
+
+class DailyRoomRevenue(models.Model):
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, verbose_name='Комната')
+    date = models.DateField(verbose_name='Дата')
+    stays = models.PositiveIntegerField(default=0, verbose_name='Бронирований, занимающих ночь')
+    arrivals = models.PositiveIntegerField(default=0, verbose_name='Заездов в этот день')
+    revenue = models.PositiveIntegerField(default=0, verbose_name='Оплаченный доход за ночь')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'room'], name='daily_room_revenue_date_room_uniq'),
+        ]
+
+
+class RoomStatusEvent(models.Model):
+    EVENT_CHOICES = [
+        ('CREATED', 'Комната добавлена'),
+        ('BOOK', 'Бронирование'),
+        ('RELEASE', 'Отмена или перенос бронирования'),
+        ('CHECK_OUT', 'Выезд гостя'),
+        ('START_CLEANING', 'Начало уборки'),
+        ('FINISH_CLEANING', 'Окончание уборки'),
+        ('START_MAINTENANCE', 'Начало обслуживания'),
+        ('FINISH_MAINTENANCE', 'Окончание обслуживания'),
+        ('MANUAL', 'Изменение администратором'),
+        ('SYNC', 'Синхронизация после пакетной записи'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, verbose_name='Комната')
+    event = models.CharField(max_length=len(max(EVENT_CHOICES, key=lambda x: len(x[0]))[0]), choices=EVENT_CHOICES, verbose_name='Событие')
+    from_status = models.CharField(max_length=len(max(Room.STATUS_CHOICES, key=lambda x: len(x[0]))[0]), choices=Room.STATUS_CHOICES, null=True, blank=True, verbose_name='Предыдущий статус')
+    to_status = models.CharField(max_length=len(max(Room.STATUS_CHOICES, key=lambda x: len(x[0]))[0]), choices=Room.STATUS_CHOICES, verbose_name='Новый статус')
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Бронирование')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Администратор')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Время события')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'id'], name='room_status_event_room_idx'),
+        ]
+
+
+class RoomStatusCounter(models.Model):
+    status = models.CharField(max_length=len(max(Room.STATUS_CHOICES, key=lambda x: len(x[0]))[0]), choices=Room.STATUS_CHOICES, unique=True, verbose_name='Статус комнаты')
+    count = models.IntegerField(default=0, verbose_name='Количество комнат')
+
 
 class EmployeePosition(models.Model):
     name = models.CharField(max_length=50, unique=True, verbose_name='Название должности')
@@ -113,6 +187,11 @@ class EmploymentContract(models.Model):
         self.is_active = False
         self.save()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee'], condition=models.Q(is_active=True), name='employment_active_contract_idx'),
+        ]
+
 
 class Employee(models.Model):
     passport_number = models.CharField(max_length=10, unique=True, verbose_name='Номер паспорта')
@@ -132,3 +211,8 @@ class CleaningSchedule(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, verbose_name='Комната')
     cleaning_date = models.DateField(verbose_name='Дата уборки')
     status = models.CharField(max_length=len(max(STATUS_CHOICES, key=lambda x: len(x[0]))[0]), choices=STATUS_CHOICES, default='PENDING', verbose_name='Статус уборки')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'cleaning_date'], name='cleaning_room_date_uniq'),
+        ]
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.db.models import Count
+
+from .models import Reservation, RoomType
+from .rollups import COUNTED_STATUSES
+
+GRANULARITIES = ['day', 'week', 'month']
+
+
+def occupied_nights(start_date, end_date, room_type_ids, booked_since=None):
+    # Занятые номера по ночам периода [start_date, end_date] для каждого типа: заезд — событие +1, выезд — −1.
+    # События всех бронирований ложатся в массив разностей за один проход по выборке, накопленная сумма
+    # даёт число занятых номеров в каждую ночь. Один запрос вместо запроса на каждую ночь
+    days = (end_date - start_date).days + 1
+    deltas = {room_type_id: [0] * (days + 1) for room_type_id in room_type_ids}
+
+    stays = Reservation.objects.filter(
+        status__in=COUNTED_STATUSES,
+        arrival_date__lte=end_date,
+        departure_date__gt=start_date,
+    )
+    if booked_since is not None:
+        stays = stays.filter(booking_date__gte=booked_since)
+    stays = stays.values_list('room__type_id', 'arrival_date', 'departure_date')
+
+    for room_type_id, arrival_date, departure_date in stays.iterator(chunk_size=5000):
+        room_type_deltas = deltas.get(room_type_id)
+        if room_type_deltas is None:
+            continue
+        room_type_deltas[max((arrival_date - start_date).days, 0)] += 1
+        room_type_deltas[min((departure_date - start_date).days, days)] -= 1
+
+    return {room_type_id: list(accumulate(values[:days])) for room_type_id, values in deltas.items()}
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_ranges(start_date, end_date, granularity):
+    # Границы корзин: недели начинаются с понедельника, месяцы — с первого числа; крайние корзины обрезаются
+    # по периоду. Возвращает (начало, конец включительно, индекс первой ночи, число ночей)
+    ranges = []
+    day = start_date
+    while day <= end_date:
+        start = bucket_start(day, granularity)
+        if granularity == 'week':
+            next_start = start + timedelta(days=7)
+        elif granularity == 'month':
+            next_start = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        else:
+            next_start = day + timedelta(days=1)
+        last = min(next_start - timedelta(days=1), end_date)
+        ranges.append((day, last, (day - start_date).days, (last - day).days + 1))
+        day = last + timedelta(days=1)
+    return ranges
+
+
+def summarize_bucket(nights, rooms):
+    occupied = sum(nights)
+    capacity = rooms * len(nights)
+    return {
+        "occupied_room_nights": occupied,
+        "capacity_room_nights": capacity,
+        "occupancy": round(occupied / capacity, 4) if capacity else None,
+        "peak_occupied": max(nights, default=0),
+    }
+
+
+def build_occupancy_report(start_date, end_date, granularity='day'):
+    room_types = list(RoomType.objects.annotate(rooms=Count('room')).order_by('id').values('id', 'name', 'rooms'))
+    curves = occupied_nights(start_date, end_date, [room_type['id'] for room_type in room_types])
+    total_rooms = sum(room_type['rooms'] for room_type in room_types)
+    total_curve = [sum(nights) for nights in zip(*curves.values())] or [0] * ((end_date - start_date).days + 1)
+
+    buckets = []
+    for first_day, last_day, offset, length in bucket_ranges(start_date, end_date, granularity):
+        window = slice(offset, offset + length)
+        buckets.append({
+            "start_date": first_day,
+            "end_date": last_day,
+            "nights": length,
+            **summarize_bucket(total_curve[window], total_rooms),
+            "room_types": [
+                {"room_type_id": room_type['id'], **summarize_bucket(curves[room_type['id']][window], room_type['rooms'])}
+                for room_type in room_types
+            ],
+        })
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "granularity": granularity,
+        "rooms": total_rooms,
+        "room_types": room_types,
+        "buckets": buckets,
+    }
@@ -0,0 +1,99 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+# Значения ?stream=: '1' и 'json' — JSON-массив, 'ndjson' — по одному объекту в строке; остальные
+# (в том числе '0') выгрузку не включают
+STREAM_FORMATS = {'1': 'json', 'json': 'json', 'ndjson': 'ndjson'}
+
+
+class HotelCursorPagination(CursorPagination):
+    # Keyset-пагинация по первичному ключу: глубина страницы не влияет на стоимость запроса
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+def stream_format(request):
+    return STREAM_FORMATS.get(request.query_params.get('stream', '').lower())
+
+
+def encode_items(items, ndjson, first):
+    if ndjson:
+        return ''.join(json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + '\n' for item in items)
+    separator = '' if first else ','
+    return separator + ','.join(json.dumps(item, cls=JSONEncoder, ensure_ascii=False) for item in items)
+
+
+class StreamingListMixin:
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        format_name = stream_format(request)
+        if format_name:
+            queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+            return self.stream_response(queryset, ndjson=format_name == 'ndjson')
+
+        return super().list(request, *args, **kwargs)
+
+    def stream_response(self, queryset, ndjson=False):
+        return self.streaming_response(self.encode_chunks(self.stream_chunks(queryset), ndjson), ndjson)
+
+    def astream_response(self, queryset, ndjson=False):
+        # Для асинхронных представлений: под ASGI синхронный итератор Django сначала читает целиком
+        # в память, асинхронный отдаётся по мере чтения из базы
+        return self.streaming_response(self.aencode_chunks(self.astream_chunks(queryset), ndjson), ndjson)
+
+    @staticmethod
+    def streaming_response(content, ndjson):
+        return StreamingHttpResponse(content, content_type='application/x-ndjson' if ndjson else 'application/json')
+
+    def stream_chunks(self, queryset):
+        chunk = []
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield self.get_serializer(chunk, many=True).data
+                chunk = []
+
+        if chunk:
+            yield self.get_serializer(chunk, many=True).data
+
+    async def astream_chunks(self, queryset):
+        # Сериализатор не должен обращаться к базе: он выполняется в цикле событий
+        chunk = []
+        async for obj in queryset.aiterator(chunk_size=self.stream_chunk_size):
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield self.get_serializer(chunk, many=True).data
+                chunk = []
+
+        if chunk:
+            yield self.get_serializer(chunk, many=True).data
+
+    @staticmethod
+    def encode_chunks(chunks, ndjson):
+        if not ndjson:
+            yield '['
+        first = True
+        for items in chunks:
+            if items:
+                yield encode_items(items, ndjson, first)
+                first = False
+        if not ndjson:
+            yield ']'
+
+    @staticmethod
+    async def aencode_chunks(chunks, ndjson):
+        if not ndjson:
+            yield '['
+        first = True
+        async for items in chunks:
+            if items:
+                yield encode_items(items, ndjson, first)
+                first = False
+        if not ndjson:
+            yield ']'
@@ -0,0 +1,110 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from .models import RoomPriceHistory
+
+# Открытый конец интервала для цены без даты окончания
+OPEN_END = float('inf')
+
+
+class RateCalendar:
+    def __init__(self, price_periods):
+        # Периоды могут пересекаться: как и раньше, для ночи действует период с самой ранней датой начала.
+        # Храним отсортированные непересекающиеся полуинтервалы [start, end) в ординалах дат.
+        self.starts = []
+        self.ends = []
+        self.prices = []
+
+        covered_until = -OPEN_END
+        for start_date, end_date, price in sorted(price_periods, key=lambda period: period[0]):
+            start = max(start_date.toordinal(), covered_until)
+            end = end_date.toordinal() + 1 if end_date is not None else OPEN_END
+            if start >= end:
+                continue
+
+            self.starts.append(start)
+            self.ends.append(end)
+            self.prices.append(price)
+            covered_until = end
+
+        # Префиксные суммы стоимости целых сегментов (бесконечный сегмент может быть только последним)
+        self.totals = [0]
+        for start, end, price in zip(self.starts, self.ends, self.prices):
+            if end != OPEN_END:
+                self.totals.append(self.totals[-1] + (end - start) * price)
+
+    def total(self, arrival_date, departure_date):
+        arrival = arrival_date.toordinal()
+        departure = departure_date.toordinal()
+        if departure <= arrival:
+            return 0
+
+        first = bisect_right(self.ends, arrival)
+        last = bisect_left(self.starts, departure) - 1
+        if first > last:
+            return 0
+
+        if first == last:
+            return self._segment_total(first, arrival, departure)
+
+        return (
+            self._segment_total(first, arrival, departure)
+            + self.totals[last] - self.totals[first + 1]
+            + self._segment_total(last, arrival, departure)
+        )
+
+    def _segment_total(self, index, arrival, departure):
+        nights = min(self.ends[index], departure) - max(self.starts[index], arrival)
+        return int(nights) * self.prices[index]
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def price_history(room_type_ids):
+    return RoomPriceHistory.objects.filter(room_type_id__in=room_type_ids).order_by('start_date', 'id').values_list(
+        'room_type_id', 'start_date', 'end_date', 'price'
+    )
+
+
+def get_rate_calendars(room_type_ids):
+    room_type_ids = set(room_type_ids)
+    with _calendars_lock:
+        calendars = {room_type_id: _calendars[room_type_id] for room_type_id in room_type_ids if room_type_id in _calendars}
+
+    missing = room_type_ids - calendars.keys()
+    if missing:
+        periods = defaultdict(list)
+        for room_type_id, start_date, end_date, price in price_history(missing):
+            periods[room_type_id].append((start_date, end_date, price))
+
+        loaded = {room_type_id: RateCalendar(periods[room_type_id]) for room_type_id in missing}
+        with _calendars_lock:
+            _calendars.update(loaded)
+        calendars.update(loaded)
+
+    return calendars
+
+
+def invalidate_rate_calendar(room_type_id=None):
+    with _calendars_lock:
+        if room_type_id is None:
+            _calendars.clear()
+        else:
+            _calendars.pop(room_type_id, None)
+
+
+def quote_stay(room_type_id, arrival_date, departure_date):
+    return get_rate_calendars([room_type_id])[room_type_id].total(arrival_date, departure_date)
+
+
+def quote_stays(stays):
+    # stays — последовательность кортежей (room_type_id, arrival_date, departure_date)
+    stays = list(stays)
+    calendars = get_rate_calendars(room_type_id for room_type_id, _, _ in stays)
+    return [
+        calendars[room_type_id].total(arrival_date, departure_date)
+        for room_type_id, arrival_date, departure_date in stays
+    ]
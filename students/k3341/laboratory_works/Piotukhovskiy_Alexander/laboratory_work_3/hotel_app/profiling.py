@@ -0,0 +1,278 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# Профиль текущего запроса; вне профилируемого запроса сериализаторы работают без замеров
+current_profile = ContextVar('hotel_profile', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Списки параметров IN (%s, %s, ...) разной длины считаются одним шаблоном запроса
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.render_started = None
+        self.render_time = 0.0
+        self.patterns = Counter()
+        # Запросы асинхронных представлений выполняются параллельно в потоках gather_queries
+        self.lock = threading.Lock()
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.query_time += elapsed
+                self.query_count += 1
+                self.patterns[IN_LIST_RE.sub('(%s)', sql)] += 1
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.patterns.most_common() if count >= threshold]
+
+
+def instrument_serializers():
+    # Время сериализации — это время верхнеуровневого .data: вложенные сериализаторы вызывают
+    # to_representation напрямую, а повторный вход (например, .data внутри SerializerMethodField) не учитывается
+    original = BaseSerializer.data
+    if getattr(original.fget, 'profiled', False):
+        return
+
+    def data(serializer):
+        profile = current_profile.get()
+        if profile is None:
+            return original.fget(serializer)
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original.fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if profile.serializer_depth == 0:
+                profile.serializer_time += time.perf_counter() - started
+
+    data.profiled = True
+    BaseSerializer.data = property(data)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    # Метрики процесса сервера: при нескольких процессах каждый отдаёт свои, их складывает Prometheus
+    HISTOGRAMS = {
+        'hotel_http_request_duration_seconds': ("Время обработки запроса.", DURATION_BUCKETS),
+        'hotel_db_queries_per_request': ("Число SQL-запросов на один HTTP-запрос.", QUERY_BUCKETS),
+        'hotel_response_size_bytes': ("Размер тела ответа.", SIZE_BUCKETS),
+    }
+    COUNTERS = {
+        'hotel_http_requests_total': "Число обработанных запросов.",
+        'hotel_db_query_seconds_total': "Суммарное время SQL-запросов.",
+        'hotel_serializer_seconds_total': "Суммарное время сериализации.",
+        'hotel_render_seconds_total': "Суммарное время рендеринга ответа.",
+        'hotel_duplicate_query_requests_total': "Запросы с повторяющимися SQL-запросами (вероятный N+1).",
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.counters = {name: Counter() for name in self.COUNTERS}
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            series = self.histograms[name]
+            if labels not in series:
+                series[labels] = Histogram(self.HISTOGRAMS[name][1])
+            series[labels].observe(value)
+
+    def increment(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name][labels] += value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, help_text in self.COUNTERS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{format_labels(labels + (("le", format_value(bound)),))} {count}')
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {histogram.total}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {format_value(histogram.sum)}')
+                    lines.append(f'{name}_count{format_labels(labels)} {histogram.total}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    # Шаблон маршрута вместо пути: /hotel/reservation/<int:reservation_id> — одна серия метрик, а не тысячи
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route.replace('^', '').replace('$', '')
+
+
+def server_timing(profile, total):
+    metrics = [
+        f'db;dur={profile.query_time * 1000:.2f};desc="{profile.query_count} queries"',
+        f'serialize;dur={profile.serializer_time * 1000:.2f}',
+        f'render;dur={profile.render_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ]
+    return ', '.join(metrics)
+
+
+class ProfilingMiddleware:
+    # Замеры каждого запроса: общее время, число и время SQL-запросов, время сериализации и рендеринга,
+    # размер ответа. Результат уходит в заголовок Server-Timing и в метрики /metrics.
+    # При HOTEL_PROFILING_ENABLED = False Django исключает middleware из цепочки целиком.
+    # Работает в обоих режимах: под ASGI цепочка остаётся асинхронной и асинхронные представления
+    # не уходят в поток через SyncToAsync
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'HOTEL_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(settings, 'HOTEL_PROFILING_DUPLICATE_THRESHOLD', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Синхронный хук шаблонного ответа Django вызвал бы через поток на каждый ответ DRF
+            self.process_template_response = self.aprocess_template_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        with self.profiling(profile), self.instrument_connections(profile):
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        # Соединения привязаны к потоку: синхронные запросы асинхронного представления (sync_to_async,
+        # асинхронный ORM) выполняются в потоке запроса, поэтому обёртки ставятся и снимаются там
+        profile = RequestProfile()
+        with self.profiling(profile):
+            instrumented = await sync_to_async(self.instrument_connections)(profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(instrumented.close)()
+        return self.finish(request, response, profile)
+
+    @staticmethod
+    @contextmanager
+    def profiling(profile):
+        token = current_profile.set(profile)
+        try:
+            yield
+        finally:
+            current_profile.reset(token)
+
+    @staticmethod
+    def instrument_connections(profile):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile.execute))
+        return stack
+
+    def finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        route = route_name(request)
+        labels = (('method', request.method), ('route', route))
+
+        response['Server-Timing'] = server_timing(profile, total)
+        registry.increment('hotel_http_requests_total', labels + (('status', response.status_code),))
+        registry.observe('hotel_http_request_duration_seconds', labels, total)
+        registry.observe('hotel_db_queries_per_request', labels, profile.query_count)
+        registry.increment('hotel_db_query_seconds_total', labels, profile.query_time)
+        registry.increment('hotel_serializer_seconds_total', labels, profile.serializer_time)
+        registry.increment('hotel_render_seconds_total', labels, profile.render_time)
+        if not response.streaming:
+            registry.observe('hotel_response_size_bytes', labels, len(response.content))
+
+        duplicates = profile.duplicates(self.duplicate_threshold)
+        if duplicates:
+            response['X-Duplicate-Queries'] = str(sum(count for _, count in duplicates))
+            registry.increment('hotel_duplicate_query_requests_total', labels)
+            for sql, count in duplicates:
+                logger.warning("Вероятный N+1 в %s %s: %d одинаковых запросов: %s", request.method, route, count, sql)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся обработчиком после этого вызова; конец рендеринга отмечает post-render callback
+        profile = current_profile.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self.finish_render(profile))
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return ProfilingMiddleware.process_template_response(self, request, response)
+
+    @staticmethod
+    def finish_render(profile):
+        profile.render_time += time.perf_counter() - profile.render_started
+
+
+def metrics_view(request):
+    if not getattr(settings, 'HOTEL_PROFILING_ENABLED', False):
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,83 @@
+from django.db.models import OuterRef, Subquery
+
+from .models import CleaningSchedule, Reservation, Room
+
+# Статусы бронирований, по которым определяется текущий клиент номера
+CURRENT_RESERVATION_STATUSES = ['CONFIRMED', 'CHECKED_IN']
+
+
+def room_pointer_annotations():
+    # Идентификаторы текущего бронирования и последней уборки через коррелированные подзапросы
+    current_reservation = Reservation.objects.filter(
+        room=OuterRef('pk'),
+        status__in=CURRENT_RESERVATION_STATUSES
+    ).order_by('-arrival_date', '-id').values('id')[:1]
+    last_cleaning = CleaningSchedule.objects.filter(
+        room=OuterRef('pk')
+    ).order_by('-cleaning_date', '-id').values('id')[:1]
+
+    return {
+        'current_reservation_id': Subquery(current_reservation),
+        'last_cleaning_id': Subquery(last_cleaning),
+    }
+
+
+def latest_reservation(client_id):
+    return Reservation.objects.filter(client_id=client_id).order_by('-departure_date', '-id')
+
+
+def rooms_with_pointers(statuses=None):
+    rooms = Room.objects.select_related('type').annotate(**room_pointer_annotations())
+    if statuses is not None:
+        rooms = rooms.filter(status__in=statuses)
+    return rooms
+
+
+def split_pointers(pointers):
+    room_pointers = {}
+    reservation_ids = set()
+    cleaning_ids = set()
+    for room_id, status, reservation_id, cleaning_id in pointers:
+        if status == 'AVAILABLE':
+            reservation_id = None
+        room_pointers[room_id] = (reservation_id, cleaning_id)
+        reservation_ids.add(reservation_id)
+        cleaning_ids.add(cleaning_id)
+
+    return room_pointers, reservation_ids - {None}, cleaning_ids - {None}
+
+
+def reservations_by_id(reservation_ids):
+    return {
+        reservation.id: reservation
+        for reservation in Reservation.objects.select_related('client').filter(id__in=reservation_ids)
+    }
+
+
+def cleanings_by_id(cleaning_ids):
+    return {
+        cleaning.id: cleaning
+        for cleaning in CleaningSchedule.objects.select_related('cleaner__employee').filter(id__in=cleaning_ids)
+    }
+
+
+def link_relations(room_pointers, reservations, cleanings):
+    return {
+        room_id: (reservations.get(reservation_id), cleanings.get(cleaning_id))
+        for room_id, (reservation_id, cleaning_id) in room_pointers.items()
+    }
+
+
+def resolve_room_relations(rooms):
+    # Текущее бронирование и последняя уборка для всех комнат страницы за три запроса:
+    # идентификаторы через коррелированные подзапросы, затем сами записи по идентификаторам.
+    rooms = list(rooms)
+    if not rooms:
+        return {}
+
+    pointers = Room.objects.filter(id__in={room.id for room in rooms}).annotate(
+        **room_pointer_annotations()
+    ).values_list('id', 'status', 'current_reservation_id', 'last_cleaning_id')
+
+    room_pointers, reservation_ids, cleaning_ids = split_pointers(pointers)
+    return link_relations(room_pointers, reservations_by_id(reservation_ids), cleanings_by_id(cleaning_ids))
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, When
+
+from .asynchronous import gather_queries
+from .cache import invalidate_cached_responses
+from .models import DailyRoomRevenue, Reservation, Room
+
+# Бронирования, которые учитываются в числе клиентов
+COUNTED_STATUSES = ['BOOKED', 'CONFIRMED', 'CHECKED_IN', 'CHECKED_OUT']
+# Оплаты, которые учитываются в доходе
+PAID_STATUSES = ['PREPAID', 'PAID']
+
+
+def accumulate_reservation(days, reservation, window_start=None, window_end=None):
+    # Раскладывает бронирование по ночам [arrival, departure); стоимость делится поровну,
+    # остаток от деления достаётся первым ночам, чтобы сумма по ночам совпадала с ценой.
+    nights = (reservation.departure_date - reservation.arrival_date).days
+    if nights <= 0:
+        return
+
+    counted = reservation.status in COUNTED_STATUSES
+    paid = reservation.payment_status in PAID_STATUSES
+    if not counted and not paid:
+        return
+
+    nightly_price, remainder = divmod(reservation.price_at_booking, nights)
+    first_night = 0 if window_start is None else max(0, (window_start - reservation.arrival_date).days)
+    last_night = nights if window_end is None else min(nights, (window_end - reservation.arrival_date).days)
+
+    for night in range(first_night, last_night):
+        totals = days[reservation.arrival_date + timedelta(days=night)]
+        if counted:
+            totals[0] += 1
+            if night == 0:
+                totals[1] += 1
+        if paid:
+            totals[2] += nightly_price + (1 if night < remainder else 0)
+
+
+def daily_rows(room_id, days):
+    return [
+        DailyRoomRevenue(room_id=room_id, date=day, stays=stays, arrivals=arrivals, revenue=revenue)
+        for day, (stays, arrivals, revenue) in sorted(days.items())
+        if stays or revenue
+    ]
+
+
+def rebuild_room_revenue(room_id, start_date, end_date):
+    # Пересчитывает срез витрины для одной комнаты на ночах [start_date, end_date)
+    if end_date <= start_date:
+        return
+
+    reservations = Reservation.objects.filter(
+        room_id=room_id,
+        arrival_date__lt=end_date,
+        departure_date__gt=start_date,
+    ).only('arrival_date', 'departure_date', 'status', 'payment_status', 'price_at_booking')
+
+    days = defaultdict(lambda: [0, 0, 0])
+    for reservation in reservations:
+        accumulate_reservation(days, reservation, start_date, end_date)
+
+    with transaction.atomic():
+        DailyRoomRevenue.objects.filter(room_id=room_id, date__gte=start_date, date__lt=end_date).delete()
+        DailyRoomRevenue.objects.bulk_create(daily_rows(room_id, days))
+        invalidate_cached_responses(DailyRoomRevenue)
+
+
+def refresh_reservation_revenue(previous_stay, current_stay):
+    # previous_stay и current_stay — кортежи (room_id, arrival_date, departure_date) или None
+    stays = [stay for stay in (previous_stay, current_stay) if stay is not None]
+    if len(stays) == 2 and stays[0][0] == stays[1][0]:
+        room_id = stays[0][0]
+        stays = [(room_id, min(stays[0][1], stays[1][1]), max(stays[0][2], stays[1][2]))]
+
+    for room_id, arrival_date, departure_date in stays:
+        rebuild_room_revenue(room_id, arrival_date, departure_date)
+
+
+def backfill_room_revenue(batch_size=1000):
+    # Полная перестройка витрины за один проход по бронированиям, отсортированным по комнате
+    reservations = Reservation.objects.order_by('room_id').only(
+        'room_id', 'arrival_date', 'departure_date', 'status', 'payment_status', 'price_at_booking'
+    )
+
+    created = 0
+    with transaction.atomic():
+        DailyRoomRevenue.objects.all().delete()
+
+        room_id = None
+        days = defaultdict(lambda: [0, 0, 0])
+        for reservation in reservations.iterator(chunk_size=batch_size):
+            if reservation.room_id != room_id:
+                created += len(DailyRoomRevenue.objects.bulk_create(daily_rows(room_id, days), batch_size=batch_size))
+                room_id = reservation.room_id
+                days = defaultdict(lambda: [0, 0, 0])
+            accumulate_reservation(days, reservation)
+
+        created += len(DailyRoomRevenue.objects.bulk_create(daily_rows(room_id, days), batch_size=batch_size))
+        invalidate_cached_responses(DailyRoomRevenue)
+
+    return created
+
+
+def revenue_rows(start_date, end_date):
+    # Отчёт за период [start_date, end_date] включительно за один проход по витрине
+    return (
+        DailyRoomRevenue.objects.filter(date__gte=start_date, date__lte=end_date)
+        .values('room__number')
+        .annotate(
+            # Заезды внутри периода плюс проживания, начавшиеся до него и продолжающиеся в первый день
+            client_count=Sum('arrivals') + Sum(
+                Case(When(date=start_date, then=F('stays') - F('arrivals')), default=0)
+            ),
+            total_income=Sum('revenue'),
+        )
+        .order_by('room__number')
+    )
+
+
+def revenue_per_room(start_date, end_date):
+    return list(revenue_rows(start_date, end_date))
+
+
+def rooms_per_floor():
+    # Этаж — номер комнаты без двух последних цифр (1205 -> 12)
+    return list(
+        Room.objects.annotate(floor=F('number') / 100)
+        .values('floor')
+        .annotate(room_count=Count('id'))
+        .order_by('floor')
+    )
+
+
+def revenue_report(per_room, floors, start_date, end_date):
+    clients_per_room = []
+    income_per_room = []
+    total_income = 0
+    for row in per_room:
+        if row['client_count']:
+            clients_per_room.append({"room__number": row['room__number'], "client_count": row['client_count']})
+        if row['total_income']:
+            income_per_room.append({"room__number": row['room__number'], "total_income": row['total_income']})
+            total_income += row['total_income']
+
+    return {
+        "clients_per_room": clients_per_room,
+        "rooms_per_floor": floors,
+        "income_per_room": income_per_room,
+        "total_income": total_income,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def build_revenue_report(start_date, end_date):
+    return revenue_report(revenue_per_room(start_date, end_date), rooms_per_floor(), start_date, end_date)
+
+
+async def abuild_revenue_report(start_date, end_date):
+    # Выручка по комнатам и комнаты по этажам не зависят друг от друга и запрашиваются параллельно
+    per_room, floors = await gather_queries(partial(revenue_per_room, start_date, end_date), rooms_per_floor)
+    return revenue_report(per_room, floors, start_date, end_date)
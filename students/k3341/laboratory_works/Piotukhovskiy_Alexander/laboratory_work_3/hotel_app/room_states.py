@@ -0,0 +1,159 @@
+from collections import Counter
+
+from django.db.models import Case, F, OuterRef, Subquery, When
+
+from .cache import invalidate_cached_responses
+from .models import Room, RoomStatusCounter, RoomStatusEvent
+
+ROOM_STATUSES = [status for status, _ in Room.STATUS_CHOICES]
+
+# Событие жизненного цикла: (статусы, из которых оно допустимо, статус после него)
+ROOM_EVENTS = {
+    'BOOK': ({'AVAILABLE', 'REQUIRES_CLEANING', 'CLEANING_IN_PROGRESS'}, 'OCCUPIED'),
+    'RELEASE': ({'OCCUPIED'}, 'AVAILABLE'),
+    'CHECK_OUT': ({'OCCUPIED'}, 'REQUIRES_CLEANING'),
+    'START_CLEANING': ({'REQUIRES_CLEANING'}, 'CLEANING_IN_PROGRESS'),
+    'FINISH_CLEANING': ({'REQUIRES_CLEANING', 'CLEANING_IN_PROGRESS'}, 'AVAILABLE'),
+    'START_MAINTENANCE': ({'AVAILABLE', 'REQUIRES_CLEANING', 'CLEANING_IN_PROGRESS'}, 'MAINTENANCE'),
+    'FINISH_MAINTENANCE': ({'MAINTENANCE'}, 'REQUIRES_CLEANING'),
+}
+
+# Ручная смена статуса администратором допустима, если её можно выразить одним событием
+ALLOWED_TRANSITIONS = {
+    status: {target for sources, target in ROOM_EVENTS.values() if status in sources}
+    for status in ROOM_STATUSES
+}
+
+
+class RoomTransitionError(Exception):
+    def __init__(self, room, event):
+        self.room = room
+        self.event = event
+        super().__init__(
+            f"Комната {room.number}: событие {event} недопустимо в статусе {room.get_status_display().lower()}."
+        )
+
+
+def can_apply(status, event):
+    sources, target = ROOM_EVENTS[event]
+    return status == target or status in sources
+
+
+def apply_event(room, event, reservation=None, user=None, strict=True):
+    # room должна быть заблокирована (lock_room) и прочитана в текущей транзакции: статус берётся из неё.
+    # Запись в журнал и счётчики выполняет сигнал post_save комнаты в той же транзакции
+    sources, target = ROOM_EVENTS[event]
+    if room.status == target:
+        return False
+    if room.status not in sources:
+        if strict:
+            raise RoomTransitionError(room, event)
+        return False
+
+    room._status_change = (room.status, event, reservation, user)
+    room.status = target
+    room.save(update_fields=['status'])
+    return True
+
+
+def record_status_change(room, from_status, event, reservation=None, user=None):
+    RoomStatusEvent.objects.create(
+        room=room, event=event, from_status=from_status, to_status=room.status, reservation=reservation, user=user
+    )
+    adjust_counters(from_status, room.status)
+
+
+def adjust_counters(from_status, to_status, rooms=1):
+    # Обе строки счётчиков меняются одним UPDATE; строка блокируется до конца транзакции,
+    # поэтому параллельные смены статуса не теряют приращений
+    changes = Counter()
+    if to_status is not None:
+        changes[to_status] += rooms
+    if from_status is not None:
+        changes[from_status] -= rooms
+    RoomStatusCounter.objects.filter(status__in=list(changes)).update(count=Case(
+        *(When(status=status, then=F('count') + delta) for status, delta in changes.items()),
+        default=F('count'),
+    ))
+
+
+def status_counters(statuses=None):
+    counters = RoomStatusCounter.objects.all()
+    if statuses is not None:
+        counters = counters.filter(status__in=statuses)
+    return counters.values_list('status', 'count')
+
+
+def status_counts(statuses=None):
+    return dict(status_counters(statuses))
+
+
+def rebuild_counters():
+    counts = Counter(Room.objects.values_list('status', flat=True).iterator())
+    RoomStatusCounter.objects.bulk_create(
+        [RoomStatusCounter(status=status, count=counts[status]) for status in ROOM_STATUSES],
+        update_conflicts=True,
+        unique_fields=['status'],
+        update_fields=['count'],
+    )
+    return {status: counts[status] for status in ROOM_STATUSES}
+
+
+def last_logged_status():
+    return Subquery(
+        RoomStatusEvent.objects.filter(room=OuterRef('pk')).order_by('-id').values('to_status')[:1]
+    )
+
+
+def sync_status_log(rooms=None, user=None):
+    # Пакетные записи (импорт, генератор данных) обходят сигналы: статусы, расходящиеся с журналом,
+    # записываются событием SYNC, а счётчики пересчитываются целиком
+    rooms = Room.objects.all() if rooms is None else rooms
+    changes = [
+        RoomStatusEvent(room_id=room_id, event='SYNC', from_status=logged, to_status=status, user=user)
+        for room_id, status, logged in rooms.annotate(logged_status=last_logged_status()).values_list(
+            'id', 'status', 'logged_status'
+        ).iterator()
+        if status != logged
+    ]
+    RoomStatusEvent.objects.bulk_create(changes, batch_size=1000)
+    rebuild_counters()
+    invalidate_cached_responses(Room)
+    return len(changes)
+
+
+def replay_status_log():
+    # Состояние каждой комнаты — последний статус её журнала. Разрывы цепочки (предыдущий статус события
+    # не совпадает с итогом прошлого) возвращаются отдельно: их оставила запись в обход журнала
+    statuses = {}
+    gaps = []
+    events = RoomStatusEvent.objects.order_by('room_id', 'id').values_list('id', 'room_id', 'from_status', 'to_status')
+    for event_id, room_id, from_status, to_status in events.iterator(chunk_size=2000):
+        previous = statuses.get(room_id)
+        if previous is not None and from_status != previous:
+            gaps.append(event_id)
+        statuses[room_id] = to_status
+    return statuses, gaps
+
+
+def rebuild_room_states(apply=False):
+    statuses, gaps = replay_status_log()
+    current = dict(Room.objects.values_list('id', 'status').iterator())
+    mismatched = {room_id: status for room_id, status in statuses.items() if current.get(room_id, status) != status}
+    unlogged = sorted(current.keys() - statuses.keys())
+
+    if apply:
+        for status in set(mismatched.values()):
+            Room.objects.filter(id__in=[room_id for room_id, value in mismatched.items() if value == status]).update(
+                status=status
+            )
+        rebuild_counters()
+        invalidate_cached_responses(Room)
+
+    return {
+        'rooms': len(current),
+        'logged_rooms': len(statuses),
+        'mismatched': mismatched,
+        'unlogged': unlogged,
+        'gaps': gaps,
+    }
@@ -1,9 +1,16 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 from rest_framework import serializers
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from django.contrib.auth.models import User
-from .models import Client, Room, Employee, EmploymentContract, EmployeePosition, Reservation, CleaningSchedule
+from .models import Client, Room, Employee, EmploymentContract, EmployeePosition, Reservation, CleaningSchedule, \
+    RoomType
+from .client_search import CLIENT_ORDERINGS, InvalidCursor, decode_cursor
+from .imports import detect_format
+from .occupancy import GRANULARITIES
+from .pagination import HotelCursorPagination
+from .relations import resolve_room_relations
+from .room_states import ALLOWED_TRANSITIONS
 
 
 class CustomUserSerializer(UserSerializer):
@@ -26,6 +33,15 @@ class ClientSerializer(serializers.ModelSerializer):
         fields = ['id', 'passport_number', 'first_name', 'last_name', 'middle_name', 'city_from']
 
 
+class RoomListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        rooms = list(data.all() if hasattr(data, 'all') else data)
+        # Связи, заранее переданные в context (асинхронное представление комнат), повторно не запрашиваются
+        room_relations = self.context.setdefault('room_relations', {})
+        room_relations.update(resolve_room_relations([room for room in rooms if room.id not in room_relations]))
+        return super().to_representation(rooms)
+
+
 class RoomSerializer(serializers.ModelSerializer):
     type_id = serializers.IntegerField(source='type.id', read_only=True)
     type_name = serializers.CharField(source='type.name', read_only=True)
@@ -35,21 +51,33 @@ class RoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = ['id', 'number', 'type_id', 'type_name', 'phone', 'status', 'current_client', 'last_cleaner']
+        list_serializer_class = RoomListSerializer
+
+    def validate_status(self, value):
+        if self.instance is not None and value != self.instance.status \
+                and value not in ALLOWED_TRANSITIONS[self.instance.status]:
+            raise serializers.ValidationError(
+                f"Недопустимая смена статуса комнаты: {self.instance.status} → {value}."
+            )
+        return value
+
+    def get_room_relations(self, obj):
+        room_relations = self.context.setdefault('room_relations', {})
+        if obj.id not in room_relations:
+            room_relations.update(resolve_room_relations([obj]))
+        return room_relations.get(obj.id, (None, None))
 
     def get_current_client(self, obj):
         if obj.status == 'AVAILABLE':
             return None
 
-        reservation = Reservation.objects.filter(
-            room=obj,
-            status__in=['CONFIRMED', 'CHECKED_IN']
-        ).order_by('-arrival_date').first()
+        reservation, _ = self.get_room_relations(obj)
 
         if reservation:
             return ClientSerializer(reservation.client).data
 
     def get_last_cleaner(self, obj):
-        last_cleaning = CleaningSchedule.objects.order_by('-cleaning_date').first()
+        _, last_cleaning = self.get_room_relations(obj)
 
         if last_cleaning:
             cleaner = last_cleaning.cleaner.employee
@@ -79,6 +107,52 @@ class ClientStayOverlapSerializer(serializers.Serializer):
         return data
 
 
+class ClientSearchSerializer(serializers.Serializer):
+    room = serializers.IntegerField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    city = serializers.CharField(required=False, allow_blank=True)
+    ordering = serializers.ChoiceField(
+        choices=CLIENT_ORDERINGS + [f'-{field}' for field in CLIENT_ORDERINGS], default='id'
+    )
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(
+        min_value=1, max_value=HotelCursorPagination.max_page_size, default=HotelCursorPagination.page_size
+    )
+
+    def validate(self, data):
+        start_date = data.get('start_date', None)
+        end_date = data.get('end_date', None)
+
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("Дата окончания не может быть раньше даты начала.")
+
+        if data.get('cursor'):
+            try:
+                data['cursor'] = decode_cursor(data['cursor'], data['ordering'])
+            except InvalidCursor as error:
+                raise serializers.ValidationError({"cursor": str(error)})
+
+        return data
+
+
+class BatchClientStayOverlapSerializer(serializers.Serializer):
+    client_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=500
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        start_date = data.get('start_date', None)
+        end_date = data.get('end_date', None)
+
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("Дата окончания не может быть раньше даты начала.")
+
+        return data
+
+
 class CleaningEmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
@@ -245,6 +319,23 @@ class UpdateCleaningScheduleSerializer(serializers.Serializer):
         return value
 
 
+class PlanCleaningScheduleSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+    room_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    cleaner_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("Дата окончания не может быть раньше даты начала.")
+
+        if (data['end_date'] - data['start_date']).days > 92:
+            raise serializers.ValidationError("Период планирования не может быть длиннее 92 дней.")
+
+        return data
+
+
 class CreateReservationSerializer(serializers.Serializer):
     passport_number = serializers.CharField(max_length=10, required=True)
     first_name = serializers.CharField(max_length=50, required=True)
@@ -258,22 +349,9 @@ class CreateReservationSerializer(serializers.Serializer):
     payment_status = serializers.ChoiceField(choices=Reservation.PAYMENT_STATUS_CHOICES, required=False)
 
     def validate(self, data):
-        room_number = data['room_number']
-        arrival_date = data['arrival_date']
-        departure_date = data['departure_date']
-
-        try:
-            room = Room.objects.get(number=room_number)
-        except Room.DoesNotExist:
-            raise serializers.ValidationError({"room_number": f"Комната с номером {room_number} не найдена."})
-
-        if room.status != 'AVAILABLE':
-            raise serializers.ValidationError({"room_number": "Комната недоступна для заселения."})
-
-        if departure_date <= arrival_date:
+        # Комната проверяется в book_stay тем же запросом, которым блокируется
+        if data['departure_date'] <= data['arrival_date']:
             raise serializers.ValidationError({"departure_date": "Дата выезда должна быть позже даты заселения."})
-
-        data['room'] = room
         return data
 
 
@@ -295,12 +373,7 @@ class UpdateReservationSerializer(serializers.Serializer):
 
         if 'room_number' in data:
             try:
-                room = Room.objects.get(number=data['room_number'])
-                if room.status != 'AVAILABLE':
-                    raise serializers.ValidationError(
-                        {"room_number": f"Комната {data['room_number']} недоступна для бронирования."}
-                    )
-                data['room'] = room
+                data['room'] = Room.objects.get(number=data['room_number'])
             except Room.DoesNotExist:
                 raise serializers.ValidationError(
                     {"room_number": f"Комната с номером {data['room_number']} не найдена."}
@@ -309,6 +382,51 @@ class UpdateReservationSerializer(serializers.Serializer):
         return data
 
 
+class RoomAvailabilitySerializer(serializers.Serializer):
+    type = serializers.IntegerField(required=False)
+
+    def get_fields(self):
+        # 'from' — зарезервированное слово, поэтому поля периода объявляются здесь
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField(required=True)
+        fields['to'] = serializers.DateField(required=True)
+        return fields
+
+    def validate(self, data):
+        if data['to'] <= data['from']:
+            raise serializers.ValidationError({"to": "Дата выезда должна быть позже даты заселения."})
+
+        return data
+
+
+class StayQuoteSerializer(serializers.Serializer):
+    room_type_id = serializers.IntegerField(required=True)
+    arrival_date = serializers.DateField(required=True)
+    departure_date = serializers.DateField(required=True)
+
+    def validate(self, data):
+        if data['departure_date'] <= data['arrival_date']:
+            raise serializers.ValidationError({"departure_date": "Дата выезда должна быть позже даты заселения."})
+
+        return data
+
+
+class BatchStayQuoteSerializer(serializers.Serializer):
+    stays = StayQuoteSerializer(many=True, allow_empty=False)
+
+    def validate_stays(self, value):
+        room_type_ids = {stay['room_type_id'] for stay in value}
+        existing_ids = set(RoomType.objects.filter(id__in=room_type_ids).values_list('id', flat=True))
+        missing_ids = sorted(room_type_ids - existing_ids)
+
+        if missing_ids:
+            raise serializers.ValidationError(
+                f"Следующие типы номеров не найдены: {', '.join(map(str, missing_ids))}."
+            )
+
+        return value
+
+
 class QuarterlyReportSerializer(serializers.Serializer):
     quarter = serializers.IntegerField(min_value=1, max_value=4, required=True)
     year = serializers.IntegerField(required=True)
@@ -329,12 +447,89 @@ class QuarterlyReportSerializer(serializers.Serializer):
         return data
 
 
+class MonthlyReportSerializer(serializers.Serializer):
+    month = serializers.IntegerField(min_value=1, max_value=12, required=True)
+    year = serializers.IntegerField(required=True)
+
+    def validate(self, data):
+        month = data['month']
+        year = data['year']
+        now = datetime.now()
+
+        if year > now.year:
+            raise serializers.ValidationError("Год не может быть в будущем.")
+
+        if year == now.year and month > now.month:
+            raise serializers.ValidationError(f"Нельзя запросить месяц {month}, так как он ещё не наступил.")
+
+        return data
+
+
+class RangeReportSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("Дата окончания не может быть раньше даты начала.")
+
+        return data
+
+
+class OccupancyReportSerializer(serializers.Serializer):
+    MAX_DAYS = 731
+
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField(required=False)
+        fields['to'] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, data):
+        # По умолчанию — прогноз на год вперёд от сегодняшнего дня
+        data['from'] = data.get('from') or date.today()
+        data['to'] = data.get('to') or data['from'] + timedelta(days=364)
+
+        if data['to'] < data['from']:
+            raise serializers.ValidationError({"to": "Дата окончания не может быть раньше даты начала."})
+        if (data['to'] - data['from']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({"to": f"Период не может быть длиннее {self.MAX_DAYS} дней."})
+
+        return data
+
+
+class ImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(required=True)
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+
+    def validate(self, data):
+        if 'format' not in data:
+            import_format = detect_format(data['file'].name)
+            if import_format is None:
+                raise serializers.ValidationError({"format": "Не удалось определить формат файла, укажите format."})
+            data['format'] = import_format
+
+        return data
+
+
+class ReservationListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        reservations = list(data.all() if hasattr(data, 'all') else data)
+        rooms = {reservation.room_id: reservation.room for reservation in reservations}.values()
+        self.context.setdefault('room_relations', {}).update(resolve_room_relations(rooms))
+        return super().to_representation(reservations)
+
+
 class ReservationSerializer(serializers.ModelSerializer):
     client = ClientSerializer(read_only=True)
     room = RoomSerializer(read_only=True)
 
     class Meta:
         model = Reservation
+        list_serializer_class = ReservationListSerializer
         fields = [
             'id',
             'client',
@@ -368,7 +563,13 @@ class EmployeeSerializer(serializers.ModelSerializer):
         ]
 
     def get_position(self, obj):
-        active_contract = EmploymentContract.objects.filter(employee=obj, is_active=True).first()
+        # active_contracts заполняет Prefetch в EmployeeViewSet; без него контракт читается отдельным запросом
+        if hasattr(obj, 'active_contracts'):
+            active_contract = obj.active_contracts[0] if obj.active_contracts else None
+        else:
+            active_contract = EmploymentContract.objects.filter(
+                employee=obj, is_active=True
+            ).select_related('position').first()
         if active_contract and active_contract.position:
             return {
                 'id': active_contract.position.id,
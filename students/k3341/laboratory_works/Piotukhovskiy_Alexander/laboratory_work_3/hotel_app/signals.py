@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_cached_responses
+from .models import CleaningSchedule, Client, Employee, EmployeePosition, EmploymentContract, Reservation, Room, \
+    RoomPriceHistory, RoomType
+from .pricing import invalidate_rate_calendar
+from .room_states import adjust_counters, record_status_change
+from .rollups import refresh_reservation_revenue
+
+# Модели, изменения которых сбрасывают закэшированные ответы API. Обработчики подключаются
+# к каждой модели отдельно: глобальный обработчик отключил бы быстрое удаление у всех остальных
+CACHED_MODELS = [RoomType, Room, RoomPriceHistory, Client, Reservation, CleaningSchedule, Employee,
+                 EmployeePosition, EmploymentContract]
+
+
+@receiver(pre_save, sender=RoomPriceHistory)
+def remember_price_room_type(sender, instance, raw=False, **kwargs):
+    instance._previous_room_type_id = None
+    if instance.pk and not raw:
+        instance._previous_room_type_id = RoomPriceHistory.objects.filter(pk=instance.pk).values_list(
+            'room_type_id', flat=True
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=RoomPriceHistory)
+def reset_rate_calendar(sender, instance, **kwargs):
+    # Календарь сбрасывается сразу — для чтений в этой же транзакции — и ещё раз после коммита: иначе
+    # параллельный запрос, загрузивший цены до коммита, оставил бы в кэше старые. При переносе периода
+    # на другой тип номера сбрасываются календари обоих типов
+    room_type_ids = {instance.room_type_id, getattr(instance, '_previous_room_type_id', None)} - {None}
+
+    def invalidate():
+        for room_type_id in room_type_ids:
+            invalidate_rate_calendar(room_type_id)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_reservation_stay(sender, instance, raw=False, **kwargs):
+    instance._previous_stay = None
+    if instance.pk and not raw:
+        instance._previous_stay = Reservation.objects.filter(pk=instance.pk).values_list(
+            'room_id', 'arrival_date', 'departure_date'
+        ).first()
+
+
+@receiver(post_save, sender=Reservation)
+def update_reservation_revenue(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_reservation_revenue(
+        getattr(instance, '_previous_stay', None),
+        (instance.room_id, instance.arrival_date, instance.departure_date)
+    )
+
+
+@receiver(post_delete, sender=Reservation)
+def remove_reservation_revenue(sender, instance, **kwargs):
+    refresh_reservation_revenue(None, (instance.room_id, instance.arrival_date, instance.departure_date))
+
+
+@receiver(pre_save, sender=Room)
+def remember_room_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    # apply_event уже знает предыдущий статус; остальные сохранения (API, админка) читают его из базы
+    if raw or hasattr(instance, '_status_change'):
+        return
+    if instance._state.adding:
+        instance._status_change = (None, 'CREATED', None, None)
+    elif update_fields is None or 'status' in update_fields:
+        previous = Room.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        instance._status_change = (previous, 'MANUAL', None, None)
+
+
+@receiver(post_save, sender=Room)
+def log_room_status(sender, instance, raw=False, **kwargs):
+    change = instance.__dict__.pop('_status_change', None)
+    if raw or change is None:
+        return
+    from_status, event, reservation, user = change
+    if from_status != instance.status:
+        record_status_change(instance, from_status, event, reservation, user)
+
+
+@receiver(post_delete, sender=Room)
+def release_room_counter(sender, instance, **kwargs):
+    adjust_counters(instance.status, None)
+
+
+def reset_cached_responses(sender, **kwargs):
+    invalidate_cached_responses(sender)
+
+
+for cached_model in CACHED_MODELS:
+    post_save.connect(reset_cached_responses, sender=cached_model)
+    post_delete.connect(reset_cached_responses, sender=cached_model)
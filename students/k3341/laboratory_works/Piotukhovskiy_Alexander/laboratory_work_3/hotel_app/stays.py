@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Exists, OuterRef, Subquery
+
+from .models import Client, Reservation
+
+
+def client_stays(client_id, start_date=None, end_date=None):
+    stays = Reservation.objects.filter(client_id=client_id)
+    if start_date:
+        stays = stays.filter(arrival_date__gte=start_date)
+    if end_date:
+        stays = stays.filter(departure_date__lte=end_date)
+    return stays
+
+
+def overlapping_clients(client_id, start_date=None, end_date=None):
+    # Один запрос: бронирования других клиентов, пересекающиеся хотя бы с одним проживанием заданного
+    stays = client_stays(client_id, start_date, end_date)
+    target_stays = stays.filter(
+        arrival_date__lt=OuterRef('departure_date'),
+        departure_date__gt=OuterRef('arrival_date'),
+    )
+    # Границы всех проживаний клиента позволяют искать кандидатов по индексу дат, а не перебирать таблицу
+    last_departure = stays.order_by('-departure_date').values('departure_date')[:1]
+    first_arrival = stays.order_by('arrival_date').values('arrival_date')[:1]
+
+    overlapping_client_ids = Reservation.objects.filter(
+        Exists(target_stays),
+        arrival_date__lt=Subquery(last_departure),
+        departure_date__gt=Subquery(first_arrival),
+    ).exclude(client_id=client_id).values('client_id')
+
+    return Client.objects.filter(id__in=overlapping_client_ids).order_by('id')
+
+
+def co_resident_client_ids(client_ids, start_date=None, end_date=None):
+    # Пакетный вариант: самосоединение бронирований для всех клиентов за один запрос. Здесь нужны пары
+    # (клиент, сосед), а строки бронирований соединяются только по пересечению дат, без внешнего ключа:
+    # ORM строит JOIN лишь по связям, а Exists/OuterRef, как в overlapping_clients, даёт только факт
+    # пересечения без id исходного клиента, то есть по запросу на клиента. Поэтому SQL написан вручную;
+    # условия те же, что в overlapping_clients
+    client_ids = list(client_ids)
+    table = connection.ops.quote_name(Reservation._meta.db_table)
+    conditions = [f"target.client_id IN ({', '.join(['%s'] * len(client_ids))})"]
+    params = client_ids
+    if start_date:
+        conditions.append("target.arrival_date >= %s")
+        params = params + [start_date]
+    if end_date:
+        conditions.append("target.departure_date <= %s")
+        params = params + [end_date]
+
+    sql = (
+        f"SELECT DISTINCT target.client_id, other.client_id "
+        f"FROM {table} target "
+        f"INNER JOIN {table} other ON other.arrival_date < target.departure_date "
+        f"AND other.departure_date > target.arrival_date "
+        f"AND other.client_id <> target.client_id "
+        f"WHERE {' AND '.join(conditions)}"
+    )
+
+    co_residents = defaultdict(set)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for target_id, other_id in cursor.fetchall():
+            co_residents[target_id].add(other_id)
+
+    return {client_id: sorted(co_residents[client_id]) for client_id in client_ids}
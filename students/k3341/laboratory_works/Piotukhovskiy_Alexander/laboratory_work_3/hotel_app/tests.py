@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import asyncio
+import base64
+import contextvars
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import SyncToAsync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import ASGIHandler
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from .models import RoomType, Room, Client, Reservation, Employee, EmployeePosition, EmploymentContract, \
+    CleaningSchedule, DailyRoomRevenue, RoomPriceHistory, RoomStatusEvent
+from .benchmarks.data import generate_dataset
+from .benchmarks.suite import run_benchmarks
+from .cleaning import NoActiveContract, assign_cleanings, plan_cleanings
+from .dynamic_pricing import apply_prices, plan_prices
+from .imports import IMPORTERS, read_rows
+from .pagination import StreamingListMixin
+from . import pricing
+from .pricing import RateCalendar, invalidate_rate_calendar, quote_stay
+from .asynchronous import in_own_connection
+from .availability import lock_room
+from .profiling import ProfilingMiddleware, RequestProfile, current_profile, registry
+from .rollups import backfill_room_revenue
+from .room_states import rebuild_room_states, status_counts
+from .stays import overlapping_clients
+
+
+class RoomSerializerQueryCountTest(APITestCase):
+    ROOMS_COUNT = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+
+        Room.objects.bulk_create([
+            Room(
+                number=number,
+                type=room_type,
+                phone=str(number),
+                status='OCCUPIED' if number % 2 else 'AVAILABLE'
+            )
+            for number in range(1, cls.ROOMS_COUNT + 1)
+        ])
+        rooms = list(Room.objects.order_by('number'))
+
+        Client.objects.bulk_create([
+            Client(passport_number=str(room.number), first_name='Иван', last_name='Иванов', city_from='Москва')
+            for room in rooms
+        ])
+        clients = {client.passport_number: client for client in Client.objects.all()}
+
+        today = date.today()
+        Reservation.objects.bulk_create([
+            Reservation(
+                room=room,
+                client=clients[str(room.number)],
+                admin=cls.user,
+                arrival_date=today - timedelta(days=1),
+                departure_date=today + timedelta(days=2),
+                status='CHECKED_IN',
+                price_at_booking=1000,
+                final_price=1000,
+            )
+            for room in rooms if room.status == 'OCCUPIED'
+        ])
+
+        position = EmployeePosition.objects.create(name='Уборщик', salary=1000)
+        cleaners = []
+        for index in range(2):
+            employee = Employee.objects.create(
+                passport_number=f'e{index}', first_name=f'Уборщик{index}', last_name='Петров'
+            )
+            cleaners.append(EmploymentContract.objects.create(
+                employee=employee, position=position, contract_type='PERMANENT', start_date=today
+            ))
+
+        CleaningSchedule.objects.bulk_create([
+            CleaningSchedule(cleaner=cleaners[day % 2], room=room, cleaning_date=today - timedelta(days=day))
+            for room in rooms
+            for day in range(2)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_rooms_by_status_query_count_is_constant(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/hotel/rooms', {'status': 'OCCUPIED,AVAILABLE'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], self.ROOMS_COUNT)
+        rooms = {room['number']: room for room in response.data['rooms']}
+        self.assertEqual(rooms[1]['current_client']['passport_number'], '1')
+        self.assertIsNone(rooms[2]['current_client'])
+
+    def test_rooms_api_query_count_is_constant(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/hotel/api/rooms/', {'page_size': self.ROOMS_COUNT})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROOMS_COUNT)
+
+    def test_relations_are_resolved_per_room(self):
+        response = self.client.get('/hotel/api/rooms/', {'page_size': self.ROOMS_COUNT})
+        rooms = {room['number']: room for room in response.data['results']}
+
+        self.assertEqual(rooms[1]['current_client']['passport_number'], '1')
+        self.assertIsNone(rooms[2]['current_client'])
+        self.assertEqual(rooms[1]['last_cleaner']['first_name'], 'Уборщик0')
+        self.assertEqual(rooms[1]['last_cleaner']['cleaning_date'], date.today())
+
+
+class ResponseCacheTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        cls.room = Room.objects.create(number=101, type=room_type, phone='101')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get('/hotel/rooms', {'status': 'available'})
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/hotel/rooms', {'status': 'available'})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_unchanged_poll_returns_not_modified(self):
+        first = self.client.get('/hotel/rooms')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/hotel/rooms', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates_dependent_responses(self):
+        first = self.client.get('/hotel/rooms')
+        self.assertEqual(first.data['rooms'][0]['status'], 'AVAILABLE')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.status = 'MAINTENANCE'
+            self.room.save()
+
+        response = self.client.get('/hotel/rooms', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.data['rooms'][0]['status'], 'MAINTENANCE')
+
+
+class ReservationImportTest(APITestCase):
+    HEADER = 'passport_number,first_name,last_name,city_from,room_number,arrival_date,departure_date,status'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        RoomPriceHistory.objects.create(room_type=room_type, start_date=date(2000, 1, 1), price=1000)
+        cls.rooms = {number: Room.objects.create(number=number, type=room_type, phone=str(number))
+                     for number in (101, 102)}
+        cls.start = date(2025, 1, 1)
+
+    def run_import(self, *lines):
+        rows = read_rows(StringIO('\n'.join((self.HEADER,) + lines)), 'csv')
+        return IMPORTERS['reservations'](batch_size=100, user=self.user).run(rows).as_dict()
+
+    def stay(self, passport, room, arrival, departure, status='BOOKED'):
+        return (f'{passport},Иван,Иванов,Москва,{room},{self.start + timedelta(days=arrival)},'
+                f'{self.start + timedelta(days=departure)},{status}')
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = self.run_import(
+            self.stay('1000000001', 101, 0, 3),
+            self.stay('1000000002', 999, 0, 3),
+            self.stay('1000000003', 102, 5, 5),
+            '1000000004,Иван,Иванов,Москва,102,2025-13-01,2025-13-03,BOOKED',
+            self.stay('1000000005', 102, 0, 3, status='LOST'),
+        )
+
+        self.assertEqual((report['processed'], report['created'], report['failed']), (5, 1, 4))
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5, 2])
+        self.assertEqual(Reservation.objects.get().price_at_booking, 3000)
+
+    def test_conflicts_within_the_file_are_rejected(self):
+        report = self.run_import(
+            self.stay('1000000001', 101, 0, 3),
+            self.stay('1000000002', 101, 2, 5),
+            self.stay('1000000003', 101, 3, 5),
+            self.stay('1000000004', 101, 1, 2, status='CANCELLED'),
+        )
+
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(report['errors'], [
+            {"row": 2, "detail": "Комната 101 уже забронирована на указанные даты."},
+        ])
+
+    def test_conflicts_with_overlapping_existing_reservations_are_rejected(self):
+        guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                      city_from='Москва')
+        # Старые данные: длинное проживание перекрыто коротким, начавшимся позже
+        Reservation.objects.bulk_create([
+            Reservation(room=self.rooms[101], client=guest, admin=self.user, price_at_booking=0, final_price=0,
+                        arrival_date=self.start + timedelta(days=arrival),
+                        departure_date=self.start + timedelta(days=departure))
+            for arrival, departure in ((0, 20), (2, 4))
+        ])
+
+        report = self.run_import(
+            self.stay('1000000001', 101, 10, 12),
+            self.stay('1000000002', 101, 20, 22),
+            self.stay('1000000003', 102, 0, 3),
+        )
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [1])
+
+
+class RevenueRollupTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        cls.rooms = {number: Room.objects.create(number=number, type=room_type, phone=str(number))
+                     for number in (101, 201)}
+        cls.guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                          city_from='Москва')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def reserve(self, room, arrival, departure, price, status, payment_status):
+        return Reservation.objects.create(
+            room=self.rooms[room], client=self.guest, admin=self.user, status=status, payment_status=payment_status,
+            arrival_date=arrival, departure_date=departure, price_at_booking=price, final_price=price,
+        )
+
+    @staticmethod
+    def revenue_rows():
+        return list(DailyRoomRevenue.objects.order_by('room_id', 'date').values_list(
+            'room_id', 'date', 'stays', 'arrivals', 'revenue'
+        ))
+
+    def assertMatchesBackfill(self):
+        incremental = self.revenue_rows()
+        backfill_room_revenue()
+        self.assertEqual(incremental, self.revenue_rows())
+
+    def test_incremental_rollup_matches_backfill_and_reports(self):
+        moved = self.reserve(101, date(2025, 1, 5), date(2025, 1, 8), 3000, 'BOOKED', 'PAID')
+        deleted = self.reserve(101, date(2025, 1, 30), date(2025, 2, 2), 3100, 'CONFIRMED', 'PREPAID')
+        paid_later = self.reserve(201, date(2025, 1, 10), date(2025, 1, 12), 2000, 'CHECKED_OUT', 'UNPAID')
+        self.assertMatchesBackfill()
+
+        moved.room = self.rooms[201]
+        moved.arrival_date, moved.departure_date = date(2025, 1, 20), date(2025, 1, 24)
+        moved.save()
+        paid_later.payment_status = 'PAID'
+        paid_later.save()
+        deleted.delete()
+        self.assertMatchesBackfill()
+
+        monthly = self.client.get('/hotel/reports/monthly', {'month': 1, 'year': 2025})
+        in_range = self.client.get('/hotel/reports/range', {'start_date': '2025-01-11', 'end_date': '2025-01-21'})
+
+        self.assertEqual(monthly.data['clients_per_room'], [{"room__number": 201, "client_count": 2}])
+        self.assertEqual(monthly.data['total_income'], 5000)
+        self.assertEqual(in_range.data['clients_per_room'], [{"room__number": 201, "client_count": 2}])
+        # Ночь 11 января — 1000, ночи 20 и 21 января — по 750
+        self.assertEqual(in_range.data['income_per_room'], [{"room__number": 201, "total_income": 2500}])
+
+
+class StayOverlapTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        room = Room.objects.create(number=101, type=room_type, phone='101')
+        cls.guests = Client.objects.bulk_create([
+            Client(passport_number=f'{index:010d}', first_name='Гость', last_name=f'Фамилия{index}',
+                   city_from='Москва')
+            for index in range(5)
+        ])
+        cls.start = date(2025, 1, 1)
+        # Гость 0 жил 1–5 и 20–25 января; 1 пересекается с первым проживанием, 2 — со вторым,
+        # 3 выехал в день заезда гостя 0, 4 — с гостем 2, но не с гостем 0
+        stays = [(0, 0, 4), (0, 19, 24), (1, 2, 6), (2, 23, 30), (3, -3, 0), (4, 26, 28)]
+        Reservation.objects.bulk_create([
+            Reservation(room=room, client=cls.guests[guest], admin=cls.user, price_at_booking=0, final_price=0,
+                        arrival_date=cls.start + timedelta(days=arrival),
+                        departure_date=cls.start + timedelta(days=departure))
+            for guest, arrival, departure in stays
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, *indexes):
+        return [self.guests[index].id for index in indexes]
+
+    def test_single_client_overlaps(self):
+        everything = self.client.get('/hotel/clients/stay-overlap', {'client_id': self.guests[0].id})
+        january_start = self.client.get('/hotel/clients/stay-overlap', {
+            'client_id': self.guests[0].id, 'end_date': self.start + timedelta(days=10),
+        })
+        missing = self.client.get('/hotel/clients/stay-overlap', {'client_id': 999999})
+
+        self.assertEqual([row['id'] for row in everything.data['clients']], self.ids(1, 2))
+        self.assertEqual([row['id'] for row in january_start.data['clients']], self.ids(1))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_batch_matches_single_requests(self):
+        response = self.client.post('/hotel/clients/stay-overlap/batch', {
+            'client_ids': self.ids(0, 2, 3, 0), 'start_date': self.start + timedelta(days=15),
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {"client_id": self.guests[0].id, "count": 1, "client_ids": self.ids(2)},
+            {"client_id": self.guests[2].id, "count": 2, "client_ids": self.ids(0, 4)},
+            {"client_id": self.guests[3].id, "count": 0, "client_ids": []},
+        ])
+        for result in response.data['results']:
+            single = overlapping_clients(result['client_id'], start_date=self.start + timedelta(days=15))
+            self.assertEqual(list(single.values_list('id', flat=True)), result['client_ids'])
+
+
+class BookingServiceTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        RoomPriceHistory.objects.create(room_type=room_type, start_date=date(2000, 1, 1), price=1000)
+        cls.room = Room.objects.create(number=101, type=room_type, phone='101')
+        cls.guest = Client.objects.create(
+            passport_number='1234567890', first_name='Иван', last_name='Иванов', city_from='Москва'
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.arrival = date.today() + timedelta(days=10)
+
+    def book(self, **extra):
+        return self.client.post('/hotel/reservation', {
+            'passport_number': '1234567890', 'first_name': 'Иван', 'last_name': 'Иванов', 'city_from': 'Москва',
+            'room_number': 101, 'arrival_date': self.arrival.isoformat(),
+            'departure_date': (self.arrival + timedelta(days=3)).isoformat(), **extra,
+        }, format='json')
+
+    def test_booking_updates_only_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.book(city_from='Казань')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['client_id'], self.guest.id)
+        self.assertEqual(response.data['price_at_booking'], 3000)
+        updates = {
+            query['sql'].split('"')[1]: query['sql']
+            for query in queries.captured_queries if query['sql'].startswith('UPDATE')
+        }
+        self.assertIn('SET "city_from" = ', updates['hotel_app_client'])
+        self.assertNotIn('"first_name"', updates['hotel_app_client'])
+        self.assertIn('SET "status" = ', updates['hotel_app_room'])
+        self.assertNotIn('"phone"', updates['hotel_app_room'])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'OCCUPIED')
+
+    def test_overlapping_and_unknown_rooms_are_rejected(self):
+        self.assertEqual(self.book().status_code, 201)
+
+        overlapping = self.book(passport_number='0987654321')
+        unknown = self.book(room_number=999)
+
+        self.assertEqual(overlapping.status_code, 422)
+        self.assertIn('room_number', overlapping.data)
+        self.assertEqual(unknown.status_code, 422)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertFalse(Client.objects.filter(passport_number='0987654321').exists())
+
+
+class ReservationAvailabilityTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        single = RoomType.objects.create(name='Одноместный', capacity=1)
+        double = RoomType.objects.create(name='Двухместный', capacity=2)
+        RoomPriceHistory.objects.create(room_type=single, start_date=date(2000, 1, 1), price=1000)
+        RoomPriceHistory.objects.create(room_type=double, start_date=date(2000, 1, 1), price=2000)
+        cls.rooms = {number: Room.objects.create(number=number, type=room_type, phone=str(number))
+                     for number, room_type in [(101, single), (102, single), (201, double)]}
+        guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                      city_from='Москва')
+        cls.arrival = date.today() + timedelta(days=10)
+        cls.departure = cls.arrival + timedelta(days=3)
+        stays = [(101, 0, 3, 'BOOKED'), (102, 0, 3, 'CANCELLED'), (102, 5, 8, 'CONFIRMED'), (101, 6, 9, 'BOOKED')]
+        cls.reservations = [
+            Reservation.objects.create(
+                room=cls.rooms[number], client=guest, admin=cls.user, status=status,
+                arrival_date=cls.arrival + timedelta(days=arrival),
+                departure_date=cls.arrival + timedelta(days=departure),
+                price_at_booking=3000, final_price=3000,
+            )
+            for number, arrival, departure, status in stays
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def available(self, arrival, departure, **params):
+        response = self.client.get('/hotel/rooms/availability', {'from': arrival, 'to': departure, **params})
+        self.assertEqual(response.status_code, 200)
+        return [room['number'] for room in response.data['rooms']]
+
+    def test_availability_excludes_only_blocking_overlaps(self):
+        self.assertEqual(self.available(self.arrival, self.departure), [102, 201])
+        # Выезд в день заезда следующего гостя не пересекается с его проживанием
+        self.assertEqual(self.available(self.departure, self.departure + timedelta(days=2)), [101, 102, 201])
+        self.assertEqual(self.available(self.arrival + timedelta(days=2), self.arrival + timedelta(days=6)), [201])
+        self.assertEqual(self.available(self.arrival, self.departure, type=self.rooms[201].type_id), [201])
+
+        response = self.client.get('/hotel/rooms/availability', {'from': self.departure, 'to': self.arrival})
+        self.assertEqual(response.status_code, 422)
+
+    def test_patch_rejects_dates_overlapping_another_stay(self):
+        first, _, other_room, _ = self.reservations
+
+        longer = self.client.patch(f'/hotel/reservation/{first.id}', {
+            'departure_date': self.arrival + timedelta(days=7),
+        }, format='json')
+        # Отменённое бронирование комнату не занимает
+        earlier = self.client.patch(f'/hotel/reservation/{other_room.id}', {
+            'arrival_date': self.arrival + timedelta(days=1),
+        }, format='json')
+        moved = self.client.patch(f'/hotel/reservation/{first.id}', {'room_number': 102}, format='json')
+
+        self.assertEqual(longer.status_code, 422)
+        self.assertEqual(earlier.status_code, 200)
+        self.assertEqual(moved.status_code, 422)
+        first.refresh_from_db()
+        self.assertEqual((first.room_id, first.departure_date), (self.rooms[101].id, self.departure))
+
+    def test_patch_moves_stay_to_a_free_room_and_requotes(self):
+        reservation = self.reservations[0]
+
+        response = self.client.patch(f'/hotel/reservation/{reservation.id}', {'room_number': 201}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['room_number'], 201)
+        self.assertEqual(response.data['price_at_booking'], 6000)
+        self.assertEqual(self.available(self.arrival, self.departure), [101, 102])
+
+    def test_patch_locks_both_rooms_in_id_order(self):
+        # Встречные переносы должны блокировать комнаты в одном порядке, иначе на PostgreSQL они взаимоблокируются
+        first, _, second, _ = self.reservations
+        locked = []
+
+        def record_lock(room_id):
+            locked.append(room_id)
+            return lock_room(room_id)
+
+        with mock.patch('hotel_app.views.lock_room', side_effect=record_lock):
+            moves = [self.client.patch(f'/hotel/reservation/{reservation.id}', {'room_number': 201}, format='json')
+                     for reservation in (second, first)]
+
+        self.assertEqual([response.status_code for response in moves], [200, 200])
+        self.assertEqual(locked, sorted([self.rooms[102].id, self.rooms[201].id])
+                         + sorted([self.rooms[101].id, self.rooms[201].id]))
+
+    def test_patch_of_missing_reservation_is_not_found(self):
+        response = self.client.patch('/hotel/reservation/999999', {'status': 'CANCELLED'}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class RoomLifecycleTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        RoomPriceHistory.objects.create(room_type=room_type, start_date=date(2000, 1, 1), price=1000)
+        cls.room = Room.objects.create(number=101, type=room_type, phone='101')
+        cls.spare_room = Room.objects.create(number=102, type=room_type, phone='102', status='MAINTENANCE')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.arrival = date.today() + timedelta(days=10)
+
+    def book(self, room_number=101):
+        return self.client.post('/hotel/reservation', {
+            'passport_number': '1234567890', 'first_name': 'Иван', 'last_name': 'Иванов', 'city_from': 'Москва',
+            'room_number': room_number, 'arrival_date': self.arrival.isoformat(),
+            'departure_date': (self.arrival + timedelta(days=3)).isoformat(),
+        }, format='json')
+
+    def events(self, room):
+        return list(RoomStatusEvent.objects.filter(room=room).order_by('id').values_list('event', 'to_status'))
+
+    def test_cancellation_releases_the_room(self):
+        reservation_id = self.book().data['reservation_id']
+        self.assertEqual(status_counts(['OCCUPIED']), {'OCCUPIED': 1})
+
+        response = self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CANCELLED'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'AVAILABLE')
+        self.assertEqual(self.events(self.room), [
+            ('CREATED', 'AVAILABLE'), ('BOOK', 'OCCUPIED'), ('RELEASE', 'AVAILABLE'),
+        ])
+        with self.assertNumQueries(1):
+            counts = self.client.get('/hotel/rooms/status-counts', {'status': 'available'})
+        self.assertEqual(counts.data, {'AVAILABLE': 1})
+
+    def test_check_out_sends_the_room_to_cleaning(self):
+        reservation_id = self.book().data['reservation_id']
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CHECKED_IN'}, format='json')
+
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CHECKED_OUT'}, format='json')
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'REQUIRES_CLEANING')
+        self.assertEqual(status_counts(), {
+            'AVAILABLE': 0, 'OCCUPIED': 0, 'REQUIRES_CLEANING': 1, 'CLEANING_IN_PROGRESS': 0, 'MAINTENANCE': 1,
+        })
+
+    def test_cancelling_a_checked_in_stay_checks_the_room_out(self):
+        reservation_id = self.book().data['reservation_id']
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CHECKED_IN'}, format='json')
+
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CANCELLED'}, format='json')
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'REQUIRES_CLEANING')
+        self.assertEqual(self.events(self.room)[-1], ('CHECK_OUT', 'REQUIRES_CLEANING'))
+        self.assertEqual(status_counts(['OCCUPIED', 'REQUIRES_CLEANING']), {'OCCUPIED': 0, 'REQUIRES_CLEANING': 1})
+
+    def test_checking_out_a_booked_stay_releases_the_room(self):
+        reservation_id = self.book().data['reservation_id']
+
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CHECKED_OUT'}, format='json')
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'AVAILABLE')
+        self.assertEqual(self.events(self.room)[-1], ('RELEASE', 'AVAILABLE'))
+
+    def test_reactivated_reservation_books_the_room_again(self):
+        reservation_id = self.book().data['reservation_id']
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CANCELLED'}, format='json')
+
+        response = self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'BOOKED'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'OCCUPIED')
+        self.assertEqual(self.events(self.room)[-1], ('BOOK', 'OCCUPIED'))
+        self.assertEqual(status_counts(['OCCUPIED', 'AVAILABLE']), {'OCCUPIED': 1, 'AVAILABLE': 0})
+
+    def test_reactivation_is_rejected_for_a_room_under_maintenance(self):
+        reservation_id = self.book().data['reservation_id']
+        self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CANCELLED'}, format='json')
+        self.client.patch(f'/hotel/api/rooms/{self.room.id}/', {'status': 'MAINTENANCE'}, format='json')
+
+        response = self.client.patch(f'/hotel/reservation/{reservation_id}', {'status': 'CONFIRMED'}, format='json')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Reservation.objects.get(id=reservation_id).status, 'CANCELLED')
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'MAINTENANCE')
+
+    def test_invalid_transitions_are_rejected(self):
+        booking = self.book(room_number=102)
+        manual = self.client.patch(f'/hotel/api/rooms/{self.spare_room.id}/', {'status': 'OCCUPIED'}, format='json')
+
+        self.assertEqual(booking.status_code, 422)
+        self.assertEqual(manual.status_code, 400)
+        self.spare_room.refresh_from_db()
+        self.assertEqual(self.spare_room.status, 'MAINTENANCE')
+        self.assertEqual(status_counts(['MAINTENANCE']), {'MAINTENANCE': 1})
+
+    def test_replaying_the_log_restores_statuses_and_counters(self):
+        self.book()
+        Room.objects.update(status='AVAILABLE')
+
+        report = rebuild_room_states(apply=True)
+
+        self.assertEqual(report['mismatched'], {self.room.id: 'OCCUPIED', self.spare_room.id: 'MAINTENANCE'})
+        self.assertEqual(dict(Room.objects.values_list('number', 'status')), {101: 'OCCUPIED', 102: 'MAINTENANCE'})
+        self.assertEqual(status_counts(['OCCUPIED', 'AVAILABLE']), {'OCCUPIED': 1, 'AVAILABLE': 0})
+
+
+class CleaningPlannerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        cls.rooms = [Room.objects.create(number=number, type=room_type, phone=str(number))
+                     for number in range(101, 105)]
+        position = EmployeePosition.objects.create(name='Горничная', salary=40000)
+        employees = Employee.objects.bulk_create([
+            Employee(passport_number=f'{index:010d}', first_name=f'Сотрудник{index}', last_name='Тестов')
+            for index in range(3)
+        ])
+        cls.cleaners = [
+            EmploymentContract.objects.create(employee=employee, position=position, contract_type='PERMANENT',
+                                              start_date=date(2020, 1, 1), is_active=index < 2)
+            for index, employee in enumerate(employees)
+        ]
+        cls.user = user = User.objects.create_user(username='admin', password='admin')
+        guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                      city_from='Москва')
+        cls.day = date(2025, 1, 10)
+        # В первый день выезжают из всех четырёх комнат, во второй — из двух
+        Reservation.objects.bulk_create([
+            Reservation(room=room, client=guest, admin=user, price_at_booking=0, final_price=0,
+                        arrival_date=cls.day - timedelta(days=3), departure_date=cls.day + timedelta(days=offset))
+            for offset, rooms in ((0, cls.rooms), (1, cls.rooms[:2]))
+            for room in rooms
+        ])
+
+    def daily_load(self):
+        return Counter(CleaningSchedule.objects.values_list('cleaning_date', 'cleaner_id'))
+
+    def test_load_is_even_across_cleaners(self):
+        diff = plan_cleanings(self.day, self.day + timedelta(days=1))
+
+        self.assertEqual(len(diff.to_create), 6)
+        first, second = self.cleaners[:2]
+        self.assertEqual(self.daily_load(), {
+            (self.day, first.id): 2, (self.day, second.id): 2,
+            (self.day + timedelta(days=1), first.id): 1, (self.day + timedelta(days=1), second.id): 1,
+        })
+
+    def test_existing_assignments_are_kept_and_orphans_reassigned(self):
+        first, second, fired = self.cleaners
+        kept = CleaningSchedule.objects.create(room=self.rooms[0], cleaning_date=self.day, cleaner=second)
+        orphan = CleaningSchedule.objects.create(room=self.rooms[1], cleaning_date=self.day, cleaner=fired)
+
+        diff = plan_cleanings(self.day, self.day).as_dict()
+
+        self.assertEqual(diff['unchanged'], 1)
+        self.assertEqual(diff['reassigned'], [{
+            "room_number": 102, "cleaning_date": self.day, "cleaner_id": first.employee_id,
+            "previous_cleaner_id": fired.employee_id,
+        }])
+        self.assertEqual([entry['room_number'] for entry in diff['created']], [103, 104])
+        # Строки не удаляются и не вставляются заново: существующие уборки сохраняют id
+        self.assertEqual(CleaningSchedule.objects.get(id=kept.id).cleaner_id, second.id)
+        self.assertEqual(CleaningSchedule.objects.get(id=orphan.id).cleaner_id, first.id)
+        self.assertEqual(self.daily_load(), {(self.day, first.id): 2, (self.day, second.id): 2})
+
+    def test_dry_run_writes_nothing(self):
+        # Только чтение: комнаты, контракты, расписание и дни выезда
+        with self.assertNumQueries(4):
+            diff = plan_cleanings(self.day, self.day + timedelta(days=1), dry_run=True)
+
+        self.assertEqual(len(diff.as_dict()['created']), 6)
+        self.assertFalse(CleaningSchedule.objects.exists())
+
+    def test_manual_assignment_diff(self):
+        first, second, _ = self.cleaners
+        CleaningSchedule.objects.bulk_create([
+            CleaningSchedule(room=self.rooms[0], cleaning_date=self.day, cleaner=first),
+            CleaningSchedule(room=self.rooms[1], cleaning_date=self.day, cleaner=second),
+            CleaningSchedule(room=self.rooms[2], cleaning_date=self.day, cleaner=second, status='IN_PROGRESS'),
+        ])
+
+        diff = assign_cleanings(first.employee_id, [101, 102, 103, 104], [self.day]).as_dict()
+
+        self.assertEqual(diff['unchanged'], 1)
+        self.assertEqual([entry['room_number'] for entry in diff['reassigned']], [102])
+        self.assertEqual([entry['room_number'] for entry in diff['created']], [104])
+        self.assertEqual(diff['conflicts'], [{
+            "room_number": 103, "cleaning_date": self.day, "cleaner_id": second.employee_id, "status": 'IN_PROGRESS',
+        }])
+        self.assertEqual(CleaningSchedule.objects.filter(cleaner=first).count(), 3)
+
+    def test_contract_ended_before_assignment_is_a_validation_error(self):
+        # Контракт завершён между проверкой сериализатора и записью расписания
+        fired = self.cleaners[2]
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertRaises(NoActiveContract):
+            assign_cleanings(fired.employee_id, [101], [self.day])
+        with mock.patch('hotel_app.serializers.UpdateCleaningScheduleSerializer.validate_cleaner_id',
+                        side_effect=lambda value: value):
+            response = client.patch('/hotel/cleaning-schedules/manage', {
+                'cleaner_id': fired.employee_id, 'room_ids': [101], 'cleaning_dates': [self.day],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('cleaner_id', response.data)
+        self.assertFalse(CleaningSchedule.objects.exists())
+
+
+class OccupancyReportTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        single = RoomType.objects.create(name='Одноместный', capacity=1)
+        double = RoomType.objects.create(name='Двухместный', capacity=2)
+        rooms = [Room.objects.create(number=number, type=room_type, phone=str(number))
+                 for number, room_type in [(101, single), (102, single), (201, double)]]
+        guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                      city_from='Москва')
+        cls.start = date(2025, 1, 1)
+        stays = [
+            (rooms[0], -3, 2, 'CHECKED_OUT'), (rooms[0], 4, 9, 'CONFIRMED'), (rooms[1], 1, 40, 'BOOKED'),
+            (rooms[2], 5, 6, 'CHECKED_IN'), (rooms[2], 0, 20, 'CANCELLED'),
+        ]
+        Reservation.objects.bulk_create([
+            Reservation(room=room, client=guest, admin=cls.user, arrival_date=cls.start + timedelta(days=arrival),
+                        departure_date=cls.start + timedelta(days=departure), status=status, price_at_booking=0,
+                        final_price=0)
+            for room, arrival, departure, status in stays
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_curve_matches_per_night_counts(self):
+        end = self.start + timedelta(days=13)
+        with self.assertNumQueries(2):
+            response = self.client.get('/hotel/reports/occupancy', {'from': self.start, 'to': end})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['buckets']), 14)
+        for bucket in response.data['buckets']:
+            night = bucket['start_date']
+            expected = Reservation.objects.exclude(status='CANCELLED').filter(
+                arrival_date__lte=night, departure_date__gt=night
+            ).count()
+            self.assertEqual(bucket['occupied_room_nights'], expected, night)
+        self.assertEqual(response.data['buckets'][5]['room_types'][1]['occupied_room_nights'], 1)
+
+    def test_weekly_buckets_are_clipped_to_the_period(self):
+        response = self.client.get('/hotel/reports/occupancy', {
+            'from': self.start, 'to': self.start + timedelta(days=9), 'granularity': 'week',
+        })
+
+        buckets = response.data['buckets']
+        self.assertEqual([(bucket['start_date'], bucket['nights']) for bucket in buckets],
+                         [(date(2025, 1, 1), 5), (date(2025, 1, 6), 5)])
+        self.assertEqual(buckets[0]['occupied_room_nights'], 2 + 4 + 1)
+        self.assertEqual(buckets[0]['capacity_room_nights'], 15)
+        self.assertEqual(buckets[0]['peak_occupied'], 2)
+
+    def test_cached_curve_is_refreshed_when_reservations_change(self):
+        params = {'from': self.start, 'to': self.start + timedelta(days=1), 'granularity': 'month'}
+        first = self.client.get('/hotel/reports/occupancy', params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = Reservation.objects.get(status='CHECKED_OUT')
+            reservation.status = 'CANCELLED'
+            reservation.save()
+        second = self.client.get('/hotel/reports/occupancy', params)
+
+        self.assertEqual(first.data['buckets'][0]['occupied_room_nights'], 3)
+        self.assertEqual(second.data['buckets'][0]['occupied_room_nights'], 1)
+
+
+class DynamicPricingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        cls.room_type = RoomType.objects.create(name='Двухместный', capacity=2)
+        rooms = [Room.objects.create(number=number, type=cls.room_type, phone=str(number)) for number in (201, 202)]
+        guest = Client.objects.create(passport_number='1234567890', first_name='Иван', last_name='Иванов',
+                                      city_from='Москва')
+        cls.today = date.today()
+        cls.start = cls.today + timedelta(days=10)
+        RoomPriceHistory.objects.create(room_type=cls.room_type, start_date=date(2024, 1, 1), price=5000)
+        # Ночи 0–4 горизонта заняты полностью, 5–9 — наполовину, остальные свободны
+        Reservation.objects.bulk_create([
+            Reservation(room=room, client=guest, admin=cls.user, booking_date=cls.today - timedelta(days=90),
+                        arrival_date=cls.start, departure_date=cls.start + timedelta(days=nights),
+                        status='CONFIRMED', price_at_booking=0, final_price=0)
+            for room, nights in ((rooms[0], 5), (rooms[1], 10))
+        ])
+
+    def setUp(self):
+        # Откат транзакции теста не вызывает сигналов: календари цен прошлых тестов сбрасываются явно
+        invalidate_rate_calendar()
+
+    def prices(self, days):
+        return [quote_stay(self.room_type.id, self.start + timedelta(days=offset),
+                           self.start + timedelta(days=offset + 1)) for offset in range(days)]
+
+    def test_prices_follow_occupancy_and_replace_horizon(self):
+        plans = plan_prices(self.start, 30, self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_prices(plans, self.start, 30)
+
+        self.assertEqual(self.prices(30), [5900] * 5 + [4400] * 5 + [3500] * 20)
+        periods = list(RoomPriceHistory.objects.order_by('start_date').values_list('start_date', 'end_date', 'price'))
+        self.assertEqual(periods, [
+            (date(2024, 1, 1), self.start - timedelta(days=1), 5000),
+            (self.start, self.start + timedelta(days=4), 5900),
+            (self.start + timedelta(days=5), self.start + timedelta(days=9), 4400),
+            (self.start + timedelta(days=10), self.start + timedelta(days=29), 3500),
+            (self.start + timedelta(days=30), None, 5000),
+        ])
+        self.assertEqual(RoomType.objects.get(id=self.room_type.id).base_price, 5000)
+        # База сохранена, поэтому повторный запуск не наращивает цены
+        self.assertEqual(plan_prices(self.start, 30, self.today)[0]['changes'], [])
+
+    def test_price_changes_reset_calendars_of_both_room_types_after_commit(self):
+        other_type = RoomType.objects.create(name='Люкс', capacity=2)
+        night = (self.start, self.start + timedelta(days=1))
+        period = RoomPriceHistory.objects.get()
+        self.assertEqual(quote_stay(self.room_type.id, *night), 5000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            period.room_type = other_type
+            period.save()
+            # Параллельный запрос успел загрузить цены до коммита
+            pricing._calendars[other_type.id] = RateCalendar([])
+
+        self.assertEqual(quote_stay(self.room_type.id, *night), 0)
+        self.assertEqual(quote_stay(other_type.id, *night), 5000)
+
+    def test_booking_pace_raises_prices_of_distant_nights(self):
+        Reservation.objects.filter(room__number=202).update(booking_date=self.today - timedelta(days=7))
+
+        plan = plan_prices(self.start, 30, self.today, pace_days=14)[0]
+
+        # Второй номер продан неделю назад: до его ночей 5–9 ещё две недели, и темп обещает продать и первый
+        self.assertEqual(plan['intervals'], [
+            (self.start, self.start + timedelta(days=9), 5900),
+            (self.start + timedelta(days=10), self.start + timedelta(days=29), 3500),
+        ])
+
+    def test_dry_run_reports_changes_without_writing(self):
+        output = StringIO()
+        call_command('update_prices', start=self.start, days=30, dry_run=True, stdout=output)
+
+        self.assertIn('5000 → 5900', output.getvalue())
+        self.assertEqual(RoomPriceHistory.objects.count(), 1)
+        self.assertIsNone(RoomType.objects.get(id=self.room_type.id).base_price)
+
+
+class ClientSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        rooms = [Room.objects.create(number=number, type=room_type, phone=str(number)) for number in (101, 102)]
+        cls.clients = Client.objects.bulk_create([
+            Client(passport_number=f'{index:010d}', first_name='Гость', last_name=f'Фамилия{index % 5}',
+                   city_from='Москва' if index % 2 else 'Казань')
+            for index in range(12)
+        ])
+        cls.start = date(2025, 1, 1)
+        # Клиент 0 жил в 101 в январе и в 102 в марте, клиент 1 — в 102 в январе
+        Reservation.objects.bulk_create([
+            Reservation(room=room, client=cls.clients[client], admin=cls.user,
+                        arrival_date=cls.start + timedelta(days=day),
+                        departure_date=cls.start + timedelta(days=day + 3), price_at_booking=0, final_price=0)
+            for client, room, day in ((0, rooms[0], 0), (0, rooms[1], 60), (1, rooms[1], 5))
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_room_and_dates_filter_the_same_stay(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/hotel/clients', {'room': 102, 'start_date': self.start,
+                                                          'end_date': self.start + timedelta(days=30)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual([row['id'] for row in response.data['clients']], [self.clients[1].id])
+
+    def test_cursor_pages_keep_total_count_and_ordering(self):
+        expected = sorted((client for client in self.clients if client.city_from == 'Москва'),
+                          key=lambda client: (client.last_name, client.id), reverse=True)
+        pages = []
+        params = {'city': 'Моск', 'ordering': '-last_name', 'page_size': 4}
+        response = self.client.get('/hotel/clients', params)
+        while True:
+            self.assertEqual(response.data['count'], 6)
+            pages.append([row['id'] for row in response.data['clients']])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(pages, [[client.id for client in expected[:4]], [client.id for client in expected[4:]]])
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['clients']], pages[0])
+        self.assertIsNone(previous.data['previous'])
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        response = self.client.get('/hotel/clients', {'page_size': 2})
+        cursor = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+
+        rejected = self.client.get('/hotel/clients', {'page_size': 2, 'ordering': 'last_name', 'cursor': cursor})
+
+        self.assertEqual(rejected.status_code, 422)
+        self.assertIn('cursor', rejected.data)
+
+    def test_tampered_cursor_is_rejected(self):
+        def cursor(*key):
+            return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+        for key in (['last_name', 'next', ['Фамилия1'], 1], ['last_name', 'next', {'a': 1}, 1],
+                    ['last_name', 'next', 5, 1], ['last_name', 'next', 'Фамилия1', True],
+                    ['id', 'next', 'x', 1]):
+            with self.subTest(key=key):
+                response = self.client.get('/hotel/clients', {'ordering': key[0], 'cursor': cursor(*key)})
+
+                self.assertEqual(response.status_code, 422)
+                self.assertIn('cursor', response.data)
+
+
+class EmployeeQueryCountTest(APITestCase):
+    EMPLOYEES_COUNT = 10000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        cls.positions = EmployeePosition.objects.bulk_create([
+            EmployeePosition(name='Горничная', salary=40000),
+            EmployeePosition(name='Администратор', salary=60000),
+        ])
+        employees = Employee.objects.bulk_create([
+            Employee(passport_number=f'{index:010d}', first_name=f'Сотрудник{index}', last_name='Тестов')
+            for index in range(cls.EMPLOYEES_COUNT)
+        ])
+        # У каждого второго сотрудника до активного контракта был расторгнутый на другой должности
+        contracts = [
+            EmploymentContract(employee=employee, position=cls.positions[1], contract_type='PERMANENT',
+                               start_date=date(2020, 1, 1), termination_date=date(2021, 1, 1), is_active=False)
+            for employee in employees[::2]
+        ]
+        contracts += [
+            EmploymentContract(employee=employee, position=cls.positions[0], contract_type='PERMANENT',
+                               start_date=date(2021, 1, 1))
+            for employee in employees
+        ]
+        EmploymentContract.objects.bulk_create(contracts)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_employees_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/hotel/api/employees/', {'page_size': 1000})
+
+        self.assertEqual(len(response.data['results']), 1000)
+        self.assertEqual({employee['position']['name'] for employee in response.data['results']}, {'Горничная'})
+
+    def test_streamed_employees_query_count_depends_on_chunks_only(self):
+        chunks = self.EMPLOYEES_COUNT // StreamingListMixin.stream_chunk_size
+        with self.assertNumQueries(1 + chunks):
+            response = self.client.get('/hotel/api/employees/', {'stream': 'ndjson'})
+            lines = b''.join(response.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), self.EMPLOYEES_COUNT)
+
+    def test_stream_needs_an_explicit_format(self):
+        response = self.client.get('/hotel/api/employees/', {'stream': '0', 'page_size': 10})
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_contracts_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/hotel/api/employment-contracts/', {'page_size': 1000})
+
+        self.assertEqual(len(response.data['results']), 1000)
+        self.assertEqual(response.data['results'][0]['position_name'], 'Администратор')
+        self.assertEqual(response.data['results'][0]['employee_first_name'], 'Сотрудник0')
+
+
+class BenchmarkSuiteTest(APITestCase):
+    # Задержка зависит от машины, поэтому в тестах проверяются только статусы ответов и бюджеты запросов
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = generate_dataset(scale=0.1, years=1, seed=1)
+
+    def test_dataset_is_consistent(self):
+        self.assertEqual(Room.objects.count(), self.counts['rooms'])
+        self.assertEqual(Reservation.objects.count(), self.counts['reservations'])
+        self.assertFalse(Reservation.objects.filter(departure_date__lte=F('arrival_date')).exists())
+        self.assertEqual(
+            Room.objects.filter(status='OCCUPIED').count(),
+            Reservation.objects.filter(status='CHECKED_IN').values('room').distinct().count(),
+        )
+
+    def test_benchmarks_stay_within_query_budgets(self):
+        with self.settings(HOTEL_PROFILING_ENABLED=False):
+            results = run_benchmarks(rounds=1, warmup=1, check_latency=False)
+
+        self.assertEqual({result['name']: result['failures'] for result in results if result['failures']}, {})
+
+
+class QueryPlanCheckTest(TestCase):
+    def test_view_queries_use_indexes(self):
+        output = StringIO()
+
+        call_command('check_query_plans', stdout=output)
+
+        self.assertIn('Клиенты, проживавшие в комнате в период: OK', output.getvalue())
+
+
+class ProfilingMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='admin')
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        Room.objects.create(number=101, type=room_type, phone='101')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client.force_authenticate(self.user)
+
+    def test_response_reports_server_timing(self):
+        response = self.client.get('/hotel/rooms')
+
+        timing = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'total'})
+        self.assertRegex(timing['db'], r'desc="[1-9]\d* queries"')
+        self.assertNotIn('X-Duplicate-Queries', response)
+
+    @override_settings(HOTEL_PROFILING_ENABLED=False)
+    def test_disabled_profiling_is_removed_from_the_chain(self):
+        response = self.client.get('/hotel/rooms')
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_repeated_query_pattern_is_flagged(self):
+        profile = RequestProfile()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for room_ids in ([1], [1, 2], [1, 2, 3]):
+            placeholders = ', '.join(['%s'] * len(room_ids))
+            profile.execute(execute, f'SELECT * FROM room WHERE id IN ({placeholders})', room_ids, False, {})
+        profile.execute(execute, 'SELECT * FROM client WHERE id = %s', [1], False, {})
+
+        self.assertEqual(profile.query_count, 4)
+        self.assertEqual(profile.duplicates(threshold=3), [('SELECT * FROM room WHERE id IN (%s)', 3)])
+
+    def test_queries_on_pool_connections_are_counted(self):
+        # gather_queries вне транзакции выполняет функции в потоках пула с копией контекста запроса
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return connection.execute_wrappers[:]
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                wrappers = pool.submit(contextvars.copy_context().run, in_own_connection(query)).result()
+        finally:
+            current_profile.reset(token)
+
+        self.assertEqual(profile.query_count, 1)
+        self.assertEqual(wrappers, [profile.execute])
+
+    def test_middleware_chain_stays_async_under_asgi(self):
+        # Синхронный middleware в цепочке заставил бы Django обернуть остаток цепочки в SyncToAsync
+        handler = ASGIHandler()
+
+        chain = handler._middleware_chain
+        middleware = []
+        while hasattr(getattr(chain, '__wrapped__', None), 'get_response'):
+            self.assertTrue(iscoroutinefunction(chain))
+            middleware.append(type(chain.__wrapped__))
+            chain = chain.__wrapped__.get_response
+
+        self.assertTrue(iscoroutinefunction(chain))
+        self.assertEqual(chain.__wrapped__, handler._get_response_async)
+        self.assertEqual(middleware[0], ProfilingMiddleware)
+        self.assertEqual(len(middleware), len(settings.MIDDLEWARE))
+        self.assertFalse(any(isinstance(method, SyncToAsync) for method in handler._template_response_middleware))
+
+    async def test_async_requests_are_profiled(self):
+        token = await Token.objects.acreate(user=self.user)
+
+        response = await AsyncClient().get('/hotel/rooms/status-counts',
+                                           headers={'Authorization': f'Token {token.key}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries".*render;dur=')
+
+    def test_metrics_are_exported_per_route(self):
+        self.client.get('/hotel/rooms')
+        self.client.get('/hotel/rooms', {'status': 'available'})
+
+        metrics = self.client.get('/metrics')
+
+        self.assertEqual(metrics.status_code, 200)
+        body = metrics.content.decode()
+        self.assertIn('hotel_http_requests_total{method="GET",route="hotel/rooms",status="200"} 2', body)
+        self.assertIn('hotel_http_request_duration_seconds_count{method="GET",route="hotel/rooms"} 2', body)
+
+
+class AsyncDashboardViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='admin', password='admin')
+        cls.token = Token.objects.create(user=user)
+        room_type = RoomType.objects.create(name='Одноместный', capacity=1)
+        room = Room.objects.create(number=101, type=room_type, phone='101', status='OCCUPIED')
+        client = Client.objects.create(passport_number='1', first_name='Иван', last_name='Иванов', city_from='Москва')
+        cls.today = date.today()
+        Reservation.objects.create(
+            room=room, client=client, admin=user, status='CHECKED_IN',
+            arrival_date=cls.today - timedelta(days=1), departure_date=cls.today + timedelta(days=1),
+            price_at_booking=5000, final_price=5000,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_dashboard_requests_are_served_over_asgi(self):
+        client = AsyncClient()
+        headers = {'Authorization': f'Token {self.token.key}'}
+        today = self.today.isoformat()
+
+        rooms, clients, missing_room = await asyncio.gather(
+            client.get('/hotel/rooms', {'status': 'OCCUPIED'}, headers=headers),
+            client.get('/hotel/clients', {'start_date': today, 'end_date': today}, headers=headers),
+            client.get('/hotel/clients', {'room': 999}, headers=headers),
+        )
+
+        self.assertEqual(rooms.status_code, 200)
+        self.assertEqual(rooms.json()['rooms'][0]['current_client']['passport_number'], '1')
+        self.assertEqual(clients.status_code, 200)
+        self.assertEqual([row['passport_number'] for row in clients.json()['clients']], ['1'])
+        self.assertEqual(missing_room.status_code, 404)
+
+    async def test_client_stream_is_served_asynchronously(self):
+        response = await AsyncClient().get('/hotel/clients', {'stream': 'ndjson'},
+                                           headers={'Authorization': f'Token {self.token.key}'})
+
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).splitlines()
+        self.assertEqual([json.loads(line)['passport_number'] for line in lines], ['1'])
+
+    async def test_quarterly_report_requires_authentication(self):
+        response = await AsyncClient().get('/hotel/reports/quarterly', {'quarter': 1, 'year': self.today.year})
+
+        self.assertEqual(response.status_code, 401)
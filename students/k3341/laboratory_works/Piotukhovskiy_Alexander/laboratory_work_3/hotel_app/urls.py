@@ -4,18 +4,29 @@ from rest_framework.routers import DefaultRouter
 from hotel_app.views import ClientsListView, RoomsByStatusView, ClientStayOverlapView, ClientRoomCleaningView, \
     EmployeeManagementView, CleaningScheduleManagementView, ReservationManagementView, QuarterlyReportView, \
     ClientViewSet, RoomViewSet, ReservationViewSet, EmployeeViewSet, CleaningScheduleViewSet, PublicEndpoint, \
-    EmployeePositionsViewSet, EmploymentContractViewSet
+    EmployeePositionsViewSet, EmploymentContractViewSet, RoomAvailabilityView, StayQuoteView, \
+    MonthlyReportView, RangeReportView, BatchClientStayOverlapView, ImportView, CleaningPlanView, RoomStatusCountsView, \
+    OccupancyReportView
 
 urlpatterns = [
     path('clients', ClientsListView.as_view(), name='clients-list'),
     path('rooms', RoomsByStatusView.as_view(), name='available-rooms-count'),
+    path('rooms/status-counts', RoomStatusCountsView.as_view(), name='room-status-counts'),
+    path('rooms/availability', RoomAvailabilityView.as_view(), name='rooms-availability'),
     path('clients/stay-overlap', ClientStayOverlapView.as_view(), name='client-stay-overlap'),
+    path('clients/stay-overlap/batch', BatchClientStayOverlapView.as_view(), name='client-stay-overlap-batch'),
     path('clients/room-cleaner', ClientRoomCleaningView.as_view(), name='client-room-cleaning'),
     path('employees/manage', EmployeeManagementView.as_view(), name='employee-management'),
     path('cleaning-schedules/manage', CleaningScheduleManagementView.as_view(), name='update-cleaning-schedule'),
+    path('cleaning-schedules/plan', CleaningPlanView.as_view(), name='plan-cleaning-schedule'),
     path('reservation', ReservationManagementView.as_view(), name='create-reservation'),
+    path('reservation/quotes', StayQuoteView.as_view(), name='reservation-quotes'),
     path('reservation/<int:reservation_id>', ReservationManagementView.as_view(), name='update-reservation'),
     path('reports/quarterly', QuarterlyReportView.as_view(), name='quarterly-report'),
+    path('reports/monthly', MonthlyReportView.as_view(), name='monthly-report'),
+    path('reports/range', RangeReportView.as_view(), name='range-report'),
+    path('reports/occupancy', OccupancyReportView.as_view(), name='occupancy-report'),
+    path('import/<str:kind>', ImportView.as_view(), name='bulk-import'),
     path("health", PublicEndpoint.as_view(), name='hello-world')
 ]
 
@@ -1,24 +1,51 @@
 import calendar
-from datetime import datetime, timedelta
+import codecs
+from datetime import date
+from functools import partial
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ValidationError as DRFValidationError
 from django.db import transaction
-from django.db.models import Q, Sum, Count, F, ExpressionWrapper, IntegerField
-from django.db.models.functions import Cast, Substr
+from django.db.models import Prefetch
 from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, viewsets
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from .models import Reservation, Client, Room, CleaningSchedule, Employee, EmployeePosition, EmploymentContract, \
-    RoomPriceHistory
+    BLOCKING_RESERVATION_STATUSES, RoomType, DailyRoomRevenue
 from .serializers import ClientSerializer, RoomSerializer, ClientStayOverlapSerializer, CleaningEmployeeSerializer, \
     ClientRoomCleaningSerializer, HireEmployeeSerializer, FireEmployeeSerializer, EmploymentContractDetailSerializer, \
     UpdateEmployeeSerializer, UpdateCleaningScheduleSerializer, CreateReservationSerializer, \
     UpdateReservationSerializer, QuarterlyReportSerializer, ReservationSerializer, EmployeeSerializer, \
-    CleaningScheduleSerializer, EmployeePositionSerializer
+    CleaningScheduleSerializer, EmployeePositionSerializer, RoomAvailabilitySerializer, BatchStayQuoteSerializer, \
+    MonthlyReportSerializer, RangeReportSerializer, BatchClientStayOverlapSerializer, ImportUploadSerializer, \
+    PlanCleaningScheduleSerializer, OccupancyReportSerializer, ClientSearchSerializer
+from .asynchronous import AsyncGenericAPIView, gather_queries
+from .availability import available_rooms, is_room_free, lock_room
+from .booking import BookingError, book_stay, release_room
+from .cache import cached_response
+from .client_search import CLIENT_ORDERINGS, filter_clients, search_clients
+from .cleaning import NoActiveContract, assign_cleanings, plan_cleanings, room_cleanings
+from .imports import IMPORTERS, read_rows
+from .occupancy import GRANULARITIES, build_occupancy_report
+from .stays import co_resident_client_ids, overlapping_clients
+from .pricing import quote_stay, quote_stays
+from .pagination import StreamingListMixin, stream_format
+from .room_states import apply_event, can_apply, status_counts
+from .relations import cleanings_by_id, latest_reservation, link_relations, reservations_by_id, \
+    rooms_with_pointers, split_pointers
+from .rollups import abuild_revenue_report, build_revenue_report
+
+
+# Модели, данные которых попадают в представление комнаты (текущий клиент и последний уборщик)
+ROOM_DEPENDENCIES = (Room, RoomType, Reservation, Client, CleaningSchedule, EmploymentContract, Employee)
+REPORT_DEPENDENCIES = (DailyRoomRevenue, Room)
+OCCUPANCY_DEPENDENCIES = (Reservation, Room, RoomType)
 
 
 class PublicEndpoint(generics.GenericAPIView):
@@ -31,79 +58,89 @@ class PublicEndpoint(generics.GenericAPIView):
         return Response({"message": "Hello POST world!"})
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
 
+    @cached_response(Client)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class RoomViewSet(viewsets.ModelViewSet):
-    queryset = Room.objects.all()
+
+class RoomViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = Room.objects.select_related('type')
     serializer_class = RoomSerializer
 
+    @cached_response(*ROOM_DEPENDENCIES)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.all()
-    serializer_class = ReservationSerializer
+    # Запись в журнал статусов и счётчики идут сигналами: вместе с комнатой в одной транзакции
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
-    serializer_class = EmployeeSerializer
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
-class EmploymentContractViewSet(viewsets.ModelViewSet):
-    queryset = EmploymentContract.objects.all()
-    serializer_class = EmploymentContractDetailSerializer
+class ReservationViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.select_related('client', 'room__type')
+    serializer_class = ReservationSerializer
 
+    @cached_response(*ROOM_DEPENDENCIES)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class EmployeePositionsViewSet(viewsets.ModelViewSet):
-    queryset = EmployeePosition.objects.all()
-    serializer_class = EmployeePositionSerializer
 
+class EmployeeViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    # Должность из активного контракта загружается одним запросом на страницу, а не двумя на сотрудника
+    queryset = Employee.objects.prefetch_related(Prefetch(
+        'employmentcontract_set',
+        queryset=EmploymentContract.objects.filter(is_active=True).select_related('position').order_by('id'),
+        to_attr='active_contracts',
+    ))
+    serializer_class = EmployeeSerializer
 
-class CleaningScheduleViewSet(viewsets.ModelViewSet):
-    queryset = CleaningSchedule.objects.all()
-    serializer_class = CleaningScheduleSerializer
+    @cached_response(Employee, EmploymentContract, EmployeePosition)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
-class ClientsListView(generics.ListAPIView):
-    serializer_class = ClientSerializer
-
-    def get_queryset(self):
-        room_number = self.request.query_params.get('room', None)
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
-        city_name = self.request.query_params.get('city', None)
+class EmploymentContractViewSet(viewsets.ModelViewSet):
+    queryset = EmploymentContract.objects.select_related('employee', 'position')
+    serializer_class = EmploymentContractDetailSerializer
 
-        queryset = Client.objects.all()
+    @cached_response(EmploymentContract, Employee, EmployeePosition)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-        if room_number:
-            try:
-                room_number = Room.objects.get(number=room_number)
-            except Room.DoesNotExist:
-                return Client.objects.none()
 
-            reservations = Reservation.objects.filter(room=room_number)
-            client_ids = reservations.values_list('client_id', flat=True)
-            queryset = queryset.filter(id__in=client_ids)
+class EmployeePositionsViewSet(viewsets.ModelViewSet):
+    queryset = EmployeePosition.objects.all()
+    serializer_class = EmployeePositionSerializer
 
-        if start_date or end_date:
-            date_filter = Q()
+    @cached_response(EmployeePosition)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-            if start_date:
-                date_filter &= Q(departure_date__gte=start_date)
 
-            if end_date:
-                date_filter &= Q(arrival_date__lte=end_date)
+class CleaningScheduleViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = CleaningSchedule.objects.select_related('cleaner__employee', 'room__type')
+    serializer_class = CleaningScheduleSerializer
 
-            reservations = Reservation.objects.filter(date_filter)
-            client_ids = reservations.values_list('client_id', flat=True)
-            queryset = queryset.filter(id__in=client_ids)
+    @cached_response(CleaningSchedule, EmploymentContract, Employee, Room, RoomType)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-        if city_name:
-            queryset = queryset.filter(city_from__icontains=city_name)
 
-        return queryset
+class ClientsListView(StreamingListMixin, AsyncGenericAPIView):
+    serializer_class = ClientSerializer
 
     @swagger_auto_schema(
         operation_description="Получить список клиентов с возможностью фильтрации по номеру комнаты, датам проживания и городу.",
@@ -111,7 +148,8 @@ class ClientsListView(generics.ListAPIView):
             openapi.Parameter(
                 'room',
                 openapi.IN_QUERY,
-                description="Номер комнаты для фильтрации. Возвращаются клиенты, проживавшие в указанной комнате.",
+                description="Номер комнаты для фильтрации. Возвращаются клиенты, проживавшие в указанной комнате "
+                            "(вместе с датами — в этой комнате в указанный период).",
                 type=openapi.TYPE_INTEGER,
                 required=False,
             ),
@@ -138,6 +176,35 @@ class ClientsListView(generics.ListAPIView):
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
+            openapi.Parameter(
+                'ordering',
+                openapi.IN_QUERY,
+                description="Поле сортировки, '-' в начале — по убыванию. По умолчанию 'id'.",
+                type=openapi.TYPE_STRING,
+                enum=CLIENT_ORDERINGS + [f'-{field}' for field in CLIENT_ORDERINGS],
+                required=False,
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Курсор страницы из полей 'next' или 'previous' предыдущего ответа.",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Количество клиентов на странице (не более 1000).",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'stream',
+                openapi.IN_QUERY,
+                description="Потоковая выгрузка всех клиентов без пагинации: '1' или 'json' — JSON-массив, 'ndjson' — NDJSON.",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -145,6 +212,8 @@ class ClientsListView(generics.ListAPIView):
                 examples={
                     "application/json": {
                         "count": 2,
+                        "next": None,
+                        "previous": None,
                         "clients": [
                             {
                                 "id": 1,
@@ -176,28 +245,54 @@ class ClientsListView(generics.ListAPIView):
                     }
                 },
             ),
+            422: openapi.Response(
+                description="Некорректные параметры фильтрации, сортировки или курсор.",
+                examples={
+                    "application/json": {
+                        "cursor": ["Курсор относится к другой сортировке."]
+                    }
+                },
+            ),
         },
     )
-    def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+    @cached_response(Client, Reservation, Room)
+    async def get(self, request, *args, **kwargs):
+        search = ClientSearchSerializer(data=request.query_params)
+        if not search.is_valid():
+            return Response(search.errors, status=422)
+
+        params = search.validated_data
+        queryset = filter_clients(
+            params.get('room'), params.get('start_date'), params.get('end_date'), params.get('city')
+        )
 
-        clients_count = queryset.count()
+        format_name = stream_format(request)
+        if format_name:
+            field = params['ordering'].lstrip('-')
+            order = [params['ordering'], 'id' if field == params['ordering'] else '-id']
+            return self.astream_response(queryset.order_by(*order), ndjson=format_name == 'ndjson')
 
-        if clients_count > 0:
-            serializer = self.get_serializer(queryset, many=True)
+        result = await sync_to_async(search_clients)(
+            queryset, params['ordering'], params.get('cursor'), params['page_size']
+        )
+
+        if result['count'] > 0:
+            url = request.build_absolute_uri()
             return Response({
-                "count": clients_count,
-                "clients": serializer.data
+                "count": result['count'],
+                "next": replace_query_param(url, 'cursor', result['next']) if result['next'] else None,
+                "previous": replace_query_param(url, 'cursor', result['previous']) if result['previous'] else None,
+                "clients": self.get_serializer(result['clients'], many=True).data
             })
         else:
             return Response({
                 "detail": "Не найдено ни одного клиента по заданным фильтрам.",
-                "count": clients_count,
+                "count": result['count'],
                 "clients": []
             }, status=404)
 
 
-class RoomsByStatusView(generics.GenericAPIView):
+class RoomsByStatusView(AsyncGenericAPIView):
 
     @swagger_auto_schema(
         operation_description="Получить список комнат по их статусам. Возвращает комнаты с указанными статусами и общее их количество.",
@@ -261,9 +356,10 @@ class RoomsByStatusView(generics.GenericAPIView):
             ),
         },
     )
-    def get(self, request, *args, **kwargs):
+    @cached_response(*ROOM_DEPENDENCIES)
+    async def get(self, request, *args, **kwargs):
         statuses = request.query_params.get('status', None)
-        rooms_queryset = Room.objects.all()
+        status_list = None
         if statuses:
             status_list = [status.strip().upper() for status in statuses.split(',') if status.strip()]
             valid_statuses = [choice[0] for choice in Room.STATUS_CHOICES]
@@ -273,9 +369,21 @@ class RoomsByStatusView(generics.GenericAPIView):
                     {"detail": f"Недопустимые статусы: {invalid_statuses}. Доступные статусы: {valid_statuses}"},
                     status=422
                 )
-            rooms_queryset = rooms_queryset.filter(status__in=status_list)
-        rooms_count = rooms_queryset.count()
-        rooms_data = RoomSerializer(rooms_queryset, many=True).data
+        rooms_queryset = rooms_with_pointers(status_list)
+
+        # Комнаты приходят сразу с идентификаторами связей, а текущие бронирования и последние уборки
+        # запрашиваются параллельно
+        rooms = [room async for room in rooms_queryset.aiterator()]
+        room_pointers, reservation_ids, cleaning_ids = split_pointers(
+            (room.id, room.status, room.current_reservation_id, room.last_cleaning_id) for room in rooms
+        )
+        reservations, cleanings = await gather_queries(
+            partial(reservations_by_id, reservation_ids), partial(cleanings_by_id, cleaning_ids)
+        )
+        room_relations = link_relations(room_pointers, reservations, cleanings)
+
+        rooms_data = RoomSerializer(rooms, many=True, context={'room_relations': room_relations}).data
+        rooms_count = len(rooms_data)
 
         return Response({
             "count": rooms_count,
@@ -283,6 +391,130 @@ class RoomsByStatusView(generics.GenericAPIView):
         })
 
 
+class RoomStatusCountsView(AsyncGenericAPIView):
+
+    @swagger_auto_schema(
+        operation_description="Получить число комнат в каждом статусе. Значения берутся из таблицы счётчиков, "
+                              "которая обновляется вместе со статусом комнаты, а не подсчитываются по комнатам.",
+        manual_parameters=[
+            openapi.Parameter(
+                'status',
+                openapi.IN_QUERY,
+                description="Список статусов комнат через запятую (необязательно). По умолчанию — все статусы.",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Число комнат по статусам.",
+                examples={
+                    "application/json": {
+                        "AVAILABLE": 34,
+                        "OCCUPIED": 5,
+                        "MAINTENANCE": 1
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Указаны недопустимые статусы.",
+                examples={
+                    "application/json": {
+                        "detail": "Недопустимые статусы: ['INVALID_STATUS']."
+                    }
+                },
+            ),
+        },
+    )
+    async def get(self, request, *args, **kwargs):
+        statuses = request.query_params.get('status')
+        status_list = None
+        if statuses:
+            status_list = [status.strip().upper() for status in statuses.split(',') if status.strip()]
+            valid_statuses = [choice[0] for choice in Room.STATUS_CHOICES]
+            invalid_statuses = [status for status in status_list if status not in valid_statuses]
+            if invalid_statuses:
+                return Response({"detail": f"Недопустимые статусы: {invalid_statuses}."}, status=422)
+
+        return Response(await sync_to_async(status_counts)(status_list))
+
+
+class RoomAvailabilityView(generics.GenericAPIView):
+    serializer_class = RoomAvailabilitySerializer
+
+    @swagger_auto_schema(
+        operation_description="Получить список комнат, свободных на весь указанный период проживания.",
+        manual_parameters=[
+            openapi.Parameter(
+                'from',
+                openapi.IN_QUERY,
+                description="Дата заселения (формат YYYY-MM-DD).",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+            openapi.Parameter(
+                'to',
+                openapi.IN_QUERY,
+                description="Дата выезда (формат YYYY-MM-DD). Ночь перед выездом входит в период.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+            openapi.Parameter(
+                'type',
+                openapi.IN_QUERY,
+                description="ID типа номера для фильтрации.",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Список комнат, свободных в указанный период.",
+                examples={
+                    "application/json": {
+                        "count": 1,
+                        "rooms": [
+                            {
+                                "id": 1,
+                                "number": 101,
+                                "type_id": 1,
+                                "type_name": "Одноместный",
+                                "phone": "1234567890",
+                                "status": "AVAILABLE",
+                                "current_client": None,
+                                "last_cleaner": None
+                            }
+                        ]
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации. Например, дата выезда раньше даты заселения.",
+                examples={
+                    "application/json": {
+                        "to": ["Дата выезда должна быть позже даты заселения."]
+                    }
+                },
+            ),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        validated_data = serializer.validated_data
+        rooms = available_rooms(validated_data['from'], validated_data['to'], validated_data.get('type'))
+        rooms_data = RoomSerializer(rooms, many=True).data
+
+        return Response({
+            "count": len(rooms_data),
+            "rooms": rooms_data
+        })
+
+
 class ClientStayOverlapView(generics.GenericAPIView):
     serializer_class = ClientStayOverlapSerializer
 
@@ -378,34 +610,79 @@ class ClientStayOverlapView(generics.GenericAPIView):
                 status=404
             )
 
-        client_reservations = Reservation.objects.filter(client=target_client)
+        clients_data = ClientSerializer(
+            overlapping_clients(target_client.id, start_date, end_date), many=True
+        ).data
 
-        date_filter = Q()
-        if start_date:
-            date_filter &= Q(arrival_date__gte=start_date)
-        if end_date:
-            date_filter &= Q(departure_date__lte=end_date)
+        return Response({
+            "count": len(clients_data),
+            "clients": clients_data
+        })
 
-        if date_filter:
-            client_reservations = client_reservations.filter(date_filter)
 
-        overlapping_filter = Q()
-        for reservation in client_reservations:
-            overlapping_filter |= Q(arrival_date__lt=reservation.departure_date) & Q(
-                departure_date__gt=reservation.arrival_date)
+class BatchClientStayOverlapView(generics.GenericAPIView):
+    serializer_class = BatchClientStayOverlapSerializer
 
-        if overlapping_filter:
-            overlapping_reservations = Reservation.objects.filter(overlapping_filter).exclude(client=target_client)
-            overlapping_clients_ids = overlapping_reservations.values_list('client_id', flat=True).distinct()
-            overlapping_clients = Client.objects.filter(id__in=overlapping_clients_ids)
-        else:
-            overlapping_clients = Client.objects.none()
+    @swagger_auto_schema(
+        operation_description="Получить списки клиентов, проживавших в те же дни, для нескольких клиентов за один запрос.",
+        request_body=BatchClientStayOverlapSerializer,
+        responses={
+            200: openapi.Response(
+                description="ID пересекающихся клиентов для каждого из заданных клиентов.",
+                examples={
+                    "application/json": {
+                        "count": 2,
+                        "results": [
+                            {"client_id": 1, "count": 2, "client_ids": [2, 5]},
+                            {"client_id": 3, "count": 0, "client_ids": []}
+                        ]
+                    }
+                },
+            ),
+            404: openapi.Response(
+                description="Некоторые клиенты не найдены.",
+                examples={
+                    "application/json": {
+                        "detail": "Клиенты с id [123] не найдены."
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных.",
+                examples={
+                    "application/json": {
+                        "detail": "Дата окончания не может быть раньше даты начала."
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        overlap_serializer = self.get_serializer(data=request.data)
+        if not overlap_serializer.is_valid():
+            return Response(overlap_serializer.errors, status=422)
+
+        validated_data = overlap_serializer.validated_data
+        client_ids = list(dict.fromkeys(validated_data['client_ids']))
 
-        clients_data = ClientSerializer(overlapping_clients, many=True).data
+        existing_ids = set(Client.objects.filter(id__in=client_ids).values_list('id', flat=True))
+        missing_ids = [client_id for client_id in client_ids if client_id not in existing_ids]
+        if missing_ids:
+            return Response(
+                {"detail": f"Клиенты с id {missing_ids} не найдены."},
+                status=404
+            )
+
+        co_residents = co_resident_client_ids(
+            client_ids, validated_data.get('start_date'), validated_data.get('end_date')
+        )
 
         return Response({
-            "count": overlapping_clients.count(),
-            "clients": clients_data
+            "count": len(client_ids),
+            "results": [
+                {"client_id": client_id, "count": len(ids), "client_ids": ids}
+                for client_id, ids in co_residents.items()
+            ]
         })
 
 
@@ -492,19 +769,14 @@ class ClientRoomCleaningView(generics.GenericAPIView):
                 status=404
             )
 
-        try:
-            reservation = Reservation.objects.filter(client=target_client).latest('departure_date')
-            room = reservation.room
-        except Reservation.DoesNotExist:
+        reservation = latest_reservation(target_client.id).first()
+        if reservation is None:
             return Response(
                 {"detail": f"Нет активных или завершённых бронирований для клиента с id {client_id}."},
                 status=404
             )
 
-        cleaning_schedules = CleaningSchedule.objects.filter(
-            room=room,
-            cleaning_date__week_day=self.get_day_number(day_of_week)
-        )
+        cleaning_schedules = room_cleanings(reservation.room_id, self.get_day_number(day_of_week))
 
         employees = [schedule.cleaner.employee for schedule in cleaning_schedules]
         employees_data = CleaningEmployeeSerializer(employees, many=True).data
@@ -870,7 +1142,17 @@ class CleaningScheduleManagementView(generics.GenericAPIView):
                 description="Расписание уборок успешно обновлено.",
                 examples={
                     "application/json": {
-                        "detail": "Расписание успешно обновлено."
+                        "detail": "Расписание успешно обновлено.",
+                        "created": [
+                            {"room_number": 101, "cleaning_date": "2024-12-05", "cleaner_id": 3}
+                        ],
+                        "reassigned": [],
+                        "conflicts": [
+                            {"room_number": 102, "cleaning_date": "2024-12-05", "cleaner_id": 4,
+                             "status": "COMPLETED"}
+                        ],
+                        "skipped": [],
+                        "unchanged": 0
                     }
                 },
             ),
@@ -894,31 +1176,82 @@ class CleaningScheduleManagementView(generics.GenericAPIView):
             cleaning_dates = validated_data['cleaning_dates']
             room_numbers = validated_data['room_ids']
 
-            with transaction.atomic():
-                rooms = Room.objects.filter(number__in=room_numbers)
-
-                CleaningSchedule.objects.filter(
-                    cleaner_id=cleaner_id,
-                    cleaning_date__in=cleaning_dates,
-                    room__in=rooms
-                ).delete()
-
-                schedules = [
-                    CleaningSchedule(
-                        cleaner_id=cleaner_id,
-                        room=room,
-                        cleaning_date=cleaning_date
-                    )
-                    for cleaning_date in cleaning_dates
-                    for room in rooms
-                ]
-                CleaningSchedule.objects.bulk_create(schedules)
+            try:
+                diff = assign_cleanings(cleaner_id, room_numbers, cleaning_dates)
+            except NoActiveContract as error:
+                return Response({"cleaner_id": [str(error)]}, status=422)
 
-            return Response({"detail": "Расписание успешно обновлено."})
+            return Response({"detail": "Расписание успешно обновлено.", **diff.as_dict()})
 
         return Response(serializer.errors, status=422)
 
 
+class CleaningPlanView(generics.GenericAPIView):
+    serializer_class = PlanCleaningScheduleSerializer
+
+    @swagger_auto_schema(
+        operation_description="Составить расписание уборок на период: каждая комната убирается в день выезда гостей, "
+                              "уборки равномерно распределяются между сотрудниками с активными контрактами. "
+                              "Уже назначенные уборки не меняются, не начатые уборки уволенных сотрудников переназначаются.",
+        request_body=PlanCleaningScheduleSerializer,
+        responses={
+            200: openapi.Response(
+                description="Изменения расписания. При dry_run=true изменения только рассчитываются.",
+                examples={
+                    "application/json": {
+                        "start_date": "2024-12-01",
+                        "end_date": "2024-12-31",
+                        "cleaners_count": 2,
+                        "created": [
+                            {"room_number": 101, "cleaning_date": "2024-12-05", "cleaner_id": 3}
+                        ],
+                        "reassigned": [
+                            {"room_number": 102, "cleaning_date": "2024-12-06", "cleaner_id": 4,
+                             "previous_cleaner_id": 1}
+                        ],
+                        "conflicts": [],
+                        "skipped": [],
+                        "unchanged": 12
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных или нет сотрудников с активными контрактами.",
+                examples={
+                    "application/json": {
+                        "detail": "Нет сотрудников с активными контрактами для распределения уборок."
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        validated_data = serializer.validated_data
+        diff = plan_cleanings(
+            validated_data['start_date'],
+            validated_data['end_date'],
+            room_numbers=validated_data.get('room_ids'),
+            employee_ids=validated_data.get('cleaner_ids'),
+            dry_run=validated_data['dry_run'],
+        )
+        if not diff.cleaners_count:
+            return Response(
+                {"detail": "Нет сотрудников с активными контрактами для распределения уборок."},
+                status=422
+            )
+
+        return Response({
+            "start_date": validated_data['start_date'],
+            "end_date": validated_data['end_date'],
+            "cleaners_count": diff.cleaners_count,
+            **diff.as_dict()
+        })
+
+
 class ReservationManagementView(generics.GenericAPIView):
     serializer_classes = {
         'post': CreateReservationSerializer,
@@ -1015,52 +1348,18 @@ class ReservationManagementView(generics.GenericAPIView):
         if serializer.is_valid():
             validated_data = serializer.validated_data
 
-            passport_number = validated_data['passport_number']
-            first_name = validated_data['first_name']
-            last_name = validated_data['last_name']
-            middle_name = validated_data.get('middle_name')
-            city_from = validated_data['city_from']
-            room = validated_data['room']
-            arrival_date = validated_data['arrival_date']
-            departure_date = validated_data['departure_date']
-            status = request.data.get('status', None)
-            payment_status = request.data.get('payment_status', None)
-
-            with transaction.atomic():
-                client, created = Client.objects.get_or_create(
-                    passport_number=passport_number,
-                    defaults={
-                        "first_name": first_name,
-                        "last_name": last_name,
-                        "middle_name": middle_name,
-                        "city_from": city_from
-                    }
-                )
-
-                if not created:
-                    client.first_name = first_name
-                    client.last_name = last_name
-                    client.middle_name = middle_name
-                    client.city_from = city_from
-                    client.save()
-
-                total_price = self.calculate_total_price(room, arrival_date, departure_date)
-
-                reservation = Reservation.objects.create(
-                    client=client,
-                    room=room,
+            try:
+                reservation, client, room = book_stay(
                     admin=request.user,
-                    booking_date=datetime.now(),
-                    arrival_date=arrival_date,
-                    departure_date=departure_date,
-                    status=status or Reservation._meta.get_field('status').get_default(),
-                    payment_status=payment_status or Reservation._meta.get_field('payment_status').get_default(),
-                    price_at_booking=total_price,
-                    final_price=total_price,
+                    room_number=validated_data['room_number'],
+                    arrival_date=validated_data['arrival_date'],
+                    departure_date=validated_data['departure_date'],
+                    client_data=validated_data,
+                    status=validated_data.get('status'),
+                    payment_status=validated_data.get('payment_status'),
                 )
-
-                room.status = 'OCCUPIED'
-                room.save()
+            except BookingError as error:
+                return Response(error.errors, status=422)
 
             return Response(
                 {
@@ -1152,43 +1451,77 @@ class ReservationManagementView(generics.GenericAPIView):
     def patch(self, request, *args, **kwargs):
         reservation_id = kwargs.get('reservation_id')
 
-        try:
-            reservation = Reservation.objects.select_for_update().get(id=reservation_id)
-        except Reservation.DoesNotExist:
-            return Response(
-                {"detail": "Бронирование с указанным ID не найдено."},
-                status=404
-            )
-
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             validated_data = serializer.validated_data
 
             with transaction.atomic():
+                # Бронирование ищется и блокируется одним запросом в транзакции: удалённое параллельно
+                # между проверкой и блокировкой даёт 404, а не необработанное исключение
+                reservation = Reservation.objects.select_for_update().filter(id=reservation_id).first()
+                if reservation is None:
+                    return Response(
+                        {"detail": "Бронирование с указанным ID не найдено."},
+                        status=404
+                    )
+
+                # Обе комнаты переезда блокируются сразу и в порядке id: встречные переносы (A→B и B→A)
+                # берут блокировки в одном порядке и не взаимоблокируются
+                target_room_id = validated_data['room'].id if 'room' in validated_data else reservation.room_id
+                rooms = {room_id: lock_room(room_id) for room_id in sorted({reservation.room_id, target_room_id})}
+                target_room = rooms[target_room_id]
+                arrival_date = validated_data.get('arrival_date', reservation.arrival_date)
+                departure_date = validated_data.get('departure_date', reservation.departure_date)
+                target_status = validated_data.get('status', reservation.status)
+
+                if departure_date <= arrival_date:
+                    return Response(
+                        {"departure_date": "Дата выезда должна быть позже даты прибытия."},
+                        status=422
+                    )
+
+                if target_status in BLOCKING_RESERVATION_STATUSES and not is_room_free(
+                        target_room, arrival_date, departure_date, exclude_reservation=reservation):
+                    return Response(
+                        {"room_number": f"Комната {target_room.number} уже забронирована на указанные даты."},
+                        status=422
+                    )
+
+                # Бронирование занимает комнату, пока его статус блокирующий: события выбираются по тому,
+                # занимало ли оно комнату до изменения и займёт ли после
+                room_moved = target_room.id != reservation.room_id
+                was_blocking = reservation.status in BLOCKING_RESERVATION_STATUSES
+                now_blocking = target_status in BLOCKING_RESERVATION_STATUSES
+                books_target = now_blocking and (room_moved or not was_blocking)
+                releases_previous = was_blocking and (room_moved or not now_blocking)
+                if books_target and not can_apply(target_room.status, 'BOOK'):
+                    return Response(
+                        {"room_number": f"Комната {target_room.number} недоступна: "
+                                        f"{target_room.get_status_display().lower()}."},
+                        status=422
+                    )
+
                 if 'arrival_date' in validated_data:
                     reservation.arrival_date = validated_data['arrival_date']
                 if 'departure_date' in validated_data:
                     reservation.departure_date = validated_data['departure_date']
 
                 previous_status = reservation.status
+                previous_room = rooms[reservation.room_id]
                 if 'status' in validated_data:
                     reservation.status = validated_data['status']
-
-                    if validated_data['status'] in ['CANCELED', 'CHECKED_OUT']:
-                        if validated_data['status'] == 'CANCELED' and previous_status != 'CHECKED_IN':
-                            reservation.room.status = 'AVAILABLE'
-                        elif validated_data['status'] == 'CHECKED_OUT' and previous_status == 'CHECKED_IN':
-                            reservation.room.status = 'REQUIRES_CLEANING'
-                        reservation.room.save()
-
                 if 'payment_status' in validated_data:
                     reservation.payment_status = validated_data['payment_status']
-                if 'room' in validated_data:
-                    reservation.room.status = 'AVAILABLE'
-                    reservation.room.save()
-                    reservation.room = validated_data['room']
-                    reservation.room.status = 'OCCUPIED'
-                    reservation.room.save()
+                if room_moved:
+                    reservation.room = target_room
+
+                # Статусы комнат меняются событиями жизненного цикла и попадают в журнал RoomStatusEvent.
+                # Заселённый гость, уходящий из комнаты (выезд, отмена, переезд), оставляет её на уборку
+                if releases_previous:
+                    release_room(previous_room, reservation, request.user,
+                                 event='CHECK_OUT' if previous_status == 'CHECKED_IN' else 'RELEASE')
+                if books_target:
+                    apply_event(target_room, 'BOOK', reservation=reservation, user=request.user)
 
                 if 'arrival_date' in validated_data or 'departure_date' in validated_data or 'room' in validated_data:
                     reservation.price_at_booking = self.calculate_total_price(
@@ -1218,25 +1551,94 @@ class ReservationManagementView(generics.GenericAPIView):
         return Response(serializer.errors, status=422)
 
     def calculate_total_price(self, room, arrival_date, departure_date):
-        total_price = 0
-        current_date = arrival_date
+        return quote_stay(room.type_id, arrival_date, departure_date)
 
-        price_history = RoomPriceHistory.objects.filter(
-            room_type=room.type
-        ).order_by('start_date')
 
-        while current_date < departure_date:
-            for price_period in price_history:
-                if price_period.start_date <= current_date and (
-                        price_period.end_date is None or price_period.end_date >= current_date):
-                    total_price += price_period.price
-                    break
+class StayQuoteView(generics.GenericAPIView):
+    serializer_class = BatchStayQuoteSerializer
 
-            current_date += timedelta(days=1)
-        return total_price
+    @swagger_auto_schema(
+        operation_description="Рассчитать стоимость нескольких проживаний за один запрос по текущим ценам.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'stays': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'room_type_id': openapi.Schema(
+                                type=openapi.TYPE_INTEGER,
+                                description="ID типа номера.",
+                            ),
+                            'arrival_date': openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                format=openapi.FORMAT_DATE,
+                                description="Дата заселения (формат YYYY-MM-DD).",
+                            ),
+                            'departure_date': openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                format=openapi.FORMAT_DATE,
+                                description="Дата выезда (формат YYYY-MM-DD).",
+                            ),
+                        },
+                        required=['room_type_id', 'arrival_date', 'departure_date'],
+                    ),
+                    description="Список проживаний для расчёта стоимости.",
+                ),
+            },
+            required=['stays'],
+        ),
+        responses={
+            200: openapi.Response(
+                description="Стоимость каждого проживания в порядке запроса.",
+                examples={
+                    "application/json": {
+                        "quotes": [
+                            {
+                                "room_type_id": 1,
+                                "arrival_date": "2024-12-10",
+                                "departure_date": "2024-12-15",
+                                "total_price": 25000
+                            }
+                        ]
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных. Например, дата выезда раньше даты заселения.",
+                examples={
+                    "application/json": {
+                        "stays": [{"departure_date": ["Дата выезда должна быть позже даты заселения."]}]
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        stays = serializer.validated_data['stays']
+        prices = quote_stays(
+            (stay['room_type_id'], stay['arrival_date'], stay['departure_date']) for stay in stays
+        )
+
+        return Response({
+            "quotes": [
+                {
+                    "room_type_id": stay['room_type_id'],
+                    "arrival_date": stay['arrival_date'],
+                    "departure_date": stay['departure_date'],
+                    "total_price": price,
+                }
+                for stay, price in zip(stays, prices)
+            ]
+        })
 
 
-class QuarterlyReportView(generics.GenericAPIView):
+class QuarterlyReportView(AsyncGenericAPIView):
 
     @swagger_auto_schema(
         operation_description="Сформировать отчет о работе гостиницы за указанный квартал текущего или прошлого года.",
@@ -1289,7 +1691,8 @@ class QuarterlyReportView(generics.GenericAPIView):
             ),
         },
     )
-    def get(self, request, *args, **kwargs):
+    @cached_response(*REPORT_DEPENDENCIES)
+    async def get(self, request, *args, **kwargs):
         serializer = QuarterlyReportSerializer(data=request.query_params)
         if not serializer.is_valid():
             return Response(serializer.errors, status=422)
@@ -1299,70 +1702,289 @@ class QuarterlyReportView(generics.GenericAPIView):
 
         start_date, end_date = self.get_quarter_date_range(quarter, year)
 
-        # Число клиентов за период в каждом номере
-        clients_per_room = (
-            Reservation.objects.filter(
-                arrival_date__gte=start_date,
-                departure_date__lte=end_date,
-                status__in=['BOOKED', 'CONFIRMED', 'CHECKED_IN', 'CHECKED_OUT']
-            )
-            .values('room__number')
-            .annotate(client_count=Count('id'))
-            .order_by('room__number')
-        )
+        return Response(await abuild_revenue_report(start_date, end_date), status=200)
 
-        # Количество номеров на каждом этаже
-        rooms_per_floor = (
-            Room.objects.annotate(
-                floor=ExpressionWrapper(
-                    Substr(F('number'), 1, 1),
-                    output_field=IntegerField()
-                )
-            )
-            .values('floor')
-            .annotate(room_count=Count('id'))
-            .order_by('floor')
+    def get_quarter_date_range(self, quarter, year):
+        start_month = (quarter - 1) * 3 + 1
+        end_month = start_month + 2
+
+        start_date = date(year, start_month, 1)
+        last_day = calendar.monthrange(year, end_month)[1]
+        end_date = date(year, end_month, last_day)
+
+        return start_date, end_date
+
+
+class MonthlyReportView(generics.GenericAPIView):
+
+    @swagger_auto_schema(
+        operation_description="Сформировать отчет о работе гостиницы за указанный месяц текущего или прошлого года.",
+        manual_parameters=[
+            openapi.Parameter(
+                'month',
+                openapi.IN_QUERY,
+                description="Номер месяца (от 1 до 12).",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+            openapi.Parameter(
+                'year',
+                openapi.IN_QUERY,
+                description="Год для отчета. Должен быть текущим или прошлым.",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Успешно сформированный отчет по месяцу. Формат совпадает с квартальным отчетом.",
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных. Например, указаны некорректный год или месяц.",
+                examples={
+                    "application/json": {
+                        "detail": "Год не может быть в будущем.",
+                    }
+                },
+            ),
+        },
+    )
+    @cached_response(*REPORT_DEPENDENCIES)
+    def get(self, request, *args, **kwargs):
+        serializer = MonthlyReportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        month = serializer.validated_data['month']
+        year = serializer.validated_data['year']
+
+        start_date = date(year, month, 1)
+        end_date = date(year, month, calendar.monthrange(year, month)[1])
+
+        return Response(build_revenue_report(start_date, end_date), status=200)
+
+
+class RangeReportView(generics.GenericAPIView):
+
+    @swagger_auto_schema(
+        operation_description="Сформировать отчет о работе гостиницы за произвольный период. "
+                              "Проживания, пересекающие границы периода, учитываются пропорционально ночам.",
+        manual_parameters=[
+            openapi.Parameter(
+                'start_date',
+                openapi.IN_QUERY,
+                description="Дата начала периода (формат YYYY-MM-DD), включительно.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+            openapi.Parameter(
+                'end_date',
+                openapi.IN_QUERY,
+                description="Дата окончания периода (формат YYYY-MM-DD), включительно.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Успешно сформированный отчет за период. Формат совпадает с квартальным отчетом.",
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных. Например, дата окончания раньше даты начала.",
+                examples={
+                    "application/json": {
+                        "non_field_errors": ["Дата окончания не может быть раньше даты начала."],
+                    }
+                },
+            ),
+        },
+    )
+    @cached_response(*REPORT_DEPENDENCIES)
+    def get(self, request, *args, **kwargs):
+        serializer = RangeReportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        return Response(
+            build_revenue_report(serializer.validated_data['start_date'], serializer.validated_data['end_date']),
+            status=200
         )
 
-        # Общая сумма дохода за каждый номер
-        income_per_room = (
-            Reservation.objects.filter(
-                arrival_date__gte=start_date,
-                departure_date__lte=end_date,
-                payment_status__in=['PREPAID', 'PAID'],
-            )
-            .values('room__number')
-            .annotate(total_income=Sum('price_at_booking'))
-            .order_by('room__number')
+
+class OccupancyReportView(generics.GenericAPIView):
+
+    @swagger_auto_schema(
+        operation_description="Кривая загрузки: число занятых номеров по ночам периода, всего и по типам номеров. "
+                              "Считается за один проход по бронированиям периода; результат кэшируется "
+                              "до изменения бронирований или комнат.",
+        manual_parameters=[
+            openapi.Parameter(
+                'from',
+                openapi.IN_QUERY,
+                description="Первая ночь периода (формат YYYY-MM-DD). По умолчанию — сегодня.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=False,
+            ),
+            openapi.Parameter(
+                'to',
+                openapi.IN_QUERY,
+                description="Последняя ночь периода (формат YYYY-MM-DD), включительно. По умолчанию — год от начала.",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=False,
+            ),
+            openapi.Parameter(
+                'granularity',
+                openapi.IN_QUERY,
+                description="Размер корзины: day, week (с понедельника) или month. По умолчанию day.",
+                type=openapi.TYPE_STRING,
+                enum=GRANULARITIES,
+                required=False,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Загрузка по корзинам периода.",
+                examples={
+                    "application/json": {
+                        "start_date": "2025-01-01",
+                        "end_date": "2025-01-31",
+                        "granularity": "month",
+                        "rooms": 40,
+                        "room_types": [{"id": 1, "name": "Одноместный", "rooms": 20}],
+                        "buckets": [
+                            {
+                                "start_date": "2025-01-01",
+                                "end_date": "2025-01-31",
+                                "nights": 31,
+                                "occupied_room_nights": 744,
+                                "capacity_room_nights": 1240,
+                                "occupancy": 0.6,
+                                "peak_occupied": 31,
+                                "room_types": [
+                                    {
+                                        "room_type_id": 1,
+                                        "occupied_room_nights": 372,
+                                        "capacity_room_nights": 620,
+                                        "occupancy": 0.6,
+                                        "peak_occupied": 16
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации данных. Например, период длиннее двух лет.",
+                examples={
+                    "application/json": {
+                        "to": ["Дата окончания не может быть раньше даты начала."],
+                    }
+                },
+            ),
+        },
+    )
+    @cached_response(*OCCUPANCY_DEPENDENCIES)
+    def get(self, request, *args, **kwargs):
+        serializer = OccupancyReportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
+
+        validated_data = serializer.validated_data
+        return Response(
+            build_occupancy_report(validated_data['from'], validated_data['to'], validated_data['granularity']),
+            status=200
         )
 
-        # Суммарный доход по всей гостинице
-        total_income = (
-                           Reservation.objects.filter(
-                               arrival_date__gte=start_date,
-                               departure_date__lte=end_date,
-                               payment_status__in=['PREPAID', 'PAID']
-                           )
-                           .aggregate(total_income=Sum('price_at_booking'))['total_income']
-                       ) or 0
-
-        report = {
-            "clients_per_room": list(clients_per_room),
-            "rooms_per_floor": list(rooms_per_floor),
-            "income_per_room": list(income_per_room),
-            "total_income": total_income,
-            "start_date": start_date,
-            "end_date": end_date
-        }
 
-        return Response(report, status=200)
+class ImportView(generics.GenericAPIView):
+    serializer_class = ImportUploadSerializer
+    parser_classes = [MultiPartParser]
 
-    def get_quarter_date_range(self, quarter, year):
-        start_month = (quarter - 1) * 3 + 1
-        end_month = start_month + 2
+    @swagger_auto_schema(
+        operation_description="Массовый импорт клиентов, комнат или бронирований из файла CSV/NDJSON. "
+                              "Файл обрабатывается пакетами, ошибочные строки не прерывают импорт и попадают в отчёт.",
+        manual_parameters=[
+            openapi.Parameter(
+                'kind',
+                openapi.IN_PATH,
+                description="Что импортируется: clients, rooms или reservations.",
+                type=openapi.TYPE_STRING,
+                enum=list(IMPORTERS),
+                required=True,
+            ),
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="Файл CSV с заголовком или NDJSON (один JSON-объект на строку).",
+                type=openapi.TYPE_FILE,
+                required=True,
+            ),
+            openapi.Parameter(
+                'format',
+                openapi.IN_FORM,
+                description="Формат файла; по умолчанию определяется по расширению.",
+                type=openapi.TYPE_STRING,
+                enum=['csv', 'ndjson'],
+                required=False,
+            ),
+            openapi.Parameter(
+                'batch_size',
+                openapi.IN_FORM,
+                description="Размер пакета записи (по умолчанию 1000).",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Отчёт об импорте.",
+                examples={
+                    "application/json": {
+                        "processed": 3,
+                        "created": 2,
+                        "updated": 0,
+                        "failed": 1,
+                        "errors": [
+                            {"row": 2, "detail": "Комната 101 уже забронирована на указанные даты."}
+                        ]
+                    }
+                },
+            ),
+            404: openapi.Response(
+                description="Неизвестный тип импорта.",
+                examples={
+                    "application/json": {
+                        "detail": "Импорт типа hotels не поддерживается."
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Ошибки валидации параметров загрузки.",
+                examples={
+                    "application/json": {
+                        "format": ["Не удалось определить формат файла, укажите format."]
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request, kind, *args, **kwargs):
+        importer_class = IMPORTERS.get(kind)
+        if importer_class is None:
+            return Response({"detail": f"Импорт типа {kind} не поддерживается."}, status=404)
 
-        start_date = datetime(year, start_month, 1)
-        last_day = calendar.monthrange(year, end_month)[1]
-        end_date = datetime(year, end_month, last_day)
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=422)
 
-        return start_date, end_date
+        validated_data = serializer.validated_data
+        importer = importer_class(batch_size=validated_data['batch_size'], user=request.user)
+        stream = codecs.getreader('utf-8-sig')(validated_data['file'], errors='replace')
+        report = importer.run(read_rows(stream, validated_data['format']))
+
+        return Response(report.as_dict(), status=200)
@@ -50,6 +50,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'hotel_app.pagination.HotelCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 DJOSER = {
@@ -60,6 +62,7 @@ DJOSER = {
 }
 
 MIDDLEWARE = [
+    'hotel_app.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +74,22 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'hotel_drf_app.urls'
 
+# Профилирование запросов: заголовок Server-Timing, метрики Prometheus на /metrics и предупреждения
+# о повторяющихся SQL-запросах (N+1), если один шаблон запроса выполнен не меньше THRESHOLD раз.
+# /metrics не требует аутентификации: в продакшене закройте его на уровне прокси
+HOTEL_PROFILING_ENABLED = DEBUG
+HOTEL_PROFILING_DUPLICATE_THRESHOLD = 5
+
+# Кэш ответов API. При нескольких процессах сервера используйте общий для них
+# 'django.core.cache.backends.filebased.FileBasedCache', иначе сброс дойдёт только до одного процесса
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hotel-responses',
+    }
+}
+HOTEL_RESPONSE_CACHE_TIMEOUT = 300
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -97,6 +116,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Транзакция сразу берёт блокировку записи: иначе одновременные бронирования, начавшие с чтения,
+        # не могут перейти к записи и получают «database is locked»
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -20,6 +20,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from hotel_app.profiling import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Hotel API",
@@ -40,4 +42,5 @@ urlpatterns = [
     path('auth/', include('djoser.urls')),
     re_path('^auth/', include('djoser.urls.authtoken')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('metrics', metrics_view, name='metrics'),
 ]